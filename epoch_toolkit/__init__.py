@@ -1,5 +1,7 @@
-from . import core, handler  # plot, generator
+from .utils.lazy import lazy_loader
 
 # ----------------------- #
 
-__all__ = ["core", "handler"]
+__all__ = ["core", "handler", "plot", "generator", "utils"]
+
+__getattr__, __dir__ = lazy_loader(__name__, submodules=__all__)
@@ -0,0 +1,260 @@
+import argparse
+from typing import List, Optional
+
+from epoch_toolkit.utils.parallel import slurm_array_task
+
+# ----------------------- #
+
+
+def _extract(args: argparse.Namespace):
+    from epoch_toolkit.handler.extract import ExtractionPlan, process_folder
+    from epoch_toolkit.handler.writer import AsyncWriter
+
+    plan = ExtractionPlan.from_file(args.spec)
+    writer = None
+
+    if args.async_write:
+        writer = AsyncWriter(batch_bytes=args.batch_bytes, compress=plan.compress)
+
+    if args.slurm:
+        shard_index, shard_count = slurm_array_task()
+
+    else:
+        shard_index, shard_count = args.shard_index, args.shard_count
+
+    written = process_folder(
+        args.folder,
+        plan,
+        out_dir=args.output,
+        workers=args.workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        overwrite=args.overwrite,
+        prefix=args.prefix,
+        slabs=args.slabs,
+        writer=writer,
+    )
+
+    if writer is not None:
+        writer.close()
+        stats = writer.stats()
+        print(
+            f"Writer: {stats.files} files, {stats.bytes / 2**20:.1f} MiB, "
+            f"{stats.wait_time:.1f}s waiting ({stats.backpressure:.1%})"
+        )
+
+    print(f"Shard {shard_index}/{shard_count}: {len(written)} dumps processed")
+
+
+# ----------------------- #
+
+
+def _merge(args: argparse.Namespace):
+    from epoch_toolkit.handler.extract import ExtractionPlan
+    from epoch_toolkit.handler.merge import merge_outputs
+
+    plan = ExtractionPlan.from_file(args.spec)
+    target = merge_outputs(args.folder, plan, target=args.output, cleanup=args.cleanup)
+
+    print(f"Merged results written to: {target}")
+
+
+# ----------------------- #
+
+
+def _archive(args: argparse.Namespace):
+    from epoch_toolkit.handler import FolderHandler
+
+    spec = dict(precision=args.precision, decimate=args.decimate)
+
+    if args.quantities:
+        spec["quantities"] = args.quantities
+
+    handler = FolderHandler(log_level="warning")
+    handler.read(args.folder, prefix=args.prefix)
+    errors = handler.archive(
+        args.output, spec, workers=args.workers, overwrite=args.overwrite
+    )
+
+    for name, bound in sorted(errors.items()):
+        print(f"{name}: max abs error {bound['abs']:.3e} ({bound['rel']:.2e} rel.)")
+
+
+# ----------------------- #
+
+
+def _index_decks(args: argparse.Namespace):
+    from epoch_toolkit.generator.parser import index_decks
+
+    index = index_decks(args.root, name=args.name, workers=args.workers or 8)
+
+    if args.output is not None:
+        index.to_csv(args.output)
+
+    print(f"Indexed {len(index)} decks")
+
+
+# ----------------------- #
+
+
+def _movie(args: argparse.Namespace):
+    from epoch_toolkit.handler.extract import Extraction
+    from epoch_toolkit.plot.movie import render_movie
+
+    with open(args.spec, "r") as f:
+        extraction = Extraction.model_validate_json(f.read())
+
+    target = render_movie(
+        args.folder,
+        extraction,
+        args.output,
+        workers=args.workers,
+        norm=args.norm,
+        percentile=args.percentile,
+        cmap=args.cmap,
+        fps=args.fps,
+        prefix=args.prefix,
+    )
+
+    print(f"Movie written to: {target}")
+
+
+# ----------------------- #
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="epoch-toolkit",
+        description="Headless post-processing of EPOCH runs",
+    )
+    parser.add_argument(
+        "--memory",
+        default=None,
+        help="Memory budget, e.g. 16G (default: SLURM allocation or 80%% of RAM)",
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Print the peak memory use when done",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser(
+        "extract",
+        help="Run a declarative list of extractions over all dumps of a run",
+    )
+    extract.add_argument("folder", help="Run folder with `.sdf` dumps")
+    extract.add_argument("spec", help="JSON file with the extraction plan")
+    extract.add_argument("-o", "--output", default=None, help="Output folder")
+    extract.add_argument("-j", "--workers", type=int, default=None)
+    extract.add_argument("--prefix", default=None, help="Dump file prefix")
+    extract.add_argument("--shard-index", type=int, default=0)
+    extract.add_argument("--shard-count", type=int, default=1)
+    extract.add_argument(
+        "--slurm",
+        action="store_true",
+        help="Take the shard from the SLURM job array environment",
+    )
+    extract.add_argument(
+        "--slabs",
+        type=int,
+        default=1,
+        help="Split every dump into x-slabs processed as separate work items",
+    )
+    extract.add_argument(
+        "--async-write",
+        action="store_true",
+        help="Write the results from a background thread of the main process",
+    )
+    extract.add_argument(
+        "--batch-bytes",
+        type=int,
+        default=0,
+        help="With --async-write, collect small results into files of this size",
+    )
+    extract.add_argument("--overwrite", action="store_true")
+    extract.set_defaults(func=_extract)
+
+    merge = commands.add_parser(
+        "merge",
+        help="Combine sharded extraction results into time series",
+    )
+    merge.add_argument("folder", help="Folder with the extraction results")
+    merge.add_argument("spec", help="JSON file with the extraction plan")
+    merge.add_argument("-o", "--output", default=None, help="Merged output file")
+    merge.add_argument(
+        "--cleanup", action="store_true", help="Remove slab partials after merging"
+    )
+    merge.set_defaults(func=_merge)
+
+    archive = commands.add_parser(
+        "archive",
+        help="Write decimated, reduced-precision archives of the grid data",
+    )
+    archive.add_argument("folder", help="Run folder with `.sdf` dumps")
+    archive.add_argument("output", help="Output folder for the archives")
+    archive.add_argument(
+        "-q", "--quantities", nargs="*", default=None, help="e.g. electric_field"
+    )
+    archive.add_argument(
+        "--precision", choices=["int16", "float16", "float32"], default="int16"
+    )
+    archive.add_argument(
+        "--decimate", type=int, nargs="+", default=[1], help="Stride per axis"
+    )
+    archive.add_argument("-j", "--workers", type=int, default=None)
+    archive.add_argument("--prefix", default=None, help="Dump file prefix")
+    archive.add_argument("--overwrite", action="store_true")
+    archive.set_defaults(func=_archive)
+
+    decks = commands.add_parser(
+        "index-decks",
+        help="Index the input decks of a folder tree into a table",
+    )
+    decks.add_argument("root", help="Folder searched recursively for decks")
+    decks.add_argument("--name", default="input.deck", help="Deck file name")
+    decks.add_argument("-o", "--output", default=None, help="CSV output file")
+    decks.add_argument("-j", "--workers", type=int, default=None)
+    decks.set_defaults(func=_index_decks)
+
+    movie = commands.add_parser(
+        "movie",
+        help="Render a 2D extraction of every dump into a movie",
+    )
+    movie.add_argument("folder", help="Run folder with `.sdf` dumps")
+    movie.add_argument("spec", help="JSON file with a single 2D extraction")
+    movie.add_argument("output", help="Video file or folder for PNG frames")
+    movie.add_argument("-j", "--workers", type=int, default=None)
+    movie.add_argument(
+        "--norm", choices=["linear", "log", "symmetric"], default="linear"
+    )
+    movie.add_argument("--percentile", type=float, default=None)
+    movie.add_argument("--cmap", default="viridis")
+    movie.add_argument("--fps", type=int, default=24)
+    movie.add_argument("--prefix", default=None, help="Dump file prefix")
+    movie.set_defaults(func=_movie)
+
+    return parser
+
+
+# ----------------------- #
+
+
+def main(argv: Optional[List[str]] = None):
+    from epoch_toolkit.utils.memory import BUDGET, set_budget
+
+    args = build_parser().parse_args(argv)
+
+    if args.memory is not None:
+        set_budget(args.memory)
+
+    args.func(args)
+
+    if args.memory_report:
+        print(BUDGET.report())
+
+
+# ----------------------- #
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
-from . import transform
+from ..utils.lazy import lazy_loader
 from .const import Component, EpochData, GridData, ParticleData, ScalarData, Unit
-from .grid import Axis, Grid
 
 # ----------------------- #
 
 __all__ = [
     "transform",
     "Grid",
+    "RunningStats",
+    "QuantileSketch",
+    "DerivedRegistry",
+    "DerivedEvaluator",
+    "Binning",
+    "TemporalOp",
+    "ScaledArray",
     "Unit",
     "Component",
     "Axis",
@@ -15,3 +21,19 @@ __all__ = [
     "ScalarData",
     "EpochData",
 ]
+
+__getattr__, __dir__ = lazy_loader(
+    __name__,
+    submodules=["transform"],
+    attributes={
+        "Grid": ".grid",
+        "Axis": ".grid",
+        "RunningStats": ".stats",
+        "QuantileSketch": ".stats",
+        "DerivedRegistry": ".derived",
+        "DerivedEvaluator": ".derived",
+        "Binning": ".spectrum",
+        "TemporalOp": ".temporal",
+        "ScaledArray": ".units",
+    },
+)
@@ -55,6 +55,30 @@ class Unit(ExtendedEnum):
     tera = 1e12
     peta = 1e15
 
+    # ....................... #
+
+    @property
+    def symbol(self) -> str:
+        """The SI prefix, e.g. `µ` for `micro`."""
+
+        return UNIT_SYMBOLS[self.name]
+
+
+UNIT_SYMBOLS = dict(
+    femto="f",
+    pico="p",
+    nano="n",
+    micro="µ",
+    milli="m",
+    centi="c",
+    deci="d",
+    kilo="k",
+    mega="M",
+    giga="G",
+    tera="T",
+    peta="P",
+)
+
 
 # ----------------------- #
 
@@ -74,6 +98,8 @@ class GridData(ExtendedEnum):
 class ParticleData(ExtendedEnum):
     coordinates = "Grid_Particles"
     momentum = "Particles_P"
+    id = "Particles_ID"
+    weight = "Particles_Weight"
 
 
 # ----------------------- #
@@ -90,3 +116,12 @@ class ScalarData(ExtendedEnum):
 # ----------------------- #
 
 EpochData = Union[ParticleData, ScalarData, GridData]
+
+# ----------------------- #
+
+# physical constants in SI units
+SPEED_OF_LIGHT = 2.99792458e8
+ELECTRON_MASS = 9.10938291e-31
+ELEMENTARY_CHARGE = 1.602176565e-19
+EPSILON_0 = 8.854187817620389e-12
+MU_0 = 1.2566370614359173e-06
@@ -0,0 +1,317 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.memory import BUDGET
+from .expr import compile_expression
+
+# ----------------------- #
+
+DEFAULT_CHUNK_ELEMENTS = 1 << 22
+
+# vector quantities and the position nodes their radial projections use
+GRID_VECTORS = ("electric_field", "magnetic_field", "current")
+PARTICLE_VECTORS = ("momentum",)
+
+# ----------------------- #
+
+
+class Derived(NamedTuple):
+    name: str
+    dependencies: Tuple[str, ...]
+    func: Callable[..., np.ndarray]
+    pointwise: bool = True
+
+
+# ----------------------- #
+
+
+class DerivedRegistry:
+    """
+    Registry of quantities derived from raw dump blocks.
+
+    Raw blocks are addressed as `<accessor>.<component>` (e.g.
+    `electric_field.x`, `momentum.z`, `coordinates.y`), grid coordinates as
+    `grid.<axis>` and per-evaluation constants (e.g. `mass`) by name. Any
+    dependency that is not registered is treated as such a leaf.
+    """
+
+    def __init__(self):
+        self._items: Dict[str, Derived] = dict()
+
+    # ....................... #
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._items
+
+    # ....................... #
+
+    def __getitem__(self, name: str) -> Derived:
+        return self._items[name]
+
+    # ....................... #
+
+    def names(self) -> List[str]:
+        return sorted(self._items.keys())
+
+    # ....................... #
+
+    def register(
+        self, name: str, dependencies: Sequence[str], pointwise: bool = True
+    ) -> Callable:
+        """
+        Decorator registering a function of its dependencies as a quantity.
+
+        `pointwise` functions only combine values element by element (with
+        broadcasting along the non-leading axes) and can thus be evaluated in
+        chunks along the first axis.
+        """
+
+        def decorator(func: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+            self._items[name] = Derived(name, tuple(dependencies), func, pointwise)
+            return func
+
+        return decorator
+
+    # ....................... #
+
+    def register_expression(self, name: str, expression: str, pointwise: bool = True):
+        """
+        Register a quantity defined by an expression (see `core.expr`) whose
+        variables are raw leaves or other derived quantities.
+
+        Example:
+            >>> register_expression(
+            ...     "e_perp", "sqrt(electric_field.y**2 + electric_field.z**2)"
+            ... )
+        """
+
+        compiled = compile_expression(expression)
+
+        def _func(*args: np.ndarray) -> np.ndarray:
+            return compiled(dict(zip(compiled.names, args)))
+
+        self._items[name] = Derived(name, tuple(compiled.names), _func, pointwise)
+
+    # ....................... #
+
+    def plan(self, names: Sequence[str], known: Sequence[str] = ()) -> List[str]:
+        """
+        Derived nodes needed for `names`, dependencies first.
+
+        Nodes in `known` (e.g. memoised results) are treated as leaves.
+        """
+
+        order: List[str] = []
+        visiting = set()
+
+        def _visit(name: str):
+            if name in order or name in known or name not in self._items:
+                return
+
+            if name in visiting:
+                raise ValueError(f"Cyclic dependency at: {name}")
+
+            visiting.add(name)
+
+            for dep in self._items[name].dependencies:
+                _visit(dep)
+
+            visiting.discard(name)
+            order.append(name)
+
+        for name in names:
+            _visit(name)
+
+        return order
+
+    # ....................... #
+
+    def leaves(self, names: Sequence[str], known: Sequence[str] = ()) -> List[str]:
+        """Raw blocks, coordinates and constants needed for `names`."""
+
+        order = self.plan(names, known=known)
+        deps = [d for n in order for d in self._items[n].dependencies]
+        leaves = [n for n in [*names, *deps] if n not in order]
+
+        return list(dict.fromkeys(leaves))
+
+
+# ----------------------- #
+
+REGISTRY = DerivedRegistry()
+register = REGISTRY.register
+register_expression = REGISTRY.register_expression
+
+# ----------------------- #
+
+
+class DerivedEvaluator:
+    """
+    Evaluates derived quantities of one dump through the dependency graph.
+
+    Every raw block is read once through `reader`, shared intermediates are
+    computed once, and pointwise graphs are evaluated in chunks along the first
+    axis so that intermediates only ever exist at chunk size. Requested
+    results are memoised for later calls.
+
+    Args:
+        reader (Callable): Returns the array of a raw leaf name.
+        constants (dict, optional): Scalar leaves such as `mass`.
+        registry (DerivedRegistry): The registry of derived quantities.
+        chunk_elements (int): Approximate number of elements per chunk, at
+            most; less when the memory budget is short.
+    """
+
+    def __init__(
+        self,
+        reader: Callable[[str], np.ndarray],
+        constants: Optional[Dict[str, Any]] = None,
+        registry: DerivedRegistry = REGISTRY,
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ):
+        self.reader = reader
+        self.constants = dict(constants or {})
+        self.registry = registry
+        self.chunk_elements = chunk_elements
+        self._leaves: Dict[str, Any] = dict()
+        self._memo: Dict[str, np.ndarray] = dict()
+
+    # ....................... #
+
+    def _leaf(self, name: str) -> Any:
+        if name in self._memo:
+            return self._memo[name]
+
+        if name in self.constants:
+            return self.constants[name]
+
+        if name not in self._leaves:
+            self._leaves[name] = self.reader(name)
+
+        return self._leaves[name]
+
+    # ....................... #
+
+    def clear(self):
+        self._leaves.clear()
+        self._memo.clear()
+
+    # ....................... #
+
+    def evaluate(self, *names: str) -> Dict[str, np.ndarray]:
+        todo = [n for n in dict.fromkeys(names) if n not in self._memo]
+
+        if todo:
+            self._memo.update(self._compute(todo))
+
+        return {n: self._memo[n] for n in names}
+
+    # ....................... #
+
+    def _compute(self, names: List[str]) -> Dict[str, np.ndarray]:
+        known = list(self._memo.keys())
+        order = self.registry.plan(names, known=known)
+        leaves = {n: self._leaf(n) for n in self.registry.leaves(names, known=known)}
+
+        if not order:
+            return {n: leaves[n] for n in names}
+
+        arrays = [np.asarray(v) for v in leaves.values() if np.ndim(v) >= 1]
+        size = max((a.shape[0] for a in arrays), default=1)
+        row = max(
+            (int(np.prod(a.shape[1:])) for a in arrays if a.shape[0] == size),
+            default=1,
+        )
+
+        if all(self.registry[n].pointwise for n in order):
+            # every node of the graph may hold a chunk-sized temporary
+            chunk = BUDGET.chunk_elements(self.chunk_elements, 8 * len(order))
+            rows = max(1, chunk // max(row, 1))
+
+        else:
+            rows = size
+
+        consumers: Dict[str, int] = dict()
+
+        for node in order:
+            for dep in self.registry[node].dependencies:
+                consumers[dep] = consumers.get(dep, 0) + 1
+
+        def _slice(value: Any, sl: slice) -> Any:
+            if np.ndim(value) >= 1 and np.shape(value)[0] == size and rows < size:
+                return value[sl]
+
+            return value
+
+        outputs: Dict[str, np.ndarray] = dict()
+
+        for start in range(0, size, rows):
+            sl = slice(start, min(start + rows, size))
+            local = {n: _slice(v, sl) for n, v in leaves.items()}
+            remaining = dict(consumers)
+
+            for node in order:
+                item = self.registry[node]
+                local[node] = item.func(*[local[d] for d in item.dependencies])
+
+                # drop intermediates of this chunk as soon as nothing needs them
+                for dep in item.dependencies:
+                    remaining[dep] -= 1
+
+                    if remaining[dep] == 0 and dep not in names and dep in order:
+                        del local[dep]
+
+            if rows >= size:
+                return {n: local[n] for n in names}
+
+            for name in names:
+                value = np.asarray(local[name])
+
+                if name not in outputs:
+                    shape = (size,) + value.shape[1:]
+                    outputs[name] = np.empty(shape, dtype=value.dtype)
+
+                outputs[name][sl] = value
+
+        return outputs
+
+
+# ----------------------- #
+# built-in quantities
+
+
+def _register_vector(v: str, r: str):
+    register_expression(f"{v}.abs", f"sqrt({v}.x**2 + {v}.y**2 + {v}.z**2)")
+    register_expression(
+        f"{v}.r",
+        f"sqrt({v}.y**2 + {v}.z**2) * sign({v}.y * {r}.y + {v}.z * {r}.z)",
+    )
+    register_expression(
+        f"{v}.r3d", f"{v}.abs * sign({v}.x * {r}.x + {v}.y * {r}.y + {v}.z * {r}.z)"
+    )
+    register_expression(f"{v}.phi", f"arctan2({v}.z, {v}.y)")
+    register_expression(f"{v}.theta", f"arccos({v}.z / {v}.abs)")
+
+
+for _name in GRID_VECTORS:
+    _register_vector(_name, "grid")
+
+for _name in PARTICLE_VECTORS:
+    _register_vector(_name, "coordinates")
+
+# ....................... #
+
+_e, _b = "electric_field", "magnetic_field"
+
+register_expression("poynting.x", f"({_e}.y * {_b}.z - {_e}.z * {_b}.y) / mu0")
+register_expression("poynting.y", f"({_e}.z * {_b}.x - {_e}.x * {_b}.z) / mu0")
+register_expression("poynting.z", f"({_e}.x * {_b}.y - {_e}.y * {_b}.x) / mu0")
+register_expression(
+    "poynting.abs", "sqrt(poynting.x**2 + poynting.y**2 + poynting.z**2)"
+)
+register_expression(
+    "field_energy_density", f"0.5 * epsilon0 * {_e}.abs**2 + 0.5 * {_b}.abs**2 / mu0"
+)
+register_expression("gamma", "sqrt(1 + (momentum.abs / (mass * c))**2)")
+register_expression("kinetic_energy", "(gamma - 1) * mass * c**2")
@@ -0,0 +1,566 @@
+import ast
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+from .const import (
+    ELECTRON_MASS,
+    ELEMENTARY_CHARGE,
+    EPSILON_0,
+    MU_0,
+    SPEED_OF_LIGHT,
+)
+
+# ----------------------- #
+
+# elements per block: a handful of float64 scratch buffers stay in L2 cache
+DEFAULT_BLOCK_ELEMENTS = 1 << 15
+
+# names bound to constants unless a variable of the same name is given
+CONSTANTS = {
+    "pi": math.pi,
+    "c": SPEED_OF_LIGHT,
+    "me": ELECTRON_MASS,
+    "qe": ELEMENTARY_CHARGE,
+    "epsilon0": EPSILON_0,
+    "mu0": MU_0,
+}
+
+UFUNCS = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "power": np.power,
+    "negative": np.negative,
+    "square": np.square,
+    "sqrt": np.sqrt,
+    "abs": np.abs,
+    "sign": np.sign,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "arcsin": np.arcsin,
+    "arccos": np.arccos,
+    "arctan": np.arctan,
+    "arctan2": np.arctan2,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+    "greater": np.greater,
+    "greater_equal": np.greater_equal,
+    "less": np.less,
+    "less_equal": np.less_equal,
+    "equal": np.equal,
+    "not_equal": np.not_equal,
+    "logical_and": np.logical_and,
+    "logical_or": np.logical_or,
+    "logical_not": np.logical_not,
+}
+
+# numexpr source templates of the ufuncs it supports
+NUMEXPR_TEMPLATES = {
+    "add": "({} + {})",
+    "subtract": "({} - {})",
+    "multiply": "({} * {})",
+    "divide": "({} / {})",
+    "power": "({} ** {})",
+    "negative": "(-{})",
+    "square": "({} ** 2)",
+    **{
+        name: name + "({})"
+        for name in (
+            "sqrt",
+            "abs",
+            "exp",
+            "log",
+            "log10",
+            "sin",
+            "cos",
+            "tan",
+            "arcsin",
+            "arccos",
+            "arctan",
+            "sinh",
+            "cosh",
+            "tanh",
+        )
+    },
+    "arctan2": "arctan2({}, {})",
+}
+
+_binary = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.Pow: "power",
+    ast.BitAnd: "logical_and",
+    ast.BitOr: "logical_or",
+}
+
+_compare = {
+    ast.Gt: "greater",
+    ast.GtE: "greater_equal",
+    ast.Lt: "less",
+    ast.LtE: "less_equal",
+    ast.Eq: "equal",
+    ast.NotEq: "not_equal",
+}
+
+# node: ("var", name) | ("const", value) | ("op", ufunc, args)
+Node = Tuple[Any, ...]
+
+# ----------------------- #
+
+
+@lru_cache(maxsize=None)
+def _numexpr():
+    try:
+        import numexpr
+
+    except ImportError:
+        return None
+
+    return numexpr
+
+
+# ----------------------- #
+
+
+def _name(node: ast.AST) -> Optional[str]:
+    """Dotted name of `a.b.c`, or `None` for anything else."""
+
+    if isinstance(node, ast.Name):
+        return node.id
+
+    elif isinstance(node, ast.Attribute):
+        parent = _name(node.value)
+
+        return None if parent is None else f"{parent}.{node.attr}"
+
+    return None
+
+
+# ....................... #
+
+
+def _op(ufunc: str, *args: Node) -> Node:
+    if all(a[0] == "const" for a in args):
+        return ("const", float(UFUNCS[ufunc](*[a[1] for a in args])))
+
+    # cheaper equivalents of common powers
+    if ufunc == "power" and args[1][0] == "const":
+        if args[1][1] == 1:
+            return args[0]
+
+        elif args[1][1] == 2:
+            return ("op", "square", (args[0],))
+
+        elif args[1][1] == 0.5:
+            return ("op", "sqrt", (args[0],))
+
+    return ("op", ufunc, args)
+
+
+# ....................... #
+
+
+def _parse(node: ast.AST, source: str) -> Node:
+    name = _name(node)
+
+    if name is not None:
+        return ("var", name)
+
+    elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return ("const", float(node.value))
+
+    elif isinstance(node, ast.BinOp) and type(node.op) in _binary:
+        return _op(
+            _binary[type(node.op)],
+            _parse(node.left, source),
+            _parse(node.right, source),
+        )
+
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return _op("negative", _parse(node.operand, source))
+
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+        return _parse(node.operand, source)
+
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+        return _op("logical_not", _parse(node.operand, source))
+
+    elif (
+        isinstance(node, ast.Compare)
+        and len(node.ops) == 1
+        and type(node.ops[0]) in _compare
+    ):
+        return _op(
+            _compare[type(node.ops[0])],
+            _parse(node.left, source),
+            _parse(node.comparators[0], source),
+        )
+
+    elif (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in UFUNCS
+        and not node.keywords
+    ):
+        ufunc = UFUNCS[node.func.id]
+
+        if len(node.args) != ufunc.nin:
+            raise ValueError(
+                f"`{node.func.id}` takes {ufunc.nin} argument(s): {source}"
+            )
+
+        return _op(node.func.id, *[_parse(a, source) for a in node.args])
+
+    raise ValueError(f"Unsupported expression: {source}")
+
+
+# ....................... #
+
+
+def _fold(node: Node, values: Dict[str, float]) -> Node:
+    """Substitute the given variables by constants and fold the result."""
+
+    if node[0] == "var":
+        return ("const", float(values[node[1]])) if node[1] in values else node
+
+    elif node[0] == "const":
+        return node
+
+    return _op(node[1], *[_fold(a, values) for a in node[2]])
+
+
+# ----------------------- #
+
+
+class _Scratch:
+    """Reusable block-sized buffers of one evaluation thread."""
+
+    __slots__ = ("shape", "dtype", "free")
+
+    def __init__(self, shape: Tuple[int, ...], dtype: np.dtype):
+        self.shape = shape
+        self.dtype = dtype
+        self.free: List[np.ndarray] = []
+
+    # ....................... #
+
+    def take(self, rows: int) -> np.ndarray:
+        buffer = self.free.pop() if self.free else np.empty(self.shape, self.dtype)
+
+        return buffer[:rows]
+
+    # ....................... #
+
+    def give(self, buffer: np.ndarray):
+        self.free.append(buffer.base if buffer.base is not None else buffer)
+
+
+# ----------------------- #
+
+
+class Expression:
+    """
+    A compiled arithmetic expression over named arrays.
+
+    Variables may be dotted names (e.g. `electric_field.x`), known physical
+    constants (`pi`, `c`, `me`, `qe`, `epsilon0`, `mu0`) are bound and
+    folded unless a variable of the same name is given, and the functions of
+    `UFUNCS` are available by their NumPy names.
+    Comparisons and `&`, `|`, `~` evaluate to 1 or 0, e.g. for masks such as
+    `(density > 1e25) & (grid.x > 0)`.
+
+    Evaluation is fused and cache-blocked: the (broadcast) result is computed
+    in blocks along its first axis, every operation of a block writes into a
+    reused scratch buffer (in place whenever an operand is itself a scratch
+    buffer) and the last one writes straight into the output, so no
+    full-size temporaries are allocated. Blocks are spread over threads, as
+    NumPy releases the GIL inside ufuncs. If `numexpr` is installed and
+    supports every function used, it can be used instead.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tree = _parse(ast.parse(source.strip(), mode="eval").body, source)
+        names = list(dict.fromkeys(self._names(self.tree)))
+
+        # the required variables; constants are optional (and may be shadowed)
+        self.names = [n for n in names if n not in CONSTANTS]
+        self.constants = [n for n in names if n in CONSTANTS]
+
+        # folded trees by the set of shadowed constants
+        self._bound: Dict[frozenset, Node] = dict()
+
+    # ....................... #
+
+    def __repr__(self) -> str:
+        return f"Expression({self.source!r})"
+
+    # ....................... #
+
+    @classmethod
+    def _names(cls, node: Node) -> List[str]:
+        if node[0] == "var":
+            return [node[1]]
+
+        elif node[0] == "const":
+            return []
+
+        return [n for a in node[2] for n in cls._names(a)]
+
+    # ....................... #
+
+    def bind(self, shadowed: Tuple[str, ...] = ()) -> Node:
+        """The tree with the constants folded in, except the `shadowed` ones."""
+
+        key = frozenset(shadowed)
+        tree = self._bound.get(key)
+
+        if tree is None:
+            values = {n: CONSTANTS[n] for n in self.constants if n not in key}
+            tree = self._bound[key] = _fold(self.tree, values)
+
+        return tree
+
+    # ....................... #
+
+    def numexpr_source(
+        self, tree: Optional[Node] = None
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """The equivalent numexpr source and its variable names, if supported."""
+
+        tree = tree or self.bind()
+        names = dict.fromkeys(self._names(tree))
+        aliases = {name: f"v{i}" for i, name in enumerate(names)}
+
+        def _source(node: Node) -> Optional[str]:
+            if node[0] == "var":
+                return aliases[node[1]]
+
+            elif node[0] == "const":
+                return repr(node[1])
+
+            elif node[1] not in NUMEXPR_TEMPLATES:
+                return None
+
+            args = [_source(a) for a in node[2]]
+
+            return None if None in args else NUMEXPR_TEMPLATES[node[1]].format(*args)
+
+        source = _source(tree)
+
+        return None if source is None else (source, aliases)
+
+    # ....................... #
+
+    def _direct(self, node: Node, variables: Dict[str, Any]) -> Any:
+        """Plain (unblocked) evaluation, for scalars and trivial expressions."""
+
+        if node[0] == "var":
+            return variables[node[1]]
+
+        elif node[0] == "const":
+            return node[1]
+
+        return UFUNCS[node[1]](*[self._direct(a, variables) for a in node[2]])
+
+    # ....................... #
+
+    def _block(
+        self,
+        node: Node,
+        local: Dict[str, Any],
+        scratch: _Scratch,
+        rows: int,
+        target: Optional[np.ndarray] = None,
+    ) -> Tuple[Any, bool]:
+        """Evaluate a node for one block, returning `(value, is_scratch)`."""
+
+        if node[0] == "var":
+            return local[node[1]], False
+
+        elif node[0] == "const":
+            return node[1], False
+
+        args = [self._block(a, local, scratch, rows) for a in node[2]]
+        owned = [v for v, is_scratch in args if is_scratch]
+
+        if target is not None:
+            out = target
+
+        elif owned:
+            out = owned.pop(0)
+
+        else:
+            out = scratch.take(rows)
+
+        UFUNCS[node[1]](*[v for v, _ in args], out=out)
+
+        for buffer in owned:
+            scratch.give(buffer)
+
+        return out, target is None
+
+    # ....................... #
+
+    def _run(
+        self,
+        tree: Node,
+        blocks: List[slice],
+        variables: Dict[str, Any],
+        out: np.ndarray,
+        size: int,
+    ):
+        scratch: Optional[_Scratch] = None
+
+        for sl in blocks:
+            local = {
+                n: v[sl] if np.ndim(v) == out.ndim and np.shape(v)[0] == size else v
+                for n, v in variables.items()
+            }
+            rows = sl.stop - sl.start
+
+            if scratch is None:
+                scratch = _Scratch((rows,) + out.shape[1:], out.dtype)
+
+            self._block(tree, local, scratch, rows, target=out[sl])
+
+    # ....................... #
+
+    def __call__(
+        self,
+        variables: Optional[Dict[str, Any]] = None,
+        out: Optional[np.ndarray] = None,
+        backend: Literal["auto", "numpy", "numexpr"] = "auto",
+        block_elements: int = DEFAULT_BLOCK_ELEMENTS,
+        workers: Optional[int] = None,
+        dtype: Optional[Union[str, np.dtype]] = None,
+    ) -> np.ndarray:
+        """
+        Evaluate the expression.
+
+        Args:
+            variables (dict): Arrays or scalars for every name in `names`,
+                optionally overriding the `constants`.
+            out (np.ndarray, optional): Output array of the broadcast shape.
+            backend (str): `numpy` (blocked ufunc chains), `numexpr` or `auto`,
+                which uses numexpr when installed and applicable.
+            block_elements (int): Approximate number of elements per block.
+            workers (int, optional): Number of threads, all CPUs by default.
+            dtype (str, optional): Result dtype when `out` is not given, the
+                promoted dtype of the variables (at least float32) by default.
+
+        Returns:
+            np.ndarray: The result.
+        """
+
+        variables = dict(variables or {})
+        missing = [n for n in self.names if n not in variables]
+
+        if missing:
+            raise KeyError(f"Missing variables for `{self.source}`: {missing}")
+
+        shadowed = tuple(n for n in self.constants if n in variables)
+        variables = {n: variables[n] for n in self.names + list(shadowed)}
+        arrays = [np.asarray(v) for v in variables.values()]
+        shape = np.broadcast_shapes(*[a.shape for a in arrays])
+        tree = self.bind(shadowed)
+
+        if out is None:
+            dtype = dtype or np.result_type(np.float32, *[a.dtype for a in arrays])
+            out = np.empty(shape, dtype=dtype)
+
+        elif out.shape != shape:
+            raise ValueError(f"Output shape {out.shape} does not match {shape}")
+
+        workers = workers or os.cpu_count() or 1
+        numexpr = _numexpr() if backend != "numpy" else None
+
+        if backend == "numexpr" and numexpr is None:
+            raise ImportError("The numexpr backend requires `numexpr` to be installed")
+
+        translated = self.numexpr_source(tree) if numexpr is not None else None
+
+        if backend == "numexpr" and translated is None:
+            raise ValueError(f"Expression not supported by numexpr: {self.source}")
+
+        if translated is not None:
+            source, aliases = translated
+            numexpr.set_num_threads(workers)
+            numexpr.evaluate(
+                source,
+                local_dict={aliases[n]: v for n, v in variables.items()},
+                global_dict={},
+                out=out,
+                casting="unsafe",
+            )
+
+            return out
+
+        if tree[0] != "op" or not shape:
+            out[...] = self._direct(tree, variables)
+
+            return out
+
+        size = shape[0]
+        rows = max(1, block_elements // max(1, int(np.prod(shape[1:]))))
+        blocks = [slice(s, min(s + rows, size)) for s in range(0, size, rows)]
+        workers = min(workers, len(blocks))
+
+        if workers <= 1:
+            self._run(tree, blocks, variables, out, size)
+
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        self._run, tree, blocks[i::workers], variables, out, size
+                    )
+                    for i in range(workers)
+                ]
+
+                for future in futures:
+                    future.result()
+
+        return out
+
+
+# ----------------------- #
+
+
+@lru_cache(maxsize=256)
+def compile_expression(source: str) -> Expression:
+    return Expression(source)
+
+
+# ----------------------- #
+
+
+def evaluate(
+    source: str,
+    variables: Optional[Dict[str, Any]] = None,
+    out: Optional[np.ndarray] = None,
+    **kwargs,
+) -> np.ndarray:
+    """
+    Evaluate an expression over named arrays, e.g.
+    `evaluate("sqrt(x**2 + y**2)", dict(x=x, y=y))`.
+
+    See `Expression` for the syntax and keyword arguments.
+    """
+
+    return compile_expression(source)(variables, out=out, **kwargs)
@@ -1,9 +1,13 @@
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
 
+import numpy as np
 from pydantic import BaseModel, model_validator
-from sdf import BlockList
 
 from .const import ExtendedEnum, Unit
+from .units import from_si, to_si
+
+if TYPE_CHECKING:
+    from sdf import BlockList
 
 # ----------------------- #
 
@@ -21,6 +25,7 @@ class BaseGrid(BaseModel):
     max: float
     min: float
     size: int
+    step: Optional[float] = None  # explicit spacing, e.g. of a slab of a grid
 
     # ....................... #
 
@@ -36,18 +41,35 @@ class BaseGrid(BaseModel):
 
     # ....................... #
 
+    @property
+    def spacing(self) -> float:
+        """Distance between neighbouring cell centres in SI units."""
+
+        if self.step is not None:
+            return self.step
+
+        return (self.max - self.min) / (self.size - 1)
+
+    # ....................... #
+
     def val_to_idx(self, val: float, unit: Optional[Unit] = None) -> int:
-        if unit is not None:
-            val *= unit.value
+        val = to_si(val, unit)
 
         return int((val - self.min) / (self.max - self.min) * self.size)
 
     # ....................... #
 
     def idx_to_val(self, idx: int, unit: Optional[Unit] = None) -> float:
-        multiplier = unit.value if unit is not None else 1
+        """The position of an index in SI units, or expressed in `unit`."""
 
-        return (idx * (self.max - self.min) / self.size + self.min) * multiplier
+        return from_si(idx * (self.max - self.min) / self.size + self.min, unit)
+
+    # ....................... #
+
+    def values(self, unit: Optional[Unit] = None) -> np.ndarray:
+        """The cell centres, expressed in `unit` (scaled on this 1D axis only)."""
+
+        return from_si(self.min + np.arange(self.size) * self.spacing, unit)
 
 
 # ----------------------- #
@@ -75,8 +97,34 @@ class Grid(BaseModel):
     # ....................... #
 
     @classmethod
-    def from_sdf(cls, file: BlockList) -> "Grid":
+    def from_arrays(
+        cls,
+        mins: Sequence[float],
+        maxs: Sequence[float],
+        sizes: Sequence[int],
+        steps: Optional[Sequence[Optional[float]]] = None,
+    ) -> "Grid":
+        """
+        Build a grid from per-axis values in a single validation pass over
+        plain data, the cheapest way to create many of them.
+        """
+
+        steps = steps if steps is not None else [None] * len(sizes)
+        axes = [
+            dict(min=lo, max=hi, size=n, step=h)
+            for lo, hi, n, h in zip(mins, maxs, sizes, steps)
+        ]
+
+        return cls.model_validate(dict(axes=axes))
+
+    # ....................... #
+
+    @classmethod
+    def from_sdf(cls, file: "BlockList") -> "Grid":
         grid_mid = file.Grid_Grid_mid.data
-        axes = [BaseGrid(max=g[-1], min=g[0], size=g.size) for g in grid_mid]
 
-        return cls(axes=axes)
+        return cls.from_arrays(
+            [g[0] for g in grid_mid],
+            [g[-1] for g in grid_mid],
+            [g.size for g in grid_mid],
+        )
@@ -0,0 +1,240 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Literal, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, field_validator, model_validator
+
+from ..utils.memory import BUDGET
+from .const import ELECTRON_MASS, ELEMENTARY_CHARGE, SPEED_OF_LIGHT, Unit
+from .units import factor
+
+# ----------------------- #
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# default ranges of the angles in radians
+ANGLE_RANGES = {"theta": (0.0, math.pi), "phi": (-math.pi, math.pi)}
+
+# ----------------------- #
+
+
+class Binning(BaseModel):
+    """
+    Fixed bins of a particle quantity, so that histograms of chunks, dumps
+    and runs add up.
+
+    Quantities:
+        - `gamma`: the Lorentz factor.
+        - `energy`: the kinetic energy in eV, or in `unit` eV (e.g. `mega`
+          for MeV).
+        - `theta`: the angle between the momentum and `axis`.
+        - `phi`: the azimuth around `axis`, from the next axis in cyclic
+          order (`y` for `x`).
+
+    Args:
+        name (str, optional): The result name, the quantity by default.
+        bins (int): Number of bins.
+        min, max (float, optional): The range, required except for angles.
+        log (bool): Logarithmically spaced bins.
+        axis (str): The reference axis of the angles.
+        unit (Unit, optional): The prefix of the energy unit.
+    """
+
+    quantity: Literal["gamma", "energy", "theta", "phi"]
+    name: Optional[str] = None
+    bins: int = 256
+    min: Optional[float] = None
+    max: Optional[float] = None
+    log: bool = False
+    axis: Literal["x", "y", "z"] = "x"
+    unit: Optional[Unit] = None
+
+    # ....................... #
+
+    @field_validator("unit", mode="before")
+    @classmethod
+    def check_unit(cls, v):
+        return Unit.get(v) if isinstance(v, str) else v
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        lo, hi = ANGLE_RANGES.get(self.quantity, (None, None))
+        self.min = lo if self.min is None else self.min
+        self.max = hi if self.max is None else self.max
+        self.name = self.name or self.quantity
+
+        if self.min is None or self.max is None:
+            raise ValueError(f"Binning of `{self.quantity}` requires min and max")
+
+        if self.max <= self.min or self.bins < 1:
+            raise ValueError("Invalid bins: max should exceed min, bins be positive")
+
+        if self.log and self.min <= 0:
+            raise ValueError("Logarithmic bins require a positive min")
+
+        return self
+
+    # ....................... #
+
+    def edges(self) -> np.ndarray:
+        if self.log:
+            return np.geomspace(self.min, self.max, self.bins + 1)
+
+        return np.linspace(self.min, self.max, self.bins + 1)
+
+    # ....................... #
+
+    def index(self, values: np.ndarray) -> np.ndarray:
+        """Bin of every value, `-1` outside of the range (or NaN)."""
+
+        if self.log:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.log(values / self.min)
+
+            width = math.log(self.max / self.min) / self.bins
+
+        else:
+            values = values - self.min
+            width = (self.max - self.min) / self.bins
+
+        values /= width
+        inside = (values >= 0) & (values < self.bins)
+
+        return np.where(inside, values, -1).astype(np.int64)
+
+
+# ----------------------- #
+
+
+def _chunk(
+    momentum: Sequence[np.ndarray],
+    weights: Optional[np.ndarray],
+    binnings: Sequence[Binning],
+    mass: float,
+) -> List[np.ndarray]:
+    px, py, pz = (np.asarray(p, dtype=np.float64) for p in momentum)
+    mc = mass * SPEED_OF_LIGHT
+    w = None if weights is None else np.asarray(weights, dtype=np.float64)
+    values: Dict[str, np.ndarray] = dict()
+
+    def _value(b: Binning) -> np.ndarray:
+        if b.quantity == "gamma":
+            key = "gamma"
+
+        elif b.quantity == "energy":
+            key = "energy" if b.unit is None else f"energy_{b.unit.name}"
+
+        else:
+            key = b.quantity + b.axis
+
+        if key in values:
+            return values[key]
+
+        if b.quantity in ("gamma", "energy"):
+            if "u2" not in values:
+                values["u2"] = (px * px + py * py + pz * pz) / (mc * mc)
+
+            u2 = values["u2"]
+
+            if "gamma" not in values:
+                values["gamma"] = np.sqrt(1 + u2)
+
+            if b.quantity == "energy":
+                # `u^2 / (gamma + 1)` equals `gamma - 1` without cancellation
+                if "energy" not in values:
+                    scale = mass * SPEED_OF_LIGHT**2 / ELEMENTARY_CHARGE
+                    values["energy"] = u2 / (values["gamma"] + 1) * scale
+
+                # the energy in eV is shared, every unit gets its own values
+                if b.unit is not None:
+                    values[key] = values["energy"] / factor(b.unit)
+
+        else:
+            k = "xyz".index(b.axis)
+            p = (px, py, pz)
+            along, a, c = p[k], p[(k + 1) % 3], p[(k + 2) % 3]
+
+            if b.quantity == "theta":
+                values[key] = np.arctan2(np.sqrt(a * a + c * c), along)
+
+            else:
+                values[key] = np.arctan2(c, a)
+
+        return values[key]
+
+    counts = []
+
+    for b in binnings:
+        idx = b.index(_value(b))
+        keep = idx >= 0
+        weight = None if w is None else w[keep]
+        counts.append(np.bincount(idx[keep], weights=weight, minlength=b.bins))
+
+    return counts
+
+
+# ----------------------- #
+
+
+def spectrum(
+    momentum: Sequence[np.ndarray],
+    binnings: Sequence[Binning],
+    weights: Optional[np.ndarray] = None,
+    mass: float = ELECTRON_MASS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Weighted histograms of gamma, energy and angles of a particle specie.
+
+    Every chunk of `chunk_size` particles is read once and all requested
+    quantities are computed from it, sharing intermediates (`|p|^2`, gamma),
+    and binned by direct index computation instead of a search. Chunks are
+    processed by a thread pool; NumPy releases the GIL in the kernels.
+
+    Args:
+        momentum (Sequence[np.ndarray]): `(px, py, pz)` in SI units, any
+            array-likes supporting slicing (e.g. memory-mapped).
+        binnings (Sequence[Binning]): The histograms to accumulate.
+        weights (np.ndarray, optional): Macro-particle weights.
+        mass (float): The particle mass.
+        chunk_size (int): Number of particles per chunk, at most; less when
+            the memory budget is short.
+        workers (int, optional): Number of threads, all CPUs by default.
+
+    Returns:
+        Dict[str, np.ndarray]: The (weighted) counts per binning name.
+    """
+
+    size = len(momentum[0])
+    workers = workers or os.cpu_count() or 1
+
+    # every thread holds a chunk of the momenta and about six temporaries
+    chunk_size = BUDGET.chunk_elements(chunk_size, 8 * 10 * workers)
+    starts = list(range(0, size, chunk_size))
+    workers = min(workers, max(len(starts), 1))
+
+    def _run(start: int) -> List[np.ndarray]:
+        sl = slice(start, start + chunk_size)
+        w = None if weights is None else weights[sl]
+
+        return _chunk([p[sl] for p in momentum], w, binnings, mass)
+
+    if workers <= 1:
+        results = list(map(_run, starts))
+
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run, starts))
+
+    totals = [np.zeros(b.bins) for b in binnings]
+
+    for counts in results:
+        for total, c in zip(totals, counts):
+            total += c
+
+    return {b.name: total for b, total in zip(binnings, totals)}
@@ -0,0 +1,295 @@
+import math
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+# ----------------------- #
+
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+# ----------------------- #
+
+
+class _Store:
+    """Dense, growable bucket counts indexed by an integer key."""
+
+    __slots__ = ("offset", "counts")
+
+    def __init__(self, offset: int = 0, counts: Optional[np.ndarray] = None):
+        self.offset = offset
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+
+    # ....................... #
+
+    def _grow(self, lo: int, hi: int):
+        if not self.counts.size:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.counts.size - 1)
+
+        if new_lo == self.offset and new_hi == self.offset + self.counts.size - 1:
+            return
+
+        counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        start = self.offset - new_lo
+        counts[start : start + self.counts.size] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    # ....................... #
+
+    def add(self, keys: np.ndarray):
+        if not keys.size:
+            return
+
+        lo, hi = int(keys.min()), int(keys.max())
+        self._grow(lo, hi)
+        start = lo - self.offset
+        self.counts[start : start + hi - lo + 1] += np.bincount(
+            keys - lo, minlength=hi - lo + 1
+        )
+
+    # ....................... #
+
+    def merge(self, other: "_Store"):
+        if not other.counts.size:
+            return
+
+        self._grow(other.offset, other.offset + other.counts.size - 1)
+        start = other.offset - self.offset
+        self.counts[start : start + other.counts.size] += other.counts
+
+
+# ----------------------- #
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative accuracy guarantee (DDSketch).
+
+    Values are counted in logarithmic buckets of `|x|`, separately for the
+    positive and negative half-lines, so that every reported quantile is
+    within `alpha` relative error of an exact one. Sketches with the same
+    `alpha` merge by adding their bucket counts.
+    """
+
+    __slots__ = ("alpha", "zero", "positive", "negative", "_log_gamma")
+
+    min_value = 1e-300
+
+    def __init__(self, alpha: float = 0.01):
+        self.alpha = alpha
+        self.zero = 0
+        self.positive = _Store()
+        self.negative = _Store()
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+
+    # ....................... #
+
+    def _keys(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    # ....................... #
+
+    def _value(self, keys: np.ndarray) -> np.ndarray:
+        gamma = math.exp(self._log_gamma)
+
+        return 2 * np.exp(keys * self._log_gamma) / (gamma + 1)
+
+    # ....................... #
+
+    def update(self, values: np.ndarray):
+        """Add finite values (a 1D chunk) to the sketch."""
+
+        magnitude = np.abs(values)
+        is_zero = magnitude < self.min_value
+        self.zero += int(is_zero.sum())
+
+        positive = values > 0
+        self.positive.add(self._keys(magnitude[positive & ~is_zero]))
+        self.negative.add(self._keys(magnitude[~positive & ~is_zero]))
+
+    # ....................... #
+
+    def merge(self, other: "QuantileSketch"):
+        if not math.isclose(self.alpha, other.alpha):
+            raise ValueError("Cannot merge sketches with different accuracy")
+
+        self.zero += other.zero
+        self.positive.merge(other.positive)
+        self.negative.merge(other.negative)
+
+    # ....................... #
+
+    @property
+    def count(self) -> int:
+        return self.zero + int(self.positive.counts.sum() + self.negative.counts.sum())
+
+    # ....................... #
+
+    def quantile(self, q: Union[float, Sequence[float]]) -> np.ndarray:
+        neg_keys = self.negative.offset + np.arange(self.negative.counts.size)
+        pos_keys = self.positive.offset + np.arange(self.positive.counts.size)
+
+        # buckets in ascending order of value: large negatives first
+        values = np.concatenate(
+            [-self._value(neg_keys[::-1]), [0.0], self._value(pos_keys)]
+        )
+        counts = np.concatenate(
+            [self.negative.counts[::-1], [self.zero], self.positive.counts]
+        )
+
+        cumulative = np.cumsum(counts)
+
+        if not cumulative.size or cumulative[-1] == 0:
+            return np.full(np.shape(q), np.nan)
+
+        rank = np.asarray(q, dtype=np.float64) * (cumulative[-1] - 1)
+        idx = np.searchsorted(cumulative, rank, side="right")
+
+        return values[np.minimum(idx, values.size - 1)]
+
+    # ....................... #
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            alpha=self.alpha,
+            zero=self.zero,
+            positive=[self.positive.offset, self.positive.counts.tolist()],
+            negative=[self.negative.offset, self.negative.counts.tolist()],
+        )
+
+    # ....................... #
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(alpha=data["alpha"])
+        sketch.zero = data["zero"]
+
+        for name in ("positive", "negative"):
+            offset, counts = data[name]
+            setattr(sketch, name, _Store(offset, np.asarray(counts, dtype=np.int64)))
+
+        return sketch
+
+
+# ----------------------- #
+
+
+class RunningStats:
+    """
+    Streaming, parallel-mergeable statistics of an array quantity.
+
+    Keeps the count, mean and second central moment (Welford / Chan et al.),
+    the extrema and a `QuantileSketch` for approximate quantiles. Values are
+    consumed chunk by chunk, so the memory overhead does not depend on the
+    block size, and partial results from several workers combine with `merge`.
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "nonfinite", "sketch")
+
+    def __init__(self, alpha: float = 0.01):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.nonfinite = 0
+        self.sketch = QuantileSketch(alpha=alpha)
+
+    # ....................... #
+
+    def _combine(self, count: int, mean: float, m2: float):
+        if count == 0:
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    # ....................... #
+
+    def update(self, values: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Add all values of an array (of any shape), chunk by chunk."""
+
+        flat = np.asarray(values).reshape(-1)
+
+        for start in range(0, flat.size, chunk_size):
+            chunk = flat[start : start + chunk_size].astype(np.float64, copy=False)
+            finite = np.isfinite(chunk)
+
+            if not finite.all():
+                self.nonfinite += int(chunk.size - finite.sum())
+                chunk = chunk[finite]
+
+            if not chunk.size:
+                continue
+
+            mean = float(chunk.mean())
+            m2 = float(np.square(chunk - mean).sum())
+            self._combine(chunk.size, mean, m2)
+            self.min = min(self.min, float(chunk.min()))
+            self.max = max(self.max, float(chunk.max()))
+            self.sketch.update(chunk)
+
+        return self
+
+    # ....................... #
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        self._combine(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.nonfinite += other.nonfinite
+        self.sketch.merge(other.sketch)
+
+        return self
+
+    # ....................... #
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else math.nan
+
+    # ....................... #
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    # ....................... #
+
+    def quantile(self, q: Union[float, Sequence[float]]) -> np.ndarray:
+        """Approximate quantile(s), clipped to the exact extrema."""
+
+        return np.clip(self.sketch.quantile(q), self.min, self.max)
+
+    # ....................... #
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            mean=self.mean,
+            m2=self.m2,
+            min=self.min,
+            max=self.max,
+            nonfinite=self.nonfinite,
+            sketch=self.sketch.to_dict(),
+        )
+
+    # ....................... #
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        stats = cls(alpha=data["sketch"]["alpha"])
+
+        for key in ("count", "mean", "m2", "min", "max", "nonfinite"):
+            setattr(stats, key, data[key])
+
+        stats.sketch = QuantileSketch.from_dict(data["sketch"])
+
+        return stats
@@ -0,0 +1,120 @@
+from collections import deque
+from typing import Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel, model_validator
+
+# ----------------------- #
+
+DEFAULT_CHUNK_ELEMENTS = 1 << 22
+
+# ----------------------- #
+
+
+class TemporalOp(BaseModel):
+    """
+    An operator over a sliding window of consecutive dumps.
+
+    Operations:
+        - `diff`: the last minus the first value of the window.
+        - `derivative`: the least-squares slope in time, i.e. the forward
+          difference for a window of 2 and the central difference for 3
+          equally spaced dumps.
+        - `mean`: the rolling mean.
+        - `growth_rate`: the least-squares slope of `log|f|`, the rate of
+          exponential growth (NaN where the field vanishes).
+
+    Args:
+        operation (str): The operation.
+        window (int): The number of dumps per window, at least 2.
+        stride (int): Dumps between the starts of consecutive windows.
+    """
+
+    operation: Literal["diff", "derivative", "mean", "growth_rate"]
+    window: int = 2
+    stride: int = 1
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        if self.window < 2 or self.stride < 1:
+            raise ValueError("The window should span 2 dumps or more, stride >= 1")
+
+        return self
+
+    # ....................... #
+
+    def count(self, dumps: int) -> int:
+        """Number of windows over a run of `dumps` dumps."""
+
+        return max(0, (dumps - self.window) // self.stride + 1)
+
+    # ....................... #
+
+    def apply(self, values: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Apply to a window of values stacked along the first axis."""
+
+        if self.operation == "diff":
+            return values[-1] - values[0]
+
+        if self.operation == "mean":
+            return values.mean(axis=0)
+
+        if self.operation == "growth_rate":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.log(np.abs(values))
+
+            values[~np.isfinite(values)] = np.nan
+
+        dt = times - times.mean()
+        weights = dt / (dt * dt).sum()
+
+        return np.tensordot(weights, values, axes=(0, 0))
+
+
+# ----------------------- #
+
+
+class SlidingWindow:
+    """
+    Apply a `TemporalOp` to a stream of arrays (e.g. the same x-chunk of
+    consecutive dumps), holding only the arrays of one window.
+
+    Example:
+        >>> window = SlidingWindow(TemporalOp(operation="derivative"))
+        >>> for t, chunk in stream:
+        ...     result = window.push(chunk, t)
+        ...     if result is not None:
+        ...         time, value = result
+    """
+
+    def __init__(self, op: TemporalOp):
+        self.op = op
+        self._values: deque = deque(maxlen=op.window)
+        self._times: deque = deque(maxlen=op.window)
+        self._pushed = 0
+
+    # ....................... #
+
+    def push(self, value: np.ndarray, time: float) -> Optional[tuple]:
+        """
+        Add the next array of the stream.
+
+        Returns:
+            tuple, optional: The window time (the mean of its dump times) and
+                the result, once a window is complete.
+        """
+
+        self._values.append(np.asarray(value, dtype=np.float64))
+        self._times.append(float(time))
+        self._pushed += 1
+
+        first = self._pushed - self.op.window
+
+        if first < 0 or first % self.op.stride:
+            return None
+
+        times = np.array(self._times)
+
+        return times.mean(), self.op.apply(np.stack(self._values), times)
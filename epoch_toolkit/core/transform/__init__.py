@@ -1,12 +1,38 @@
-# from .crop import GridCrop
-from .math import cartesian_to_cylindrical, cartesian_to_spherical, direction
-from .projection import PlaneProjection
+from ...utils.lazy import lazy_loader
 
 # ----------------------- #
 
 __all__ = [
+    "GridCrop",
+    "Reduction",
     "PlaneProjection",
+    "TransformChain",
+    "Mask",
+    "GridSlice",
+    "ObliqueSlice",
+    "Gather",
+    "MaskSpec",
     "cartesian_to_cylindrical",
     "cartesian_to_spherical",
     "direction",
+    "batched",
 ]
+
+__getattr__, __dir__ = lazy_loader(
+    __name__,
+    attributes={
+        "GridCrop": ".crop",
+        "Reduction": ".reduction",
+        "PlaneProjection": ".reduction",
+        "TransformChain": ".chain",
+        "Mask": ".mask",
+        "GridSlice": ".slice",
+        "ObliqueSlice": ".slice",
+        "Gather": ".gather",
+        "MaskSpec": ".mask",
+        "cartesian_to_cylindrical": ".math",
+        "cartesian_to_spherical": ".math",
+        "direction": ".math",
+        "batched": ".math",
+    },
+)
@@ -0,0 +1,88 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, model_validator
+
+from ..grid import Grid
+from .crop import GridCrop
+from .reduction import Reduction
+from .slice import GridSlice, ObliqueSlice, view_grid, view_index
+
+# ----------------------- #
+
+
+class TransformChain(BaseModel):
+    """
+    Crops and slices (combined into a single view), an optional oblique
+    slice and an optional reduction, applied in this order.
+    """
+
+    crops: List[GridCrop] = []
+    slices: List[GridSlice] = []
+    oblique: Optional[ObliqueSlice] = None
+    projection: Optional[Reduction] = None
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        planes = any(s.value is not None for s in self.slices)
+
+        if self.projection is not None and (planes or self.oblique is not None):
+            raise ValueError("A projection cannot follow plane or oblique slices")
+
+        if self.oblique is not None and planes:
+            raise ValueError("An oblique slice cannot follow plane slices")
+
+        return self
+
+    # ....................... #
+
+    def apply(
+        self,
+        arr: np.ndarray,
+        grid: Grid,
+        weights: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        if self.crops or self.slices:
+            index = view_index(grid, [*self.crops, *self.slices], ndim=len(arr.shape))
+            arr = arr[index]
+            weights = None if weights is None else weights[index]
+            mask = None if mask is None else mask[index]
+            grid = view_grid(grid, index)
+
+        if self.oblique is not None:
+            if weights is not None or mask is not None:
+                raise ValueError("Oblique slices do not support weights or masks")
+
+            return self.oblique.apply(arr, grid)
+
+        if self.projection is not None:
+            return self.projection.apply(arr, grid, weights=weights, mask=mask)
+
+        if weights is not None:
+            arr = arr * weights
+
+        if mask is not None:
+            arr = np.where(mask, arr, np.nan)
+
+        return arr
+
+    # ....................... #
+
+    def apply_particles(
+        self, arr: np.ndarray, coordinates: Sequence[np.ndarray]
+    ) -> np.ndarray:
+        if self.projection is not None or self.slices or self.oblique is not None:
+            raise ValueError("Projections and slices are not defined for particle data")
+
+        if not self.crops:
+            return arr
+
+        mask = np.ones(arr.shape, dtype=bool)
+
+        for crop in self.crops:
+            mask &= crop.mask(coordinates["xyz".index(crop.axis)])
+
+        return arr[mask]
@@ -1,67 +1,66 @@
-# from typing import Literal, Optional
+from typing import Literal, Optional
 
-# import numpy as np
-# from pydantic import BaseModel, model_validator
+import numpy as np
+from pydantic import BaseModel, field_validator, model_validator
 
-# from ..const import Unit
-# from ..grid import AbstractGrid, BaseGrid
+from ..const import Unit
+from ..grid import Grid
+from ..units import to_si
 
-# # ----------------------- #
+# ----------------------- #
 
 
-# class GridCrop(BaseModel):
-#     min: float
-#     max: float
-#     grid: BaseGrid
-#     unit: Optional[Unit] = None
+class GridCrop(BaseModel):
+    min: float
+    max: float
+    axis: Literal["x", "y", "z"]
+    unit: Optional[Unit] = None
 
-#     # ....................... #
+    # ....................... #
 
-#     @model_validator(mode="after")
-#     def check_all(self):
-#         if self.max <= self.min:
-#             raise ValueError("max should be greater than min")
+    @field_validator("unit", mode="before")
+    @classmethod
+    def check_unit(cls, v):
+        return Unit.get(v) if isinstance(v, str) else v
 
-#         return self
+    # ....................... #
 
-#     # ....................... #
+    @model_validator(mode="after")
+    def check_all(self):
+        if self.max <= self.min:
+            raise ValueError("max should be greater than min")
 
-#     def apply(self, arr: np.ndarray) -> np.ndarray:
-#         min_idx = self.grid.val_to_idx(self.min, unit=self.unit)
-#         max_idx = self.grid.val_to_idx(self.max, unit=self.unit)
+        return self
 
-#         ndims = arr.ndim
-#         slices = [slice(None)] * ndims
+    # ....................... #
 
-#         if self.grid.axis == "x":
-#             slices[0] = slice(min_idx, max_idx)
+    def bounds(self, grid: Grid) -> slice:
+        target = grid.component(self.axis)
+        min_idx = max(target.val_to_idx(self.min, unit=self.unit), 0)
+        max_idx = min(target.val_to_idx(self.max, unit=self.unit), target.size)
 
-#         elif self.grid.axis == "y" and ndims > 1:
-#             slices[1] = slice(min_idx, max_idx)
+        return slice(min_idx, max_idx)
 
-#         elif self.grid.axis == "z" and ndims > 2:
-#             slices[2] = slice(min_idx, max_idx)
+    # ....................... #
 
-#         else:
-#             raise ValueError(f"Invalid axis: {self.grid.axis}")
+    def apply(self, arr: np.ndarray, grid: Grid) -> np.ndarray:
+        axis = "xyz".index(self.axis)
 
-#         return arr[tuple(slices)]
+        if arr.ndim <= axis:
+            raise ValueError(
+                f"Cannot crop along {self.axis}-axis for {arr.ndim}D array"
+            )
 
-#     # ....................... #
+        slices = [slice(None)] * arr.ndim
+        slices[axis] = self.bounds(grid)
 
-#     @classmethod
-#     def from_abstract_grid(
-#         cls,
-#         min: float,
-#         max: float,
-#         axis: Literal["x", "y", "z"],
-#         grid: AbstractGrid,
-#         unit: Unit = None,
-#     ) -> "GridCrop":
-#         try:
-#             target_grid = getattr(grid, axis)
+        return arr[tuple(slices)]
 
-#         except AttributeError:
-#             raise ValueError(f"Axis `{axis}` not found in grid")
+    # ....................... #
 
-#         return cls(min=min, max=max, grid=target_grid, unit=unit)
+    def mask(self, coordinates: np.ndarray) -> np.ndarray:
+        """Boolean mask of particles whose coordinate lies within the crop."""
+
+        lo, hi = to_si(self.min, self.unit), to_si(self.max, self.unit)
+
+        return (coordinates >= lo) & (coordinates <= hi)
@@ -0,0 +1,192 @@
+from itertools import product
+from typing import Dict, Literal, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ...utils.memory import BUDGET
+from ..grid import Grid
+
+# ----------------------- #
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+GatherMethod = Literal["ngp", "nearest", "linear", "cic"]
+
+FIELD_COMPONENTS = tuple(
+    f"{field}.{c}" for field in ("electric_field", "magnetic_field") for c in "xyz"
+)
+
+# ----------------------- #
+
+
+class Stencil(NamedTuple):
+    """
+    Cells and weights of a set of points, shaped `(corner, point)`.
+
+    `indices` holds one integer array per grid axis, so that `arr[indices]`
+    gathers the corner values of every point.
+    """
+
+    indices: Tuple[np.ndarray, ...]
+    weights: np.ndarray
+    valid: np.ndarray
+
+    # ....................... #
+
+    def apply(self, arr: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Interpolate `arr` (any array-like supporting fancy indexing)."""
+
+        values = np.asarray(arr[self.indices], dtype=dtype)
+
+        if values.shape[0] == 1:
+            return values[0] * self.weights[0]
+
+        return np.einsum("cs,cs->s", self.weights, values)
+
+
+# ----------------------- #
+
+
+def stencil(frac: np.ndarray, sizes: Sequence[int], method: GatherMethod) -> Stencil:
+    """
+    Stencil of points given as fractional cell-centre indices `(dim, point)`.
+
+    Args:
+        frac (np.ndarray): Fractional indices along every axis.
+        sizes (Sequence[int]): The number of cells along every axis.
+        method (str): `ngp`/`nearest` for the nearest cell, `linear` or `cic`
+            for multilinear weights of the `2^dim` surrounding cells. The
+            cloud-in-cell shape is the first-order B-spline, i.e. the same
+            weights. `ngp` marks points outside the cells invalid and
+            `linear` those outside the box of cell centres, while `cic`
+            clamps them to the edge cells, so that every point is valid.
+
+    Returns:
+        Stencil: Indices and weights shaped `(corner, point)`.
+    """
+
+    dim = frac.shape[0]
+    upper = (np.asarray(sizes) - 1)[:, None]
+    inside = (frac >= 0) & (frac <= upper)
+    valid = np.all(inside, axis=0)
+
+    if method in ("ngp", "nearest"):
+        valid = np.all((frac >= -0.5) & (frac < upper + 0.5), axis=0)
+        idx = np.clip(np.rint(frac), 0, upper).astype(np.int64)
+
+        return Stencil(tuple(i[None] for i in idx), np.ones((1, idx.shape[1])), valid)
+
+    if method == "cic":
+        frac = np.clip(frac, 0, upper)
+        valid = np.ones_like(valid)
+
+    base = np.clip(np.floor(frac), 0, np.maximum(upper - 1, 0))
+    t = frac - base
+    base = base.astype(np.int64)
+
+    corners = list(product((0, 1), repeat=dim))
+    indices = tuple(np.stack([base[k] + c[k] for c in corners]) for k in range(dim))
+    weights = np.stack(
+        [
+            np.prod([t[k] if c[k] else 1 - t[k] for k in range(dim)], axis=0)
+            for c in corners
+        ]
+    )
+
+    # a single cell along an axis has no upper neighbour
+    for k in range(dim):
+        if sizes[k] < 2:
+            indices[k][...] = 0
+
+    return Stencil(indices, weights, valid)
+
+
+# ----------------------- #
+
+
+class Gather:
+    """
+    Interpolate grid quantities at particle positions.
+
+    Particles are processed in chunks; for every chunk the cells and weights
+    are computed once and reused for all requested quantities, so gathering
+    the six components of E and B costs one stencil per chunk.
+
+    Example:
+        >>> gather = Gather(handler.grid, method="cic")
+        >>> e = gather(handler.coordinates("electron"), {
+        ...     c: handler.electric_field(c) for c in "xyz"})
+
+    Args:
+        grid (Grid): The grid of the quantities (cell centres).
+        method (str): `ngp`, `linear` or `cic` (see `stencil`).
+        chunk_size (int): Particles per chunk, at most; less when the memory
+            budget is short.
+    """
+
+    def __init__(
+        self,
+        grid: Grid,
+        method: GatherMethod = "cic",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.grid = grid
+        self.method = method
+        self.chunk_size = chunk_size
+
+        self._mins = np.array([a.min for a in grid.axes])[:, None]
+        self._spacing = np.array([a.spacing for a in grid.axes])[:, None]
+        self._sizes = [a.size for a in grid.axes]
+
+    # ....................... #
+
+    def stencil(self, positions: Sequence[np.ndarray]) -> Stencil:
+        """The stencil of points given by their coordinates in SI units."""
+
+        points = np.stack([np.asarray(p, dtype=np.float64) for p in positions])
+
+        return stencil((points - self._mins) / self._spacing, self._sizes, self.method)
+
+    # ....................... #
+
+    def __call__(
+        self,
+        positions: Sequence[np.ndarray],
+        fields: Dict[str, np.ndarray],
+        out: Optional[Dict[str, np.ndarray]] = None,
+        dtype=np.float64,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Args:
+            positions (Sequence[np.ndarray]): Particle coordinates, one array
+                per grid axis (extra coordinates are ignored).
+            fields (Dict[str, np.ndarray]): The grid quantities by name.
+            out (Dict[str, np.ndarray], optional): Result buffers.
+            dtype: The result dtype when `out` is not given.
+
+        Returns:
+            Dict[str, np.ndarray]: The values per quantity and particle, NaN
+                for invalid points.
+        """
+
+        positions = list(positions)[: self.grid.dim]
+        size = len(positions[0])
+
+        if out is None:
+            out = {name: np.empty(size, dtype=dtype) for name in fields}
+
+        # positions, indices and weights of every corner, plus the results
+        corners = 1 if self.method in ("ngp", "nearest") else 2**self.grid.dim
+        per_particle = 8 * (self.grid.dim * (1 + corners) + corners + len(fields))
+        chunk = BUDGET.chunk_elements(self.chunk_size, per_particle)
+
+        for start in range(0, size, chunk):
+            sl = slice(start, min(start + chunk, size))
+            st = self.stencil([p[sl] for p in positions])
+
+            for name, arr in fields.items():
+                values = st.apply(arr)
+                values[~st.valid] = np.nan
+                out[name][sl] = values
+
+        return out
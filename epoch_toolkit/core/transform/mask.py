@@ -0,0 +1,657 @@
+import math
+from typing import Callable, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..grid import Grid
+from .crop import GridCrop
+
+# ----------------------- #
+
+DEFAULT_CHUNK_ELEMENTS = 1 << 23
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# ----------------------- #
+
+
+class _Packer:
+    """Packs a stream of boolean chunks of any length into contiguous bits."""
+
+    __slots__ = ("parts", "rest")
+
+    def __init__(self):
+        self.parts: List[np.ndarray] = []
+        self.rest = np.zeros(0, dtype=bool)
+
+    # ....................... #
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=bool).reshape(-1)
+
+        if self.rest.size:
+            values = np.concatenate([self.rest, values])
+
+        aligned = values.size - values.size % 8
+        self.parts.append(np.packbits(values[:aligned]))
+        self.rest = values[aligned:]
+
+    # ....................... #
+
+    def result(self) -> np.ndarray:
+        return np.concatenate(self.parts + [np.packbits(self.rest)])
+
+
+# ----------------------- #
+
+
+def _normalise(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Sorted `[start, stop)` ranges, empty ones dropped and touching ones merged."""
+
+    keep = stops > starts
+    starts, stops = starts[keep], stops[keep]
+
+    if not starts.size:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    breaks = starts[1:] != stops[:-1]
+    starts = starts[np.concatenate([[True], breaks])]
+    stops = stops[np.concatenate([breaks, [True]])]
+
+    return np.stack([starts, stops], axis=1).astype(np.int64)
+
+
+# ....................... #
+
+
+def _combine_ranges(a: np.ndarray, b: np.ndarray, need: int) -> np.ndarray:
+    """Intersection (`need=2`) or union (`need=1`) of two range lists."""
+
+    points = np.concatenate([a[:, 0], a[:, 1], b[:, 0], b[:, 1]])
+    deltas = np.concatenate(
+        [
+            np.ones(a.shape[0]),
+            -np.ones(a.shape[0]),
+            np.ones(b.shape[0]),
+            -np.ones(b.shape[0]),
+        ]
+    )
+
+    if not points.size:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    unique, inverse = np.unique(points, return_inverse=True)
+    coverage = np.cumsum(np.bincount(inverse.reshape(-1), weights=deltas))
+    on = coverage[:-1] >= need
+
+    return _normalise(unique[:-1][on], unique[1:][on])
+
+
+# ----------------------- #
+
+
+class Mask:
+    """
+    A compact boolean mask over a grid or a particle array.
+
+    The mask is stored either as packed bits (one bit per element, 1/8 of a
+    dense boolean array) or as sorted `[start, stop)` ranges of flat C-order
+    indices, which describe boxes and x-slabs in a handful of integers.
+    Masks compose with `&`, `|` and `~` on the compact storage, are sliced
+    lazily (`mask[a:b]` is a view) and only expand to dense booleans for the
+    requested part, e.g. one chunk of a `Reduction`.
+    """
+
+    __slots__ = ("base_shape", "bits", "ranges", "_view")
+
+    def __init__(
+        self,
+        shape: Tuple[int, ...],
+        bits: Optional[np.ndarray] = None,
+        ranges: Optional[np.ndarray] = None,
+    ):
+        if (bits is None) == (ranges is None):
+            raise ValueError("Exactly one of bits and ranges is required")
+
+        self.base_shape = tuple(int(n) for n in shape)
+        self.bits = bits
+        self.ranges = ranges
+        self._view = tuple((0, 1, n) for n in self.base_shape)
+
+    # ....................... #
+
+    def __repr__(self) -> str:
+        storage = "bits" if self.bits is not None else f"{len(self.ranges)} ranges"
+
+        return f"Mask(shape={self.shape}, {storage}, {self.nbytes} bytes)"
+
+    # ....................... #
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(n for _, _, n in self._view)
+
+    # ....................... #
+
+    @property
+    def ndim(self) -> int:
+        return len(self.base_shape)
+
+    # ....................... #
+
+    @property
+    def size(self) -> int:
+        return math.prod(self.shape)
+
+    # ....................... #
+
+    @property
+    def nbytes(self) -> int:
+        return (self.bits if self.bits is not None else self.ranges).nbytes
+
+    # ....................... #
+
+    @property
+    def is_view(self) -> bool:
+        return self._view != tuple((0, 1, n) for n in self.base_shape)
+
+    # ....................... #
+    # construction
+
+    @classmethod
+    def from_bool(
+        cls, values: np.ndarray, chunk_elements: int = DEFAULT_CHUNK_ELEMENTS
+    ) -> "Mask":
+        """Pack a (possibly memory-mapped or broadcast) boolean array."""
+
+        return cls.where(lambda v: v, values, chunk_elements=chunk_elements)
+
+    # ....................... #
+
+    @classmethod
+    def where(
+        cls,
+        func: Callable[..., np.ndarray],
+        *arrays: np.ndarray,
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """
+        Mask of `func(*arrays)`, evaluated in chunks along the first axis so
+        that the dense boolean result never exists as a whole.
+        """
+
+        shape = np.broadcast_shapes(*[np.shape(a) for a in arrays])
+        packer = _Packer()
+
+        if not shape:
+            packer.add(func(*arrays))
+
+            return cls(shape, bits=packer.result())
+
+        per_row = math.prod(shape[1:])
+        rows = max(1, chunk_elements // max(per_row, 1))
+
+        for start in range(0, shape[0], rows):
+            sl = slice(start, min(start + rows, shape[0]))
+            chunk = [
+                a[sl] if np.ndim(a) == len(shape) and np.shape(a)[0] == shape[0] else a
+                for a in arrays
+            ]
+            rows_shape = (sl.stop - sl.start,) + tuple(shape[1:])
+            packer.add(np.broadcast_to(func(*chunk), rows_shape))
+
+        return cls(shape, bits=packer.result())
+
+    # ....................... #
+
+    @classmethod
+    def threshold(
+        cls,
+        values: np.ndarray,
+        min: Optional[float] = None,
+        max: Optional[float] = None,
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """Elements within `[min, max]`, or non-zero ones without bounds."""
+
+        def _inside(v: np.ndarray) -> np.ndarray:
+            if min is None and max is None:
+                return v != 0
+
+            inside = np.ones(v.shape, dtype=bool)
+
+            if min is not None:
+                inside &= v >= min
+
+            if max is not None:
+                inside &= v <= max
+
+            return inside
+
+        return cls.where(_inside, values, chunk_elements=chunk_elements)
+
+    # ....................... #
+
+    @classmethod
+    def from_ranges(cls, shape: Tuple[int, ...], ranges: np.ndarray) -> "Mask":
+        """Mask of (possibly unsorted or overlapping) flat `[start, stop)` ranges."""
+
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        ranges = ranges[ranges[:, 1] > ranges[:, 0]]
+        ranges = ranges[np.argsort(ranges[:, 0], kind="stable")]
+
+        if not ranges.size:
+            return cls(shape, ranges=np.zeros((0, 2), dtype=np.int64))
+
+        # a new run starts past the stops of all previous ranges
+        stops = np.maximum.accumulate(ranges[:, 1])
+        first = np.flatnonzero(np.concatenate([[True], ranges[1:, 0] > stops[:-1]]))
+
+        return cls(
+            shape,
+            ranges=_normalise(ranges[first, 0], np.maximum.reduceat(stops, first)),
+        )
+
+    # ....................... #
+
+    @classmethod
+    def box(
+        cls,
+        grid: Grid,
+        crops: Sequence[GridCrop],
+        shape: Optional[Tuple[int, ...]] = None,
+    ) -> "Mask":
+        """
+        The cells of a grid within all crops, stored as ranges.
+
+        A box whose trailing axes are not cropped is a single range per
+        contiguous block, e.g. one range for an x-slab.
+        """
+
+        shape = tuple(shape or [a.size for a in grid.axes])
+        bounds = [(0, n) for n in shape]
+
+        for crop in crops:
+            axis = "xyz".index(crop.axis)
+            b = crop.bounds(grid)
+            lo, hi = bounds[axis]
+            bounds[axis] = (max(lo, b.start), min(hi, b.stop))
+
+        if any(hi <= lo for lo, hi in bounds):
+            return cls(shape, ranges=np.zeros((0, 2), dtype=np.int64))
+
+        strides = [math.prod(shape[k + 1 :]) for k in range(len(shape))]
+
+        # the innermost range, then the offsets of the outer axes
+        lo, hi = bounds[-1]
+        starts = np.array([lo * strides[-1]], dtype=np.int64)
+        length = (hi - lo) * strides[-1]
+
+        for k in range(len(shape) - 2, -1, -1):
+            lo, hi = bounds[k]
+            offsets = np.arange(lo, hi, dtype=np.int64) * strides[k]
+            starts = np.add.outer(offsets, starts).reshape(-1)
+
+        return cls(shape, ranges=_normalise(starts, starts + length))
+
+    # ....................... #
+
+    @classmethod
+    def region(
+        cls,
+        grid: Grid,
+        func: Callable[..., np.ndarray],
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """
+        The cells whose centre coordinates (in SI units) satisfy
+        `func(x, y, z)`, e.g. `lambda x, y, z: y**2 + z**2 < r**2`.
+        Coordinates are passed broadcastable and evaluated in x-chunks.
+        """
+
+        coordinates = []
+
+        for k, axis in enumerate(grid.axes):
+            shape = [1] * grid.dim
+            shape[k] = axis.size
+            values = axis.min + np.arange(axis.size) * axis.spacing
+            coordinates.append(values.reshape(shape))
+
+        return cls.where(func, *coordinates, chunk_elements=chunk_elements)
+
+    # ....................... #
+
+    @classmethod
+    def particles(
+        cls,
+        coordinates: Sequence[np.ndarray],
+        crops: Sequence[GridCrop],
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """The particles whose coordinates lie within all crops."""
+
+        def _inside(*c: np.ndarray) -> np.ndarray:
+            inside = np.ones(c[0].shape, dtype=bool)
+
+            for crop in crops:
+                inside &= crop.mask(c["xyz".index(crop.axis)])
+
+            return inside
+
+        return cls.where(_inside, *coordinates, chunk_elements=chunk_elements)
+
+    # ....................... #
+
+    @classmethod
+    def select_ids(
+        cls,
+        ids: np.ndarray,
+        selected: Sequence[int],
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """The particles of a specie whose ID is in `selected`."""
+
+        selected = np.unique(np.asarray(selected, dtype=np.asarray(ids).dtype))
+
+        return cls.where(
+            lambda i: np.isin(i, selected, assume_unique=False),
+            ids,
+            chunk_elements=chunk_elements,
+        )
+
+    # ....................... #
+
+    @classmethod
+    def sample(
+        cls,
+        size: int,
+        fraction: float,
+        seed: int = 0,
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> "Mask":
+        """A reproducible random subset of about `fraction` of `size` elements."""
+
+        rng = np.random.default_rng(seed)
+        packer = _Packer()
+
+        for start in range(0, size, chunk_elements):
+            packer.add(rng.random(min(chunk_elements, size - start)) < fraction)
+
+        return cls((size,), bits=packer.result())
+
+    # ....................... #
+    # access
+
+    def _gather(self, flat: np.ndarray) -> np.ndarray:
+        """Values at flat indices of the base array."""
+
+        if self.bits is not None:
+            return (
+                (self.bits[flat >> 3] >> (7 - (flat & 7)).astype(np.uint8)) & 1
+            ) == 1
+
+        if not self.ranges.size:
+            return np.zeros(flat.shape, dtype=bool)
+
+        idx = np.searchsorted(self.ranges[:, 0], flat, side="right") - 1
+
+        return (idx >= 0) & (flat < self.ranges[np.maximum(idx, 0), 1])
+
+    # ....................... #
+
+    def _flat_range(self, start: int, stop: int) -> np.ndarray:
+        """Dense values of a contiguous flat range of the base array."""
+
+        if self.bits is not None:
+            lo, hi = start >> 3, (stop + 7) >> 3
+            bits = np.unpackbits(self.bits[lo:hi])
+
+            return bits[start - lo * 8 : stop - lo * 8].astype(bool)
+
+        out = np.zeros(stop - start, dtype=bool)
+        first = np.searchsorted(self.ranges[:, 1], start, side="right")
+        last = np.searchsorted(self.ranges[:, 0], stop, side="left")
+
+        for r0, r1 in self.ranges[first:last]:
+            out[max(r0, start) - start : min(r1, stop) - start] = True
+
+        return out
+
+    # ....................... #
+
+    def _rows(self, start: int, stop: int) -> np.ndarray:
+        """Dense values of the view rows `[start, stop)` along the first axis."""
+
+        shape = (stop - start,) + self.shape[1:]
+        strides = [math.prod(self.base_shape[k + 1 :]) for k in range(self.ndim)]
+        trailing = self._view[1:] == tuple((0, 1, n) for n in self.base_shape[1:])
+
+        # rows of the base array that are contiguous in memory
+        if trailing and self._view[0][1] == 1:
+            first = self._view[0][0] + start
+            flat = self._flat_range(first * strides[0], (first + shape[0]) * strides[0])
+
+            return flat.reshape(shape)
+
+        flat = np.zeros((1,) * self.ndim, dtype=np.int64)
+
+        for k, (offset, step, _) in enumerate(self._view):
+            lo, n = (start, shape[0]) if k == 0 else (0, shape[k])
+            index = (offset + (lo + np.arange(n, dtype=np.int64)) * step) * strides[k]
+            axis_shape = [1] * self.ndim
+            axis_shape[k] = n
+            flat = flat + index.reshape(axis_shape)
+
+        return self._gather(flat)
+
+    # ....................... #
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        out = self.dense()
+
+        return out if dtype is None else out.astype(dtype)
+
+    # ....................... #
+
+    def dense(self, chunk_elements: int = DEFAULT_CHUNK_ELEMENTS) -> np.ndarray:
+        """The dense boolean array of the (view of the) mask."""
+
+        if not self.shape:
+            return self._gather(np.zeros((), dtype=np.int64))
+
+        out = np.empty(self.shape, dtype=bool)
+        per_row = math.prod(self.shape[1:])
+        rows = max(1, chunk_elements // max(per_row, 1))
+
+        for start in range(0, self.shape[0], rows):
+            stop = min(start + rows, self.shape[0])
+            out[start:stop] = self._rows(start, stop)
+
+        return out
+
+    # ....................... #
+
+    def __getitem__(self, idx) -> Union["Mask", np.ndarray]:
+        """
+        A lazy view for basic slices, e.g. `mask[a:b]` or `mask[:, y0:y1]`.
+        Integer indices (planes) return the dense values of the plane.
+        """
+
+        idx = idx if isinstance(idx, tuple) else (idx,)
+        basic = (slice, int, np.integer)
+
+        if len(idx) > self.ndim or not all(isinstance(i, basic) for i in idx):
+            return self.dense()[idx]
+
+        planes = tuple(k for k, i in enumerate(idx) if not isinstance(i, slice))
+
+        if planes:
+            idx = tuple(
+                slice(i % self.shape[k], i % self.shape[k] + 1) if k in planes else i
+                for k, i in enumerate(idx)
+            )
+
+            return np.asarray(self[idx]).squeeze(axis=planes)
+
+        view = list(self._view)
+
+        for k, sl in enumerate(idx):
+            offset, step, n = view[k]
+            start, stop, stride = sl.indices(n)
+            view[k] = (
+                offset + start * step,
+                step * stride,
+                len(range(start, stop, stride)),
+            )
+
+        mask = self.__class__.__new__(self.__class__)
+        mask.base_shape, mask.bits, mask.ranges = (
+            self.base_shape,
+            self.bits,
+            self.ranges,
+        )
+        mask._view = tuple(view)
+
+        return mask
+
+    # ....................... #
+
+    def packed(self, chunk_elements: int = DEFAULT_CHUNK_ELEMENTS) -> np.ndarray:
+        """Packed bits of the (view of the) mask in C order."""
+
+        if self.bits is not None and not self.is_view:
+            return self.bits
+
+        packer = _Packer()
+
+        if not self.shape:
+            packer.add(self.dense())
+
+            return packer.result()
+
+        per_row = math.prod(self.shape[1:])
+        rows = max(1, chunk_elements // max(per_row, 1))
+
+        for start in range(0, self.shape[0], rows):
+            packer.add(self._rows(start, min(start + rows, self.shape[0])))
+
+        return packer.result()
+
+    # ....................... #
+
+    def count(self) -> int:
+        """Number of selected elements."""
+
+        if self.ranges is not None and not self.is_view:
+            return int((self.ranges[:, 1] - self.ranges[:, 0]).sum())
+
+        bits = self.packed()
+
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+    # ....................... #
+
+    def indices(self) -> np.ndarray:
+        """Flat C-order indices of the selected elements of the view."""
+
+        if self.ranges is not None and not self.is_view:
+            lengths = self.ranges[:, 1] - self.ranges[:, 0]
+            offsets = np.repeat(
+                self.ranges[:, 0] - np.cumsum(lengths) + lengths, lengths
+            )
+
+            return np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+
+        bits = np.unpackbits(self.packed(), count=self.size)
+
+        return np.flatnonzero(bits)
+
+    # ....................... #
+
+    def select(self, values: np.ndarray) -> np.ndarray:
+        """The selected elements of an array of the mask shape, `values[mask]`."""
+
+        if np.shape(values) != self.shape:
+            raise ValueError(f"Shape {np.shape(values)} does not match {self.shape}")
+
+        return np.asarray(values).reshape(-1)[self.indices()]
+
+    # ....................... #
+    # logic
+
+    def _combine(self, other: "Mask", need: int) -> "Mask":
+        a, b = self, other
+
+        if a.shape != b.shape:
+            raise ValueError(f"Mask shapes differ: {a.shape} and {b.shape}")
+
+        if a.ranges is not None and b.ranges is not None:
+            if not a.is_view and not b.is_view and a.base_shape == b.base_shape:
+                return Mask(a.shape, ranges=_combine_ranges(a.ranges, b.ranges, need))
+
+        op = np.bitwise_and if need == 2 else np.bitwise_or
+
+        return Mask(a.shape, bits=op(a.packed(), b.packed()))
+
+    # ....................... #
+
+    def __and__(self, other: "Mask") -> "Mask":
+        return self._combine(other, need=2)
+
+    # ....................... #
+
+    def __or__(self, other: "Mask") -> "Mask":
+        return self._combine(other, need=1)
+
+    # ....................... #
+
+    def __invert__(self) -> "Mask":
+        size = self.size
+
+        if self.ranges is not None and not self.is_view:
+            bounds = np.concatenate([[0], self.ranges.reshape(-1), [size]])
+
+            return Mask(self.shape, ranges=_normalise(bounds[0::2], bounds[1::2]))
+
+        bits = np.invert(self.packed())
+
+        # clear the padding bits of the last byte
+        if size % 8:
+            bits[-1] &= np.uint8((0xFF << (8 - size % 8)) & 0xFF)
+
+        return Mask(self.shape, bits=bits)
+
+
+# ----------------------- #
+
+
+class MaskSpec(BaseModel):
+    """
+    Declarative description of a mask, built by `FileHandler.mask`.
+
+    All given criteria are combined with `and`, followed by `all` / `any` of
+    nested specs and an optional inversion. Grid masks use `quantity` (an
+    expression of raw and derived quantities, see `FileHandler.expression`)
+    and `crops`; particle masks additionally select by `ids` and a random
+    `fraction` of the particles of `specie`.
+    """
+
+    target: Literal["grid", "particles"] = "grid"
+    specie: Optional[str] = None
+    quantity: Optional[str] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    crops: List[GridCrop] = []
+    ids: Optional[List[int]] = None
+    fraction: Optional[float] = None
+    seed: int = 0
+    all: List["MaskSpec"] = []
+    any: List["MaskSpec"] = []
+    invert: bool = False
+
+    # ....................... #
+
+    @property
+    def key(self) -> str:
+        return self.model_dump_json()
@@ -1,13 +1,48 @@
-from typing import Union
+from typing import Callable, Iterator, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
+from ...utils.memory import BUDGET
+from ..expr import evaluate
+
+# ----------------------- #
+
+DEFAULT_BATCH_SIZE = 1 << 20
+
+# ----------------------- #
+
+
+def _out(out: Optional[Sequence[np.ndarray]], idx: int) -> Optional[np.ndarray]:
+    return None if out is None else out[idx]
+
+
 # ----------------------- #
 
 
-def cartesian_to_cylindrical(x: np.ndarray, y: np.ndarray, z: Union[np.ndarray, None]):
-    r = np.sqrt(x**2 + y**2)
-    phi = np.arctan2(y, x)
+def cartesian_to_cylindrical(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: Union[np.ndarray, None],
+    out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    dtype: Optional[Union[str, np.dtype]] = None,
+    **kwargs,
+):
+    """
+    Cylindrical coordinates `(r, phi, z)` around the z-axis.
+
+    Args:
+        x, y, z (np.ndarray): Cartesian coordinates, `z` is passed through.
+        out (Tuple[np.ndarray, np.ndarray], optional): Buffers for `(r, phi)`.
+        dtype (str, optional): Result dtype (e.g. `float32`) when `out` is
+            not given.
+        **kwargs: Passed to `core.expr.Expression`.
+    """
+
+    variables = dict(x=x, y=y)
+    r = evaluate(
+        "sqrt(x**2 + y**2)", variables, out=_out(out, 0), dtype=dtype, **kwargs
+    )
+    phi = evaluate("arctan2(y, x)", variables, out=_out(out, 1), dtype=dtype, **kwargs)
 
     return r, phi, z
 
@@ -15,10 +50,39 @@ def cartesian_to_cylindrical(x: np.ndarray, y: np.ndarray, z: Union[np.ndarray,
 # ----------------------- #
 
 
-def cartesian_to_spherical(x: np.ndarray, y: np.ndarray, z: np.ndarray):
-    r = np.sqrt(x**2 + y**2 + z**2)
-    phi = np.arctan2(y, x)
-    theta = np.arccos(z / r)
+def cartesian_to_spherical(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    out: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    dtype: Optional[Union[str, np.dtype]] = None,
+    **kwargs,
+):
+    """
+    Spherical coordinates `(r, phi, theta)`, `theta` measured from the z-axis.
+
+    Args:
+        x, y, z (np.ndarray): Cartesian coordinates.
+        out (Tuple[np.ndarray, ...], optional): Buffers for `(r, phi, theta)`.
+        dtype (str, optional): Result dtype (e.g. `float32`) when `out` is
+            not given.
+        **kwargs: Passed to `core.expr.Expression`.
+    """
+
+    variables = dict(x=x, y=y, z=z)
+    r = evaluate(
+        "sqrt(x**2 + y**2 + z**2)", variables, out=_out(out, 0), dtype=dtype, **kwargs
+    )
+    phi = evaluate("arctan2(y, x)", variables, out=_out(out, 1), dtype=dtype, **kwargs)
+
+    # from the inputs rather than `r`, so a float32 `r` does not lose precision
+    theta = evaluate(
+        "arccos(z / sqrt(x**2 + y**2 + z**2))",
+        variables,
+        out=_out(out, 2),
+        dtype=dtype,
+        **kwargs,
+    )
 
     return r, phi, theta
 
@@ -26,7 +90,82 @@ def cartesian_to_spherical(x: np.ndarray, y: np.ndarray, z: np.ndarray):
 # ----------------------- #
 
 
-def direction(*args):
+def direction(
+    *args,
+    out: Optional[np.ndarray] = None,
+    dtype: Optional[Union[str, np.dtype]] = None,
+    **kwargs,
+):
+    """Sum of pairwise products `a0 * a1 + a2 * a3 + ...`, e.g. a dot product."""
+
     assert len(args) % 2 == 0, "Invalid number of arguments"
 
-    return sum([args[i] * args[i + 1] for i in range(0, len(args), 2)])
+    source = " + ".join(f"a{i} * a{i + 1}" for i in range(0, len(args), 2))
+    variables = {f"a{i}": a for i, a in enumerate(args)}
+
+    return evaluate(source, variables, out=out, dtype=dtype, **kwargs)
+
+
+# ----------------------- #
+
+
+def batched(
+    func: Callable,
+    *arrays: np.ndarray,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dtype: Optional[Union[str, np.dtype]] = None,
+    **kwargs,
+) -> Iterator[Tuple[slice, Tuple[np.ndarray, ...]]]:
+    """
+    Apply a transform of this module to 1D particle arrays batch by batch.
+
+    The outputs of the first batch are reused as `out` buffers for all
+    following ones, so memory stays bounded by `batch_size` no matter how
+    many particles there are. The yielded arrays are only valid until the
+    next iteration; copy them to keep them.
+
+    Example:
+        >>> for sl, (r, phi, theta) in batched(cartesian_to_spherical, x, y, z):
+        ...     counts += np.histogram(theta, bins=edges)[0]
+
+    Args:
+        func (Callable): E.g. `cartesian_to_spherical` or `direction`.
+        *arrays (np.ndarray): The inputs, indexable along the first axis
+            (including memory-mapped arrays).
+        batch_size (int): Number of particles per batch, at most; less when
+            the memory budget is short.
+        dtype (str, optional): Result dtype, e.g. `float32`.
+        **kwargs: Passed to `func`.
+
+    Yields:
+        Tuple[slice, Tuple[np.ndarray, ...]]: The batch slice and results.
+    """
+
+    size = len(arrays[0])
+    buffers = None
+
+    # the inputs and (up to three) outputs of a batch
+    batch_size = BUDGET.chunk_elements(batch_size, 8 * (len(arrays) + 3))
+
+    for start in range(0, size, batch_size):
+        sl = slice(start, min(start + batch_size, size))
+        inputs = [None if a is None else a[sl] for a in arrays]
+
+        if buffers is None:
+            results = func(*inputs, dtype=dtype, **kwargs)
+
+        else:
+            rows = sl.stop - sl.start
+            out = [b[:rows] for b in buffers]
+            results = func(*inputs, out=out[0] if len(out) == 1 else out, **kwargs)
+
+        results = results if isinstance(results, tuple) else (results,)
+
+        if buffers is None:
+            # passed-through inputs (e.g. `z` of the cylindrical transform)
+            # are not buffers of their own
+            buffers = [
+                r for r in results if r is not None and not any(r is a for a in inputs)
+            ]
+
+        yield sl, results
@@ -0,0 +1,385 @@
+import math
+from typing import Any, List, Literal, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, model_validator
+
+from ...utils.memory import BUDGET
+from ..grid import Grid
+
+# ----------------------- #
+
+DEFAULT_CHUNK_ELEMENTS = 1 << 22
+
+# reductions whose partial results over x-slabs combine into the full one
+SLAB_COMBINE = {
+    "sum": np.sum,
+    "integral": np.sum,
+    # slabs where every cell is masked are NaN
+    "max": np.fmax.reduce,
+    "min": np.fmin.reduce,
+}
+
+# ----------------------- #
+
+
+def _chunk_axis(arr: Any, axis: int) -> Optional[int]:
+    """
+    The non-reduced axis to iterate over: the slowest varying one in memory,
+    so that every chunk of a memory-mapped array is a contiguous read.
+    """
+
+    candidates = [a for a in range(len(arr.shape)) if a != axis]
+
+    if not candidates:
+        return None
+
+    flags = getattr(arr, "flags", None)
+
+    if flags is not None and flags.f_contiguous and not flags.c_contiguous:
+        return candidates[-1]
+
+    return candidates[0]
+
+
+# ----------------------- #
+
+
+class Reduction(BaseModel):
+    """
+    Reduce a grid quantity along an axis or an arbitrary direction.
+
+    Operations:
+        - `sum`: (weighted) sum of the values.
+        - `mean`: (weighted) mean, ignoring masked cells.
+        - `max` / `min`: extrema of the (weighted) values.
+        - `argmax` / `argmin`: cell index of the extrema along the axis,
+          `-1` where every cell is masked.
+        - `integral`: line integral in SI units, i.e. the sum times the cell
+          spacing along the axis.
+
+    The input is processed in chunks along a non-reduced axis, so that only
+    `chunk_elements` values (fewer when the memory budget is short) are in
+    memory at a time and memory-mapped or lazily loaded blocks are never read
+    as a whole. With `direction` the
+    values are projected along that (unit) vector onto the perpendicular
+    plane, each cell being deposited into the nearest pixel of spacing equal
+    to the finest grid spacing.
+    """
+
+    axis: Optional[Literal["x", "y", "z"]] = None
+    direction: Optional[Tuple[float, float, float]] = None
+    op: Literal["sum", "mean", "max", "min", "argmax", "argmin", "integral"] = "sum"
+    chunk_elements: int = DEFAULT_CHUNK_ELEMENTS
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        if (self.axis is None) == (self.direction is None):
+            raise ValueError("Exactly one of axis and direction is required")
+
+        if self.direction is not None:
+            if not any(self.direction):
+                raise ValueError("direction should be non-zero")
+
+            if self.op in ("argmax", "argmin"):
+                raise ValueError(f"{self.op} is not defined for off-axis projections")
+
+        return self
+
+    # ....................... #
+
+    @property
+    def reduces_x(self) -> bool:
+        return self.axis == "x" or self.direction is not None
+
+    # ....................... #
+
+    def combine_slabs(self, arrays: List[np.ndarray]) -> np.ndarray:
+        """Combine the results of consecutive x-slabs into the full result."""
+
+        if not self.reduces_x:
+            return np.concatenate(arrays, axis=0)
+
+        if self.direction is not None or self.op not in SLAB_COMBINE:
+            raise ValueError(f"Cannot combine x-slabs of a `{self.op}` reduction")
+
+        return SLAB_COMBINE[self.op](arrays, axis=0)
+
+    # ....................... #
+
+    def apply(
+        self,
+        arr: np.ndarray,
+        grid: Optional[Grid] = None,
+        weights: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Args:
+            arr (np.ndarray): The values, any array-like supporting slicing
+                (e.g. `np.memmap`).
+            grid (Grid, optional): The grid, required for `integral` and
+                off-axis projections.
+            weights (np.ndarray, optional): Weights of the same shape.
+            mask (np.ndarray, optional): Boolean mask of the cells to use.
+
+        Returns:
+            np.ndarray: The reduced array.
+        """
+
+        if self.direction is not None:
+            return self._apply_direction(arr, grid, weights, mask)
+
+        return self._apply_axis(arr, grid, weights, mask)
+
+    # ....................... #
+
+    def _apply_axis(
+        self,
+        arr: np.ndarray,
+        grid: Optional[Grid],
+        weights: Optional[np.ndarray],
+        mask: Optional[np.ndarray],
+    ) -> np.ndarray:
+        axis = "xyz".index(self.axis)
+        ndim = len(arr.shape)
+
+        if ndim <= axis:
+            raise ValueError(f"Cannot reduce along {self.axis}-axis for {ndim}D array")
+
+        spacing = 1.0
+
+        if self.op == "integral":
+            if grid is None:
+                raise ValueError("Line integrals require the grid")
+
+            spacing = grid.component(self.axis).spacing
+
+        chunk_axis = _chunk_axis(arr, axis)
+
+        if chunk_axis is None:
+            return self._reduce(arr, axis, weights, mask, spacing)
+
+        size = arr.shape[chunk_axis]
+        per_row = math.prod(arr.shape) // max(size, 1)
+        rows = max(1, self._chunk_elements() // max(per_row, 1))
+        out_axis = chunk_axis - (chunk_axis > axis)
+        out = None
+
+        for start in range(0, size, rows):
+            idx = [slice(None)] * ndim
+            idx[chunk_axis] = slice(start, min(start + rows, size))
+            idx = tuple(idx)
+
+            result = self._reduce(
+                arr[idx],
+                axis,
+                None if weights is None else weights[idx],
+                None if mask is None else mask[idx],
+                spacing,
+            )
+
+            if out is None:
+                shape = list(result.shape)
+                shape[out_axis] = size
+                out = np.empty(shape, dtype=result.dtype)
+
+            target = [slice(None)] * out.ndim
+            target[out_axis] = idx[chunk_axis]
+            out[tuple(target)] = result
+
+        return out
+
+    # ....................... #
+
+    def _chunk_elements(self) -> int:
+        # values, weights, mask and a few float64 temporaries per element
+        return BUDGET.chunk_elements(self.chunk_elements, 8 * 6)
+
+    # ....................... #
+
+    def _reduce(
+        self,
+        block: np.ndarray,
+        axis: int,
+        weights: Optional[np.ndarray],
+        mask: Optional[np.ndarray],
+        spacing: float,
+    ) -> np.ndarray:
+        values = np.asarray(block)
+        mask = None if mask is None else np.asarray(mask, dtype=bool)
+
+        if weights is not None and self.op != "mean":
+            values = values * np.asarray(weights)
+
+        if self.op in ("sum", "integral"):
+            if mask is not None:
+                values = np.where(mask, values, 0)
+
+            result = values.sum(axis=axis)
+
+            return result * spacing if self.op == "integral" else result
+
+        elif self.op == "mean":
+            w = np.ones_like(values) if weights is None else np.asarray(weights)
+
+            if mask is not None:
+                w = np.where(mask, w, 0)
+
+            total = (values * w).sum(axis=axis)
+            norm = w.sum(axis=axis)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(norm != 0, total / norm, np.nan)
+
+        fill = -np.inf if self.op in ("max", "argmax") else np.inf
+
+        if mask is not None:
+            values = np.where(mask, values, fill)
+
+        if self.op in ("argmax", "argmin"):
+            func = np.argmax if self.op == "argmax" else np.argmin
+            result = func(values, axis=axis).astype(np.int64)
+
+            if mask is not None:
+                result[~np.any(mask, axis=axis)] = -1
+
+            return result
+
+        result = values.max(axis=axis) if self.op == "max" else values.min(axis=axis)
+
+        if mask is not None:
+            result = np.where(np.any(mask, axis=axis), result, np.nan)
+
+        return result
+
+    # ....................... #
+
+    def plane(
+        self, shape: Tuple[int, ...], grid: Grid
+    ) -> Tuple[np.ndarray, np.ndarray, float, Tuple[int, ...]]:
+        """
+        The image plane of an off-axis projection of an array of `shape`.
+
+        Returns:
+            Tuple: The in-plane unit vectors (rows), the lower corner of the
+                image in plane coordinates, the pixel size and the image shape.
+        """
+
+        ndim = len(shape)
+        direction = np.asarray(self.direction, dtype=np.float64)
+
+        if ndim < 2:
+            raise ValueError("Off-axis projections require a 2D or 3D array")
+
+        if ndim == 2:
+            if direction[2] != 0:
+                raise ValueError("The direction of a 2D projection must lie in x-y")
+
+            d = direction[:2] / np.linalg.norm(direction[:2])
+            basis = np.array([[-d[1], d[0]]])
+
+        else:
+            d = direction / np.linalg.norm(direction)
+            helper = np.eye(3)[np.argmin(np.abs(d))]
+            e1 = np.cross(d, helper)
+            e1 /= np.linalg.norm(e1)
+            basis = np.array([e1, np.cross(d, e1)])
+
+        spacing = np.array([a.spacing for a in grid.axes[:ndim]])
+        pixel = float(spacing.min())
+
+        # plane coordinates of the corners of the box of cell centres
+        extent = (np.asarray(shape) - 1) * spacing
+        corners = np.array(np.meshgrid(*[[0, e] for e in extent])).reshape(ndim, -1)
+        projected = basis @ corners
+        lo = projected.min(axis=1)
+        image = tuple(
+            int(n) for n in np.floor((projected.max(axis=1) - lo) / pixel) + 1
+        )
+
+        return basis, lo, pixel, image
+
+    # ....................... #
+
+    def _apply_direction(
+        self,
+        arr: np.ndarray,
+        grid: Optional[Grid],
+        weights: Optional[np.ndarray],
+        mask: Optional[np.ndarray],
+    ) -> np.ndarray:
+        if grid is None:
+            raise ValueError("Off-axis projections require the grid")
+
+        shape = tuple(arr.shape)
+        ndim = len(shape)
+        basis, lo, pixel, image = self.plane(shape, grid)
+        spacing = np.array([a.spacing for a in grid.axes[:ndim]])
+        size = int(np.prod(image))
+
+        is_extremum = self.op in ("max", "min")
+        total = np.full(size, -np.inf if self.op == "max" else np.inf)
+        total = total if is_extremum else np.zeros(size)
+        norm = np.zeros(size) if self.op == "mean" else None
+
+        per_row = math.prod(shape[1:])
+        rows = max(1, self._chunk_elements() // max(per_row, 1))
+
+        for start in range(0, shape[0], rows):
+            sl = slice(start, min(start + rows, shape[0]))
+            values = np.asarray(arr[sl], dtype=np.float64).reshape(-1)
+            w = None if weights is None else np.asarray(weights[sl]).reshape(-1)
+            keep = None if mask is None else np.asarray(mask[sl]).reshape(-1)
+
+            # pixel index of every cell centre of the chunk
+            positions = np.meshgrid(
+                *[np.arange(sl.start, sl.stop) * spacing[0]]
+                + [np.arange(n) * h for n, h in zip(shape[1:], spacing[1:])],
+                indexing="ij",
+            )
+            flat = np.zeros(values.size, dtype=np.int64)
+
+            for k, n in enumerate(image):
+                u = sum(b * p.reshape(-1) for b, p in zip(basis[k], positions))
+                pix = np.clip(np.rint((u - lo[k]) / pixel).astype(np.int64), 0, n - 1)
+                flat = flat * n + pix
+
+            if keep is not None:
+                values, flat = values[keep], flat[keep]
+                w = None if w is None else w[keep]
+
+            if is_extremum:
+                values = values if w is None else values * w
+                ufunc = np.maximum if self.op == "max" else np.minimum
+                ufunc.at(total, flat, values)
+
+            elif self.op == "mean":
+                w = np.ones_like(values) if w is None else w
+                total += np.bincount(flat, weights=values * w, minlength=size)
+                norm += np.bincount(flat, weights=w, minlength=size)
+
+            else:
+                values = values if w is None else values * w
+                total += np.bincount(flat, weights=values, minlength=size)
+
+        if self.op == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                total = np.where(norm != 0, total / norm, np.nan)
+
+        elif is_extremum:
+            total[np.isinf(total)] = np.nan
+
+        elif self.op == "integral":
+            # every cell contributes its volume spread over one pixel area
+            total *= np.prod(spacing) / pixel ** (ndim - 1)
+
+        return total.reshape(image)
+
+
+# ----------------------- #
+
+# the former name, an axis-aligned sum by default
+PlaneProjection = Reduction
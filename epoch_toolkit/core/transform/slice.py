@@ -0,0 +1,283 @@
+import math
+from functools import lru_cache
+from typing import List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, field_validator, model_validator
+
+from ..const import Unit
+from ..grid import Grid
+from ..units import factor, to_si
+from .crop import GridCrop
+from .gather import Gather, Stencil
+
+# ----------------------- #
+
+# an axis index: a plane position or `(start, stop, step)`
+AxisIndex = Union[int, Tuple[int, int, int]]
+
+# ----------------------- #
+
+
+class GridSlice(BaseModel):
+    """
+    Axis-aligned slicing in physical units, always a NumPy view.
+
+    With `value` the plane nearest to it is selected and the axis removed,
+    otherwise the axis is restricted to `[min, max]` (if given) and
+    decimated by `step`.
+    """
+
+    axis: Literal["x", "y", "z"]
+    value: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    step: int = 1
+    unit: Optional[Unit] = None
+
+    # ....................... #
+
+    @field_validator("unit", mode="before")
+    @classmethod
+    def check_unit(cls, v):
+        return Unit.get(v) if isinstance(v, str) else v
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        if self.value is not None and (self.min is not None or self.max is not None):
+            raise ValueError("A plane slice cannot have a range")
+
+        if self.step < 1:
+            raise ValueError("step should be positive")
+
+        return self
+
+    # ....................... #
+
+    def index(self, grid: Grid) -> AxisIndex:
+        target = grid.component(self.axis)
+
+        if self.value is not None:
+            idx = round((to_si(self.value, self.unit) - target.min) / target.spacing)
+
+            if not 0 <= idx < target.size:
+                raise ValueError(f"Plane {self.axis}={self.value} is outside the grid")
+
+            return idx
+
+        lo = 0 if self.min is None else target.val_to_idx(self.min, unit=self.unit)
+        hi = (
+            target.size
+            if self.max is None
+            else target.val_to_idx(self.max, unit=self.unit)
+        )
+
+        return (max(lo, 0), min(hi, target.size), self.step)
+
+    # ....................... #
+
+    def apply(self, arr: np.ndarray, grid: Grid) -> np.ndarray:
+        return arr[view_index(grid, [self], ndim=len(arr.shape))]
+
+
+# ----------------------- #
+
+
+def _merge(current: AxisIndex, new: AxisIndex) -> AxisIndex:
+    """
+    Intersect two indices of the same axis, both in full-grid indices.
+
+    Ranges keep the cells selected by both, e.g. a crop of a strided slice
+    keeps the stride and its anchor, and two strides of 2 (anchored alike)
+    remain a stride of 2. A plane must lie within the other range.
+    """
+
+    if isinstance(current, int) or isinstance(new, int):
+        plane = current if isinstance(current, int) else new
+        other = new if plane is current else current
+
+        if isinstance(other, int):
+            if other != plane:
+                raise ValueError("Conflicting planes on the same axis")
+
+            return plane
+
+        lo, hi, _ = other
+
+        if not lo <= plane < hi:
+            raise ValueError("The plane lies outside the selected range")
+
+        return plane
+
+    lo, hi = max(current[0], new[0]), min(current[1], new[1])
+    step = current[2] * new[2] // math.gcd(current[2], new[2])
+
+    # the first cell from `lo` on both strides, if any
+    start = next(
+        (
+            i
+            for i in range(lo, lo + step)
+            if (i - current[0]) % current[2] == 0 and (i - new[0]) % new[2] == 0
+        ),
+        hi,
+    )
+
+    return (start, max(start, hi), step)
+
+
+# ....................... #
+
+
+def view_index(
+    grid: Grid,
+    items: Sequence[Union[GridCrop, GridSlice]],
+    ndim: Optional[int] = None,
+) -> Tuple[Union[int, slice], ...]:
+    """
+    A single basic index combining crops and slices on the full grid, so
+    that `arr[index]` is a view however many of them there are.
+    """
+
+    ndim = ndim or grid.dim
+    axes: List[AxisIndex] = [(0, grid.axes[k].size, 1) for k in range(ndim)]
+
+    for item in items:
+        k = "xyz".index(item.axis)
+
+        if k >= ndim:
+            raise ValueError(f"Cannot slice along {item.axis}-axis for {ndim}D array")
+
+        if isinstance(item, GridCrop):
+            bounds = item.bounds(grid)
+            new = (bounds.start, bounds.stop, 1)
+
+        else:
+            new = item.index(grid)
+
+        axes[k] = _merge(axes[k], new)
+
+    return tuple(a if isinstance(a, int) else slice(*a) for a in axes)
+
+
+# ....................... #
+
+
+def view_grid(grid: Grid, index: Sequence[Union[int, slice]]) -> Grid:
+    """The grid of `arr[index]`, keeping the spacing of strided axes exact."""
+
+    mins, maxs, sizes, steps = [], [], [], []
+
+    for axis, idx in zip(grid.axes, index):
+        if isinstance(idx, int):
+            continue
+
+        start, stop, step = idx.indices(axis.size)
+        size = len(range(start, stop, step))
+        lo = axis.min + start * axis.spacing
+        spacing = axis.spacing * step
+
+        # a single remaining cell keeps a nominal extent of one cell
+        mins.append(lo)
+        maxs.append(lo + max(size - 1, 1) * spacing)
+        sizes.append(max(size, 2))
+        steps.append(spacing)
+
+    return Grid.from_arrays(mins, maxs, sizes, steps)
+
+
+# ----------------------- #
+
+
+@lru_cache(maxsize=32)
+def _gather_plan(geometry: str, grid: str, method: str) -> Stencil:
+    """Stencil of the samples of an oblique slice, cached per geometry and grid."""
+
+    spec = ObliqueSlice.model_validate_json(geometry)
+    target = Grid.model_validate_json(grid)
+    points = spec.points(target).reshape(target.dim, -1)
+
+    return Gather(target, method=method).stencil(points)
+
+
+# ----------------------- #
+
+
+class ObliqueSlice(BaseModel):
+    """
+    A line or plane at an arbitrary orientation, sampled by interpolation.
+
+    Samples lie at `origin + sum_k t_k * axes[k]` with `t_k` spanning
+    `[0, 1]` in `size[k]` steps, i.e. one axis vector gives a line and two a
+    plane; all coordinates are in `unit` (SI by default). The gather
+    indices and weights depend on the geometry and the grid only and are
+    cached, so slicing many dumps of a run interpolates with a single
+    precomputed gather per dump. Samples outside the grid are NaN.
+    """
+
+    origin: List[float]
+    axes: List[List[float]]
+    size: List[int]
+    method: Literal["nearest", "linear"] = "linear"
+    unit: Optional[Unit] = None
+
+    # ....................... #
+
+    @field_validator("unit", mode="before")
+    @classmethod
+    def check_unit(cls, v):
+        return Unit.get(v) if isinstance(v, str) else v
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        if len(self.axes) not in (1, 2) or len(self.axes) != len(self.size):
+            raise ValueError("An oblique slice needs one or two axes with sizes")
+
+        if any(len(a) != len(self.origin) for a in self.axes):
+            raise ValueError("Axis vectors must match the dimension of the origin")
+
+        if any(n < 1 for n in self.size):
+            raise ValueError("size should be positive")
+
+        return self
+
+    # ....................... #
+
+    def points(self, grid: Grid) -> np.ndarray:
+        """Sample positions in SI units, shaped `(dim, *size)`."""
+
+        if len(self.origin) != grid.dim:
+            raise ValueError(f"Slice is {len(self.origin)}D, grid is {grid.dim}D")
+
+        multiplier = factor(self.unit)
+        origin = np.asarray(self.origin, dtype=np.float64) * multiplier
+        points = np.broadcast_to(
+            origin.reshape((-1,) + (1,) * len(self.size)),
+            (grid.dim,) + tuple(self.size),
+        ).copy()
+
+        for k, (axis, n) in enumerate(zip(self.axes, self.size)):
+            t = np.linspace(0, 1, n) if n > 1 else np.zeros(1)
+            shape = [1] * len(self.size)
+            shape[k] = n
+            vector = np.asarray(axis, dtype=np.float64) * multiplier
+            points += vector.reshape(-1, *([1] * len(self.size))) * t.reshape(shape)
+
+        return points
+
+    # ....................... #
+
+    def apply(self, arr: np.ndarray, grid: Grid) -> np.ndarray:
+        """Interpolate `arr` (any array-like supporting fancy indexing)."""
+
+        if len(arr.shape) != grid.dim:
+            raise ValueError(f"Array is {len(arr.shape)}D, grid is {grid.dim}D")
+
+        plan = _gather_plan(self.model_dump_json(), grid.model_dump_json(), self.method)
+        result = plan.apply(arr)
+        result[~plan.valid] = np.nan
+
+        return result.reshape(self.size)
@@ -0,0 +1,215 @@
+from typing import Any, Optional, Tuple, Union
+
+import numpy as np
+
+from .const import Unit
+
+# ----------------------- #
+
+
+def as_unit(unit: Optional[Union[str, Unit]]) -> Optional[Unit]:
+    return Unit.get(unit) if isinstance(unit, str) else unit
+
+
+# ....................... #
+
+
+def factor(unit: Optional[Union[str, Unit]]) -> float:
+    """The SI value of one `unit`, `1` for none."""
+
+    unit = as_unit(unit)
+
+    return unit.value if unit is not None else 1.0
+
+
+# ....................... #
+
+
+def to_si(value: Any, unit: Optional[Union[str, Unit]]) -> Any:
+    """Convert a value given in `unit` to SI units, without mutating it."""
+
+    return value * factor(unit) if unit is not None else value
+
+
+# ....................... #
+
+
+def from_si(value: Any, unit: Optional[Union[str, Unit]]) -> Any:
+    """Express an SI value in `unit`, without mutating it."""
+
+    return value / factor(unit) if unit is not None else value
+
+
+# ----------------------- #
+
+
+class ScaledArray:
+    """
+    An array in SI units viewed in another unit, scaled lazily.
+
+    The wrapper holds the original (possibly memory-mapped) array and a
+    scale factor. Conversions and scalar multiplications only change the
+    factor, indexing returns scaled views, and reductions (`min`, `max`,
+    `sum`, `mean`, `percentile`) run on the original data and scale their
+    result, so the full-size scaled copy is only made when NumPy needs the
+    values (`np.asarray`, `values`).
+
+    Example:
+        >>> x = ScaledArray(handler.coordinates("electron")[0], unit="micro")
+        >>> x.min(), x.max()  # in micrometres, no array copy
+        >>> ax.hist(np.asarray(x[::100]), bins=64)  # scales the subsample only
+
+    Args:
+        data (np.ndarray): The array in SI units.
+        unit (Unit, optional): The unit to express it in.
+        scale (float): An extra scale factor, e.g. `1 / qe` for eV.
+    """
+
+    __slots__ = ("data", "scale")
+
+    def __init__(
+        self,
+        data: Any,
+        unit: Optional[Union[str, Unit]] = None,
+        scale: float = 1.0,
+    ):
+        if isinstance(data, ScaledArray):
+            scale *= data.scale
+            data = data.data
+
+        self.data = data
+        self.scale = scale / factor(unit)
+
+    # ....................... #
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return np.shape(self.data)
+
+    # ....................... #
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    # ....................... #
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.result_type(self.data, self.scale)
+
+    # ....................... #
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    # ....................... #
+
+    def __repr__(self) -> str:
+        return f"ScaledArray(shape={self.shape}, scale={self.scale:g})"
+
+    # ....................... #
+
+    def to(self, unit: Optional[Union[str, Unit]]) -> "ScaledArray":
+        """The wrapped SI data in another unit (dropping extra scales), no copy."""
+
+        return ScaledArray(self.data, unit=unit)
+
+    # ....................... #
+
+    def __mul__(self, other: float) -> "ScaledArray":
+        if np.ndim(other) != 0:
+            return NotImplemented
+
+        return ScaledArray(self.data, scale=self.scale * other)
+
+    __rmul__ = __mul__
+
+    # ....................... #
+
+    def __truediv__(self, other: float) -> "ScaledArray":
+        if np.ndim(other) != 0:
+            return NotImplemented
+
+        return ScaledArray(self.data, scale=self.scale / other)
+
+    # ....................... #
+
+    def __getitem__(self, key: Any) -> Any:
+        part = self.data[key]
+
+        if np.ndim(part) == 0:
+            return part * self.scale
+
+        return ScaledArray(part, scale=self.scale)
+
+    # ....................... #
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.values(dtype=dtype)
+
+    # ....................... #
+
+    def values(self, dtype=None, inplace: bool = False) -> np.ndarray:
+        """
+        Materialise the scaled values in a single pass.
+
+        Args:
+            dtype: The result dtype.
+            inplace (bool): Scale the wrapped array itself if it is writeable,
+                for temporaries that are not used otherwise.
+        """
+
+        arr = np.asarray(self.data)
+
+        if self.scale == 1.0:
+            return arr.astype(dtype) if dtype is not None else arr
+
+        if inplace and arr.flags.writeable and np.can_cast(self.dtype, arr.dtype):
+            return np.multiply(arr, self.scale, out=arr)
+
+        return np.multiply(arr, self.scale, dtype=dtype)
+
+    # ....................... #
+
+    def _fold(self, result: Any) -> Any:
+        return result * self.scale
+
+    # ....................... #
+
+    def min(self, **kwargs) -> Any:
+        method = np.max if self.scale < 0 else np.min
+
+        return self._fold(method(self.data, **kwargs))
+
+    # ....................... #
+
+    def max(self, **kwargs) -> Any:
+        method = np.min if self.scale < 0 else np.max
+
+        return self._fold(method(self.data, **kwargs))
+
+    # ....................... #
+
+    def sum(self, **kwargs) -> Any:
+        return self._fold(np.sum(self.data, **kwargs))
+
+    # ....................... #
+
+    def mean(self, **kwargs) -> Any:
+        return self._fold(np.mean(self.data, **kwargs))
+
+    # ....................... #
+
+    def std(self, **kwargs) -> Any:
+        return np.std(self.data, **kwargs) * abs(self.scale)
+
+    # ....................... #
+
+    def percentile(self, q: Any, **kwargs) -> Any:
+        q = np.asarray(q)
+
+        if self.scale < 0:
+            q = 100 - q
+
+        return self._fold(np.percentile(self.data, q, **kwargs))
@@ -0,0 +1,37 @@
+from ..utils.lazy import lazy_loader
+
+# ----------------------- #
+
+__all__ = [
+    "blocks",
+    "deck",
+    "experiment",
+    "parser",
+    "scan",
+    "slurm",
+    "Deck",
+    "DeckIndex",
+    "ParameterScan",
+    "index_decks",
+    "parse_deck",
+    "read_deck",
+    "render_block",
+    "generate_slurm_file",
+    "generate_analysis_slurm_file",
+]
+
+__getattr__, __dir__ = lazy_loader(
+    __name__,
+    submodules=["blocks", "deck", "experiment", "parser", "scan", "slurm"],
+    attributes={
+        "Deck": ".deck",
+        "DeckIndex": ".parser",
+        "ParameterScan": ".scan",
+        "index_decks": ".parser",
+        "parse_deck": ".parser",
+        "read_deck": ".parser",
+        "render_block": ".deck",
+        "generate_slurm_file": ".slurm",
+        "generate_analysis_slurm_file": ".slurm",
+    },
+)
@@ -0,0 +1,185 @@
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from pydantic import BaseModel
+
+from .blocks import Boundaries, Control, Laser, NumberWithUnits, Output, Species, Subset
+
+# ----------------------- #
+
+BlockId = Tuple[Union[str, int], ...]
+
+# deck keys that differ from the model field names
+DECK_ALIASES: Dict[str, Dict[str, str]] = {
+    "laser": {"wavelength": "lambda"},
+}
+
+# list fields written with EPOCH's `key:value` syntax, one line per item
+COLON_FIELDS = ("include_species",)
+
+# blocks that may appear several times in a deck, in rendering order
+LIST_BLOCKS = ("species", "laser", "subset", "output")
+
+# ----------------------- #
+
+
+def format_value(value: Any) -> str:
+    """Format a single field value the way EPOCH expects it in a deck."""
+
+    if isinstance(value, bool):
+        return "T" if value else "F"
+
+    elif isinstance(value, NumberWithUnits):
+        if value.unit is None:
+            return format_value(value.value)
+
+        return f"{format_value(value.value)} * {value.unit}"
+
+    elif isinstance(value, Enum):
+        return str(value.value)
+
+    elif isinstance(value, float):
+        return repr(value)
+
+    return str(value)
+
+
+# ----------------------- #
+
+
+def _block_lines(name: str, block: Union[BaseModel, Dict[str, Any]]) -> Iterator[str]:
+    if isinstance(block, dict):
+        for key, value in block.items():
+            yield f"{key} = {format_value(value)}"
+
+        return
+
+    aliases = DECK_ALIASES.get(name, {})
+
+    for field in type(block).model_fields:
+        value = getattr(block, field)
+
+        if value is None:
+            continue
+
+        if field == "items" and isinstance(block, Output):
+            for item in value:
+                yield f"{item.name} = {' + '.join(item.constraints)}"
+
+        elif field in COLON_FIELDS:
+            for v in value:
+                yield f"{field}:{format_value(v)}"
+
+        elif isinstance(value, list):
+            for v in value:
+                yield f"{aliases.get(field, field)} = {format_value(v)}"
+
+        else:
+            yield f"{aliases.get(field, field)} = {format_value(value)}"
+
+
+# ----------------------- #
+
+
+def render_block(name: str, block: Union[BaseModel, Dict[str, Any]]) -> str:
+    """
+    Render a single `begin:<name> ... end:<name>` block of an input deck.
+
+    Args:
+        name (str): The EPOCH block name, e.g. `control` or `laser`.
+        block (BaseModel | dict): The block model, or a plain mapping for
+            free-form blocks such as `constant`.
+
+    Returns:
+        str: The rendered block, terminated by a blank line.
+    """
+
+    body = "".join(f"  {line}\n" for line in _block_lines(name, block))
+
+    return f"begin:{name}\n{body}end:{name}\n\n"
+
+
+# ----------------------- #
+
+
+class Deck(BaseModel):
+    """A complete EPOCH input deck."""
+
+    constant: Dict[str, Union[float, str]] = {}
+    control: Control
+    boundaries: Boundaries
+    species: List[Species] = []
+    laser: List[Laser] = []
+    subset: List[Subset] = []
+    output: List[Output] = []
+
+    # ....................... #
+
+    def block_ids(self) -> List[BlockId]:
+        """Identifiers of all blocks, in rendering order."""
+
+        ids = [("constant",)] if self.constant else []
+        ids += [("control",), ("boundaries",)]
+
+        for name in LIST_BLOCKS:
+            ids += [(name, i) for i in range(len(getattr(self, name)))]
+
+        return ids
+
+    # ....................... #
+
+    def block(self, block_id: BlockId) -> Union[BaseModel, Dict[str, Any]]:
+        value = getattr(self, block_id[0])
+
+        return value if len(block_id) == 1 else value[block_id[1]]
+
+    # ....................... #
+
+    def resolve(self, path: str) -> Tuple[BlockId, Tuple[str, ...]]:
+        """
+        Split a dotted parameter path into a block id and a field path.
+
+        List blocks are addressed by index or by their `name` field, e.g.
+        `laser.0.intensity_w_cm2` or `species.electron.density`.
+        """
+
+        name, *rest = path.split(".")
+
+        if name not in type(self).model_fields:
+            raise ValueError(f"Invalid block: {name}")
+
+        if name not in LIST_BLOCKS:
+            return (name,), tuple(rest)
+
+        if not rest:
+            raise ValueError(f"Missing {name} index or name in: {path}")
+
+        key, *rest = rest
+        items = getattr(self, name)
+
+        if key.isdigit():
+            idx = int(key)
+
+        else:
+            names = [getattr(x, "name", None) for x in items]
+
+            if key not in names:
+                raise ValueError(f"No {name} block named `{key}`")
+
+            idx = names.index(key)
+
+        return (name, idx), tuple(rest)
+
+    # ....................... #
+
+    def render(self) -> str:
+        return "".join(
+            render_block(block_id[0], self.block(block_id))
+            for block_id in self.block_ids()
+        )
+
+    # ....................... #
+
+    def write(self, path: str):
+        with open(path, "w") as deck_file:
+            deck_file.write(self.render())
@@ -1,3 +1,3 @@
-from .slurm import generate_slurm_file  # noqa: F401
+from .slurm import generate_analysis_slurm_file, generate_slurm_file  # noqa: F401
 
 # ----------------------- #
@@ -0,0 +1,464 @@
+import ast
+import csv
+import json
+import math
+import operator
+import os
+import re
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..core.const import Unit
+from .blocks import NumberWithUnits, OutputGridItem, Output
+from .deck import DECK_ALIASES, LIST_BLOCKS, Deck
+
+# ----------------------- #
+
+RawBlock = Dict[str, List[str]]
+
+# deck keys read into a different model field, on top of the inverse of
+# `DECK_ALIASES` used for writing
+READ_ALIASES: Dict[str, Dict[str, str]] = {
+    "species": {"nparticles_per_cell": "npart_per_cell", "temperature_ev": "temp_ev"},
+}
+
+# unit names accepted by EPOCH that map onto a `Unit` member
+UNIT_ALIASES = {"micron": "micro"}
+
+# constants predefined by the EPOCH deck evaluator
+EPOCH_CONSTANTS = {
+    "pi": math.pi,
+    "c": 2.99792458e8,
+    "me": 9.10938291e-31,
+    "mp": 1.67262178e-27,
+    "qe": 1.602176565e-19,
+    "kb": 1.3806488e-23,
+    "epsilon0": 8.854187817620389e-12,
+    "mu0": 4e-7 * math.pi,
+    "ev": 1.602176565e-19,
+    "kev": 1.602176565e-16,
+    "mev": 1.602176565e-13,
+    "micron": 1e-6,
+    "atto": 1e-18,
+    "cc": 1e-6,
+    **{u.name: u.value for u in Unit},
+}
+
+EPOCH_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "abs": abs,
+}
+
+_operators = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_fortran_exp = re.compile(r"(?<=\d)[dD](?=[-+]?\d)")
+_number_with_units = re.compile(r"^\s*([-+]?[0-9.]+(?:[eE][-+]?\d+)?)\s*\*\s*(\w+)\s*$")
+
+# ----------------------- #
+
+
+def evaluate(
+    expr: str, constants: Optional[Dict[str, float]] = None
+) -> Optional[float]:
+    """
+    Evaluate a constant arithmetic deck expression in SI units.
+
+    Returns `None` for anything that is not a plain constant expression,
+    e.g. spatial profiles depending on `x`.
+    """
+
+    names = {**EPOCH_CONSTANTS, **(constants or {})}
+    expr = _fortran_exp.sub("e", expr.strip()).replace("^", "**")
+
+    def _eval(node: ast.AST) -> float:
+        if isinstance(node, ast.Expression):
+            return _eval(node.body)
+
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+
+        elif isinstance(node, ast.Name) and node.id.lower() in names:
+            return names[node.id.lower()]
+
+        elif isinstance(node, ast.BinOp) and type(node.op) in _operators:
+            return _operators[type(node.op)](_eval(node.left), _eval(node.right))
+
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _operators:
+            return _operators[type(node.op)](_eval(node.operand))
+
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id.lower() in EPOCH_FUNCTIONS
+        ):
+            return EPOCH_FUNCTIONS[node.func.id.lower()](*map(_eval, node.args))
+
+        raise ValueError(f"Unsupported expression: {expr}")
+
+    try:
+        return float(_eval(ast.parse(expr, mode="eval")))
+
+    except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError):
+        return None
+
+
+# ----------------------- #
+
+
+def parse_deck_text(text: str) -> List[Tuple[str, RawBlock]]:
+    """
+    Split an input deck into its raw blocks.
+
+    Returns:
+        List[Tuple[str, RawBlock]]: The blocks in order as `(name, values)`,
+            where every key maps to all the values assigned to it.
+    """
+
+    blocks = []
+    current: Optional[Tuple[str, RawBlock]] = None
+
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+
+        if not line:
+            continue
+
+        lower = line.lower()
+
+        if lower.startswith("begin:"):
+            current = (lower[len("begin:") :].strip(), dict())
+
+        elif lower.startswith("end:"):
+            if current is not None:
+                blocks.append(current)
+
+            current = None
+
+        elif current is not None:
+            if "=" in line:
+                key, value = line.split("=", 1)
+
+            elif ":" in line:
+                key, value = line.split(":", 1)
+
+            else:
+                continue
+
+            current[1].setdefault(key.strip().lower(), []).append(value.strip())
+
+    return blocks
+
+
+# ----------------------- #
+
+
+def _field_name(block: str, key: str) -> str:
+    aliases = {v: k for k, v in DECK_ALIASES.get(block, {}).items()}
+    aliases.update(READ_ALIASES.get(block, {}))
+
+    return aliases.get(key, key)
+
+
+# ----------------------- #
+
+
+def parse_number_with_units(
+    raw: str, constants: Optional[Dict[str, float]] = None
+) -> NumberWithUnits:
+    match = _number_with_units.match(_fortran_exp.sub("e", raw))
+
+    if match is not None:
+        unit = UNIT_ALIASES.get(match.group(2).lower(), match.group(2).lower())
+
+        if unit in Unit.__members__:
+            return NumberWithUnits(value=float(match.group(1)), unit=unit)
+
+    value = evaluate(raw, constants)
+
+    if value is None:
+        raise ValueError(f"Cannot evaluate: {raw}")
+
+    return NumberWithUnits(value=value, unit=None)
+
+
+# ----------------------- #
+
+
+def _coerce(annotation: Any, raw: str, constants: Dict[str, float]) -> Any:
+    types = typing.get_args(annotation) or (annotation,)
+
+    if NumberWithUnits in types:
+        return parse_number_with_units(raw, constants)
+
+    elif bool in types:
+        return raw.strip(".").lower()
+
+    elif int in types or float in types:
+        value = evaluate(raw, constants)
+
+        return raw if value is None else value
+
+    return raw
+
+
+# ----------------------- #
+
+
+def _block_data(
+    name: str, model: type, raw: RawBlock, constants: Dict[str, float]
+) -> Dict[str, Any]:
+    fields = model.model_fields
+    data = dict()
+
+    for key, values in raw.items():
+        field = _field_name(name, key)
+
+        if field in fields:
+            info = fields[field]
+            coerced = [_coerce(info.annotation, v, constants) for v in values]
+            is_list = typing.get_origin(info.annotation) is list
+            data[field] = coerced if is_list else coerced[-1]
+
+        elif model is Output:
+            items = data.setdefault("items", [])
+
+            for v in values:
+                constraints = [c.strip() for c in v.split("+")]
+                items.append(OutputGridItem(name=key, constraints=constraints))
+
+    return data
+
+
+# ----------------------- #
+
+
+def parse_deck(text: str) -> Deck:
+    """Parse the text of an input deck into a `Deck` model."""
+
+    blocks = parse_deck_text(text)
+    constants = dict()
+    data: Dict[str, Any] = {name: [] for name in LIST_BLOCKS}
+
+    for name, raw in blocks:
+        if name == "constant":
+            for key, values in raw.items():
+                constants[key] = evaluate(values[-1], constants)
+
+                # plain numbers become floats, expressions are kept verbatim
+                try:
+                    value = float(_fortran_exp.sub("e", values[-1]))
+
+                except ValueError:
+                    value = values[-1]
+
+                data.setdefault("constant", dict())[key] = value
+
+    constants = {k: v for k, v in constants.items() if v is not None}
+
+    for name, raw in blocks:
+        if name not in Deck.model_fields or name == "constant":
+            continue
+
+        annotation = Deck.model_fields[name].annotation
+        model = typing.get_args(annotation)[0] if name in LIST_BLOCKS else annotation
+        block = _block_data(name, model, raw, constants)
+
+        if name in LIST_BLOCKS:
+            data[name].append(block)
+
+        else:
+            data[name] = block
+
+    return Deck.model_validate(data)
+
+
+# ----------------------- #
+
+
+def read_deck(path: str) -> Deck:
+    with open(path, "r") as deck_file:
+        return parse_deck(deck_file.read())
+
+
+# ----------------------- #
+
+
+def flatten_deck(text: str) -> Dict[str, Union[float, str]]:
+    """
+    Flatten a deck into `block[.index|.name].field` columns.
+
+    Unlike `parse_deck` this never fails on incomplete or non-standard decks:
+    constant expressions are evaluated to SI floats and anything else is kept
+    as the raw string.
+    """
+
+    row: Dict[str, Union[float, str]] = dict()
+    constants: Dict[str, float] = dict()
+    counters: Dict[str, int] = dict()
+
+    for name, raw in parse_deck_text(text):
+        if name in LIST_BLOCKS:
+            idx = counters.get(name, 0)
+            counters[name] = idx + 1
+            label = raw.get("name", [str(idx)])[-1]
+            prefix = f"{name}.{label}"
+
+        else:
+            prefix = name
+
+        for key, values in raw.items():
+            value = evaluate(values[-1], constants)
+
+            if name == "constant" and value is not None:
+                constants[key] = value
+
+            field = _field_name(name, key)
+            row[f"{prefix}.{field}"] = values[-1] if value is None else value
+
+    return row
+
+
+# ----------------------- #
+
+
+class DeckIndex:
+    """A queryable table of the input decks found in a folder tree."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.columns = sorted({k for row in rows for k in row.keys()})
+
+    # ....................... #
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # ....................... #
+
+    def column(self, name: str) -> np.ndarray:
+        return np.array([row.get(name) for row in self.rows], dtype=object)
+
+    # ....................... #
+
+    def select(self, rtol: float = 1e-9, **conditions: Any) -> List[str]:
+        """
+        Paths of the decks matching all conditions.
+
+        Column names use `__` in place of dots, e.g.
+        `index.select(control__nx=256, laser__0__wavelength=0.8e-6)`.
+        Numbers are compared with a relative tolerance, other values exactly;
+        a callable condition is used as a predicate on the column value.
+        """
+
+        mask = np.ones(len(self.rows), dtype=bool)
+
+        for key, expected in conditions.items():
+            values = self.column(key.replace("__", "."))
+
+            if callable(expected):
+                hit = [v is not None and bool(expected(v)) for v in values]
+
+            elif isinstance(expected, (int, float)):
+                hit = [
+                    isinstance(v, (int, float))
+                    and math.isclose(v, expected, rel_tol=rtol)
+                    for v in values
+                ]
+
+            else:
+                hit = [v == expected for v in values]
+
+            mask &= np.array(hit, dtype=bool)
+
+        return [row["path"] for row, m in zip(self.rows, mask) if m]
+
+    # ....................... #
+
+    def to_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+
+# ----------------------- #
+
+
+def _index_row(path: str) -> Dict[str, Any]:
+    with open(path, "r") as deck_file:
+        row = flatten_deck(deck_file.read())
+
+    row["path"] = path
+    row["folder"] = os.path.dirname(path)
+    row["mtime"] = os.path.getmtime(path)
+
+    return row
+
+
+# ----------------------- #
+
+
+def index_decks(
+    root: str,
+    name: str = "input.deck",
+    cache: Optional[str] = None,
+    workers: int = 8,
+) -> DeckIndex:
+    """
+    Index all input decks under a folder tree.
+
+    Args:
+        root (str): The folder to search recursively.
+        name (str): The deck file name.
+        cache (str, optional): JSON cache file, `<root>/.deck_index.json` by
+            default. Decks whose modification time did not change are not
+            parsed again.
+        workers (int): Number of reader threads.
+
+    Returns:
+        DeckIndex: The index of the decks.
+    """
+
+    cache = cache or os.path.join(root, ".deck_index.json")
+    cached: Dict[str, Dict[str, Any]] = dict()
+
+    if os.path.exists(cache):
+        with open(cache, "r") as f:
+            cached = {row["path"]: row for row in json.load(f)}
+
+    paths = sorted(
+        os.path.join(folder, name)
+        for folder, _, files in os.walk(root)
+        if name in files
+    )
+    stale = [
+        p for p in paths if p not in cached or cached[p]["mtime"] != os.path.getmtime(p)
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for row in pool.map(_index_row, stale):
+            cached[row["path"]] = row
+
+    rows = [cached[p] for p in paths]
+
+    if stale or len(cached) != len(rows):
+        with open(cache, "w") as f:
+            json.dump(rows, f)
+
+    return DeckIndex(rows)
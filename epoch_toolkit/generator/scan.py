@@ -0,0 +1,193 @@
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Tuple
+
+from pydantic_core import to_jsonable_python
+
+from .deck import BlockId, Deck, render_block
+from .slurm import generate_slurm_file
+
+# ----------------------- #
+
+Overrides = Tuple[Tuple[Tuple[str, ...], Any], ...]
+
+# ----------------------- #
+
+
+def _assign(data: Dict[str, Any], field_path: Tuple[str, ...], value: Any):
+    for key in field_path[:-1]:
+        data = data[int(key)] if isinstance(data, list) else data[key]
+
+    last = field_path[-1]
+
+    if isinstance(data, list):
+        data[int(last)] = value
+
+    else:
+        data[last] = value
+
+
+# ----------------------- #
+
+
+class ParameterScan:
+    """
+    Expansion of a base deck over ranges of any of its block fields.
+
+    Parameters are addressed by dotted paths (see `Deck.resolve`), e.g.
+    `laser.0.intensity_w_cm2` or `species.electron.density`. Every distinct
+    variant of a block is validated and rendered once and then reused by all
+    scan points sharing it, so a grid of `n x m` points only renders `n + m`
+    blocks besides the unchanged ones.
+    """
+
+    def __init__(
+        self,
+        base: Deck,
+        parameters: Dict[str, Sequence[Any]],
+        mode: Literal["grid", "zip"] = "grid",
+    ):
+        if mode == "zip" and len({len(v) for v in parameters.values()}) > 1:
+            raise ValueError("All parameters must have the same length in zip mode")
+
+        self.base = base
+        self.mode = mode
+        self.names = list(parameters.keys())
+        self.values = [list(v) for v in parameters.values()]
+        self.paths = [base.resolve(name) for name in self.names]
+        self._cache: Dict[Tuple[BlockId, str], str] = dict()
+
+    # ....................... #
+
+    def __len__(self) -> int:
+        if not self.values:
+            return 1
+
+        if self.mode == "zip":
+            return len(self.values[0])
+
+        size = 1
+
+        for v in self.values:
+            size *= len(v)
+
+        return size
+
+    # ....................... #
+
+    def points(self) -> Iterator[Dict[str, Any]]:
+        """The scan points as `{path: value}` mappings."""
+
+        if self.mode == "zip":
+            combos = zip(*self.values)
+
+        else:
+            combos = itertools.product(*self.values)
+
+        for combo in combos:
+            yield dict(zip(self.names, combo))
+
+    # ....................... #
+
+    def _variant(self, block_id: BlockId, overrides: Overrides) -> str:
+        # scan values may be models, dicts or lists, i.e. not hashable
+        key = (block_id, json.dumps(to_jsonable_python(overrides, fallback=repr)))
+        text = self._cache.get(key)
+
+        if text is not None:
+            return text
+
+        block = self.base.block(block_id)
+
+        if overrides:
+            is_model = not isinstance(block, dict)
+            data = block.model_dump() if is_model else dict(block)
+
+            for field_path, value in overrides:
+                _assign(data, field_path, value)
+
+            block = type(block).model_validate(data) if is_model else data
+
+        text = render_block(block_id[0], block)
+        self._cache[key] = text
+
+        return text
+
+    # ....................... #
+
+    def render(self, point: Dict[str, Any]) -> str:
+        """Render the deck of a single scan point."""
+
+        overrides: Dict[BlockId, List[Tuple[Tuple[str, ...], Any]]] = dict()
+
+        for name, (block_id, field_path) in zip(self.names, self.paths):
+            value = point[name]
+            overrides.setdefault(block_id, []).append((field_path, value))
+
+        return "".join(
+            self._variant(block_id, tuple(overrides.get(block_id, ())))
+            for block_id in self.base.block_ids()
+        )
+
+    # ....................... #
+
+    def write(
+        self,
+        root: str,
+        name: str = "scan",
+        slurm: Optional[Dict[str, Any]] = None,
+        workers: int = 8,
+    ) -> List[str]:
+        """
+        Write an `input.deck` and a slurm script per scan point.
+
+        Decks are rendered in the calling thread (blocks are cached), while
+        file creation is spread over a thread pool since it is I/O bound.
+        An index `<root>/<name>.csv` maps every point folder to its values.
+
+        Args:
+            root (str): The folder where point folders are created.
+            name (str): Prefix of the point folders and experiment names.
+            slurm (dict, optional): Keyword arguments of `generate_slurm_file`;
+                no slurm scripts are written when omitted.
+            workers (int): Number of writer threads.
+
+        Returns:
+            List[str]: The created point folders.
+        """
+
+        os.makedirs(root, exist_ok=True)
+        width = len(str(max(len(self) - 1, 0)))
+        jobs = []
+
+        for idx, point in enumerate(self.points()):
+            experiment_name = f"{name}_{idx:0{width}d}"
+            jobs.append((experiment_name, self.render(point), point))
+
+        def _write(job: Tuple[str, str, Dict[str, Any]]) -> str:
+            experiment_name, deck, _ = job
+            path = os.path.join(root, experiment_name)
+            os.makedirs(path, exist_ok=True)
+
+            with open(os.path.join(path, "input.deck"), "w") as deck_file:
+                deck_file.write(deck)
+
+            if slurm is not None:
+                generate_slurm_file(experiment_name, path, **slurm)
+
+            return path
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_write, jobs))
+
+        with open(os.path.join(root, f"{name}.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", *self.names])
+
+            for path, (_, _, point) in zip(paths, jobs):
+                writer.writerow([path, *[point[n] for n in self.names]])
+
+        return paths
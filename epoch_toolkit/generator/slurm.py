@@ -1,4 +1,5 @@
 import os
+from typing import List, Optional
 
 # ----------------------- #
 
@@ -55,3 +56,122 @@ def generate_slurm_file(
 
     with open(script_filename, "w") as script_file:
         script_file.write(script_content)
+
+
+# ----------------------- #
+
+
+def generate_analysis_slurm_file(
+    experiment_name: str,
+    experiment_path: str,
+    spec_path: str,
+    array_size: int = 42,
+    slabs: int = 1,
+    output_path: Optional[str] = None,
+    cpus_per_task: int = 28,
+    partition: str = "tornado",
+    time: str = "12:00:00",
+    setup: str = "",
+    python: str = "python",
+):
+    """
+    Write the SLURM scripts for a sharded post-processing of a run.
+
+    Three files are written to the experiment folder: an array job where every
+    task extracts its shard of dumps (or of x-slabs with `slabs > 1`), a merge
+    job combining the partial results, and a submit script chaining the two
+    with `afterok` dependency.
+
+    Args:
+        experiment_name (str): The experiment name used for job names.
+        experiment_path (str): The run folder with the `.sdf` dumps.
+        spec_path (str): The JSON extraction plan.
+        array_size (int): Number of array tasks.
+        slabs (int): Number of x-slabs every dump is split into.
+        output_path (str, optional): Output folder, `<run>/analysis` by default.
+        cpus_per_task (int): Worker processes per array task.
+        partition (str): SLURM partition.
+        time (str): Time limit of every task.
+        setup (str): Shell lines to prepare the environment (modules, venv).
+        python (str): The Python interpreter with `epoch_toolkit` installed.
+
+    Returns:
+        str: The path of the submit script.
+    """
+
+    j_name = f"epoch-analysis-{experiment_name}"
+    output_path = output_path or os.path.join(experiment_path, "analysis")
+    log_path = os.path.join(output_path, "logs")
+    os.makedirs(log_path, exist_ok=True)
+
+    extract_cmd = (
+        f'{python} -m epoch_toolkit extract "{experiment_path}" "{spec_path}" '
+        f'-o "{output_path}" -j $SLURM_CPUS_PER_TASK --slabs {slabs} --slurm'
+    )
+    merge_cmd = f'{python} -m epoch_toolkit merge "{output_path}" "{spec_path}"'
+
+    def _script(name: str, cmd: str, extra: List[str], cpus: int) -> str:
+        lines = [
+            "#!/bin/bash",
+            "",
+            "#SBATCH --nodes=1",
+            "#SBATCH --ntasks=1",
+            f"#SBATCH --cpus-per-task={cpus}",
+            f"#SBATCH -p {partition}",
+            f"#SBATCH -t {time}",
+            f"#SBATCH -J {name}",
+            *extra,
+            "",
+            setup,
+            "",
+            cmd,
+            "",
+        ]
+
+        return "\n".join(lines)
+
+    array_script = _script(
+        j_name,
+        extract_cmd,
+        [
+            f"#SBATCH --array=0-{array_size - 1}",
+            f"#SBATCH -o {os.path.join(log_path, f'{j_name}-%a.out')}",
+            f"#SBATCH -e {os.path.join(log_path, f'{j_name}-%a.err')}",
+        ],
+        cpus_per_task,
+    )
+    merge_script = _script(
+        f"{j_name}-merge",
+        merge_cmd,
+        [
+            f"#SBATCH -o {os.path.join(log_path, f'{j_name}-merge.out')}",
+            f"#SBATCH -e {os.path.join(log_path, f'{j_name}-merge.err')}",
+        ],
+        1,
+    )
+
+    array_filename = os.path.join(experiment_path, f"{experiment_name}-analysis.slurm")
+    merge_filename = os.path.join(experiment_path, f"{experiment_name}-merge.slurm")
+    submit_filename = os.path.join(experiment_path, f"{experiment_name}-analysis.sh")
+
+    submit_script = "\n".join(
+        [
+            "#!/bin/bash",
+            "",
+            f'JOB_ID=$(sbatch --parsable "{array_filename}")',
+            f'sbatch --dependency=afterok:$JOB_ID "{merge_filename}"',
+            "",
+        ]
+    )
+
+    for filename, content in [
+        (array_filename, array_script),
+        (merge_filename, merge_script),
+        (submit_filename, submit_script),
+    ]:
+        with open(filename, "w") as script_file:
+            script_file.write(content)
+
+    os.chmod(submit_filename, 0o755)
+
+    return submit_filename
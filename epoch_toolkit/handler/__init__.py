@@ -1,6 +1,10 @@
-from .file import FileHandler
-from .folder import FolderHandler
+from ..utils.lazy import lazy_loader
 
 # ----------------------- #
 
 __all__ = ["FileHandler", "FolderHandler"]
+
+__getattr__, __dir__ = lazy_loader(
+    __name__,
+    attributes={"FileHandler": ".file", "FolderHandler": ".folder"},
+)
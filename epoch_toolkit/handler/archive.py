@@ -0,0 +1,367 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, field_validator
+
+from epoch_toolkit.core import GridData, ScalarData
+
+# ----------------------- #
+
+ARCHIVE_SUFFIX = ".sdfz"
+SUMMARY_NAME = "archive.json"
+
+DEFAULT_CHUNK_ELEMENTS = 1 << 16
+
+# int16 code of non-finite values, the remaining codes span the chunk range
+_INT16_MISSING = -32768
+_INT16_LEVELS = 65534
+
+# ----------------------- #
+
+
+class ArchiveSpec(BaseModel):
+    """
+    What to keep of every dump and at which precision.
+
+    Every array is split into chunks of about `chunk_elements` values along
+    its first axis, each with its own scale:
+        - `int16`: values are mapped linearly from the chunk range onto
+          65534 levels, i.e. the error is at most half a level.
+        - `float16`: values are divided by the largest magnitude of the chunk
+          (so SI field values never overflow), i.e. a relative error of
+          about 5e-4 of the chunk maximum.
+        - `float32`: a plain cast.
+
+    Args:
+        quantities (List[str]): Grid quantities (`GridData` names) to keep,
+            all of them by default. Particle data is not archived.
+        decimate (int | List[int]): Keep every n-th cell, per axis or for all.
+        precision (str): `int16`, `float16` or `float32`.
+        chunk_elements (int): Number of values sharing a scale.
+    """
+
+    quantities: Optional[List[str]] = None
+    decimate: Union[int, List[int]] = 1
+    precision: Literal["int16", "float16", "float32"] = "int16"
+    chunk_elements: int = DEFAULT_CHUNK_ELEMENTS
+
+    # ....................... #
+
+    @field_validator("quantities")
+    @classmethod
+    def check_quantities(cls, v):
+        if v is not None:
+            for name in v:
+                GridData.get(name)
+
+        return v
+
+    # ....................... #
+
+    @field_validator("decimate")
+    @classmethod
+    def check_decimate(cls, v):
+        if any(n < 1 for n in np.atleast_1d(v)):
+            raise ValueError("decimate should be positive")
+
+        return v
+
+    # ....................... #
+
+    def strides(self, ndim: int) -> Tuple[int, ...]:
+        if isinstance(self.decimate, int):
+            return (self.decimate,) * ndim
+
+        return tuple(self.decimate[:ndim]) + (1,) * max(ndim - len(self.decimate), 0)
+
+    # ....................... #
+
+    def selects(self, block: str) -> bool:
+        names = self.quantities or [e.name for e in GridData]
+
+        return any(block.startswith(GridData.get(n).value) for n in names)
+
+
+# ----------------------- #
+
+
+def _chunk_rows(shape: Tuple[int, ...], chunk_elements: int) -> int:
+    per_row = math.prod(shape[1:])
+
+    return max(1, chunk_elements // max(per_row, 1))
+
+
+# ....................... #
+
+
+def encode(
+    arr: np.ndarray, precision: str, chunk_elements: int
+) -> Dict[str, np.ndarray]:
+    """
+    Quantise an array chunk by chunk along its first axis.
+
+    Returns:
+        Dict[str, np.ndarray]: The codes `q`, the per-chunk `offset` and
+            `scale` and the number of `rows` per chunk (see `decode`).
+    """
+
+    arr = np.asarray(arr, dtype=np.float64)
+
+    if precision == "float32":
+        return dict(q=arr.astype(np.float32))
+
+    rows = _chunk_rows(arr.shape, chunk_elements)
+    starts = range(0, max(arr.shape[0], 1), rows)
+    q = np.empty(arr.shape, dtype=np.int16 if precision == "int16" else np.float16)
+    offset = np.zeros(len(starts))
+    scale = np.ones(len(starts))
+
+    for k, start in enumerate(starts):
+        chunk = arr[start : start + rows]
+        finite = np.isfinite(chunk)
+        values = chunk[finite]
+
+        if precision == "float16":
+            peak = np.abs(values).max(initial=0)
+            scale[k] = peak if peak > 0 else 1.0
+            q[start : start + rows] = chunk / scale[k]
+
+            continue
+
+        lo, hi = (values.min(), values.max()) if values.size else (0.0, 0.0)
+        offset[k] = lo
+        scale[k] = (hi - lo) / _INT16_LEVELS if hi > lo else 1.0
+
+        codes = np.rint((chunk - offset[k]) / scale[k]) - _INT16_LEVELS // 2
+        codes[~finite] = _INT16_MISSING
+        q[start : start + rows] = codes
+
+    return dict(q=q, offset=offset, scale=scale, rows=np.array(rows))
+
+
+# ....................... #
+
+
+def decode(
+    q: np.ndarray,
+    offset: Optional[np.ndarray] = None,
+    scale: Optional[np.ndarray] = None,
+    rows: Optional[np.ndarray] = None,
+    dtype: Union[str, np.dtype] = np.float64,
+) -> np.ndarray:
+    """Invert `encode`; non-finite `int16` values come back as NaN."""
+
+    if scale is None:
+        return q.astype(dtype)
+
+    out = np.empty(q.shape, dtype=dtype)
+    rows = int(rows)
+
+    for k in range(len(scale)):
+        sl = slice(k * rows, (k + 1) * rows)
+
+        if q.dtype == np.int16:
+            levels = q[sl].astype(np.float64) + _INT16_LEVELS // 2
+            out[sl] = levels * scale[k] + offset[k]
+            out[sl][q[sl] == _INT16_MISSING] = np.nan
+
+        else:
+            out[sl] = q[sl] * scale[k]
+
+    return out
+
+
+# ----------------------- #
+
+
+def write_archive(path: str, target: str, spec: ArchiveSpec) -> Dict[str, Any]:
+    """
+    Archive the selected grid quantities of a dump into a single file.
+
+    Returns:
+        Dict[str, Any]: Time, step, and per block the maximal absolute error
+            `abs` and the same relative to the largest magnitude `rel`.
+    """
+
+    data = open_dump(path)
+    grid_mid = data.Grid_Grid_mid.data
+    strides = spec.strides(len(grid_mid))
+    blocks = sorted(k for k in data.__dict__.keys() if spec.selects(k))
+
+    meta = dict(
+        header=_plain(data.Header),
+        run_info=_plain(data.Run_info),
+        precision=spec.precision,
+        decimate=list(strides),
+        blocks=blocks,
+        scalars=dict(),
+        errors=dict(),
+    )
+    arrays = dict()
+
+    for k, (g, n) in enumerate(zip(grid_mid, strides)):
+        arrays[f"Grid_Grid_mid.{k}"] = np.asarray(g)[::n]
+
+    for e in ScalarData:
+        block = getattr(data, e.value, None)
+
+        if block is not None:
+            meta["scalars"][e.value] = float(np.asarray(block.data).reshape(-1)[0])
+
+    for name in blocks:
+        arr = np.asarray(getattr(data, name).data)
+        arr = arr[tuple(slice(None, None, n) for n in strides[: arr.ndim])]
+        encoded = encode(arr, spec.precision, spec.chunk_elements)
+        error = np.abs(decode(**encoded) - arr)
+        peak = float(np.nanmax(np.abs(arr), initial=0))
+        bound = float(np.nanmax(error, initial=0))
+
+        meta["errors"][name] = dict(abs=bound, rel=bound / peak if peak > 0 else 0.0)
+        arrays.update({f"{name}.{k}": v for k, v in encoded.items()})
+
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    # write atomically; `np.savez` would append `.npz` to a file name
+    with open(f"{target}.tmp", "wb") as f:
+        np.savez(f, **arrays)
+
+    os.replace(f"{target}.tmp", target)
+
+    return dict(
+        time=meta["header"].get("time"),
+        step=meta["header"].get("step"),
+        errors=meta["errors"],
+    )
+
+
+# ....................... #
+
+
+def _plain(mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON serialisable entries of a header, NumPy scalars converted."""
+
+    result = dict()
+
+    for key, value in dict(mapping).items():
+        value = value.item() if isinstance(value, np.generic) else value
+
+        try:
+            json.dumps(value)
+
+        except (TypeError, ValueError):
+            continue
+
+        result[key] = value
+
+    return result
+
+
+# ----------------------- #
+
+
+class ArchiveBlock:
+    """A block of an archive, decoded on first access of `data`."""
+
+    __slots__ = ("_archive", "_name", "_data")
+
+    # ....................... #
+
+    def __init__(self, archive: "Archive", name: str, data: Any = None):
+        self._archive = archive
+        self._name = name
+        self._data = data
+
+    # ....................... #
+
+    @property
+    def data(self) -> Any:
+        if self._data is None:
+            self._data = self._archive.decode(self._name)
+
+        return self._data
+
+
+# ----------------------- #
+
+
+class Archive:
+    """
+    An archived dump with the block interface of `sdf.BlockList`, so that
+    `FileHandler.read` accepts it in place of the original `.sdf` file.
+    """
+
+    # ....................... #
+
+    def __init__(self, path: str):
+        self._file = np.load(path, allow_pickle=False)
+        self._meta = json.loads(str(self._file["meta"]))
+
+        self.Header = self._meta["header"]
+        self.Run_info = self._meta["run_info"]
+
+        dim = len(self._meta["decimate"])
+        grid_mid = tuple(self._file[f"Grid_Grid_mid.{k}"] for k in range(dim))
+        self.Grid_Grid_mid = ArchiveBlock(self, "Grid_Grid_mid", grid_mid)
+
+        for name, value in self._meta["scalars"].items():
+            setattr(self, name, ArchiveBlock(self, name, value))
+
+        for name in self._meta["blocks"]:
+            setattr(self, name, ArchiveBlock(self, name))
+
+    # ....................... #
+
+    @property
+    def errors(self) -> Dict[str, Dict[str, float]]:
+        return self._meta["errors"]
+
+    # ....................... #
+
+    def decode(self, name: str) -> np.ndarray:
+        keys = ("q", "offset", "scale", "rows")
+        parts = {
+            k: self._file[f"{name}.{k}"] for k in keys if f"{name}.{k}" in self._file
+        }
+
+        return decode(**parts)
+
+
+# ----------------------- #
+
+
+def is_archive(path: str) -> bool:
+    return path.endswith(ARCHIVE_SUFFIX)
+
+
+# ....................... #
+
+
+def open_dump(path: str) -> Any:
+    """Open a dump or an archive lazily (memory-mapped for `.sdf` files)."""
+
+    if is_archive(path):
+        return Archive(path)
+
+    import sdf
+
+    return sdf.read(path, mmap=1)
+
+
+# ----------------------- #
+
+
+def merge_errors(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """The worst error of every block over the results of `write_archive`."""
+
+    errors = dict()
+
+    for result in results:
+        for name, bound in result["errors"].items():
+            current = errors.setdefault(name, dict(abs=0.0, rel=0.0))
+            current["abs"] = max(current["abs"], bound["abs"])
+            current["rel"] = max(current["rel"], bound["rel"])
+
+    return errors
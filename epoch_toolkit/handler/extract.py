@@ -0,0 +1,540 @@
+import json
+import os
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, field_validator, model_validator
+
+from epoch_toolkit.core import Component, Grid, GridData, ParticleData, Unit
+from epoch_toolkit.core.grid import BaseGrid
+from epoch_toolkit.core.transform import (
+    GridCrop,
+    GridSlice,
+    MaskSpec,
+    ObliqueSlice,
+    Reduction,
+    TransformChain,
+)
+from epoch_toolkit.core.transform.reduction import SLAB_COMBINE
+from epoch_toolkit.core.units import ScaledArray, factor
+from epoch_toolkit.utils.parallel import (
+    default_workers,
+    parallel_map,
+    shard,
+    slab_bounds,
+)
+
+from .file import FileHandler
+from .folder import dump_key, list_dumps
+from .writer import AsyncWriter, batched_names, save_result
+
+# ----------------------- #
+
+
+class Histogram(BaseModel):
+    bins: int = 256
+    min: Optional[float] = None
+    max: Optional[float] = None
+    log: bool = False
+
+    # ....................... #
+
+    def edges(self, values: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """Edges in the units of `values`, `min`/`max` given scaled by `scale`."""
+
+        if self.log:
+            values = values[values > 0]
+
+        lo = self.min / scale if self.min is not None else values.min(initial=np.inf)
+        hi = self.max / scale if self.max is not None else values.max(initial=-np.inf)
+
+        if not np.isfinite(lo) or not np.isfinite(hi):
+            lo, hi = (1.0, 10.0) if self.log else (0.0, 1.0)
+
+        if hi <= lo:
+            hi = lo * 10 if self.log else lo + 1
+
+        if self.log:
+            return np.geomspace(lo, hi, self.bins + 1)
+
+        return np.linspace(lo, hi, self.bins + 1)
+
+    # ....................... #
+
+    def apply(self, values: np.ndarray, scale: float = 1.0):
+        # bin the unscaled values and scale the edges instead
+        edges = self.edges(values, scale=scale)
+        counts, _ = np.histogram(values, bins=edges)
+        edges = edges * scale
+
+        return counts, edges
+
+
+# ----------------------- #
+
+
+class Extraction(BaseModel):
+    """
+    A single quantity to extract from every dump of a run.
+
+    Grid quantities may be weighted by an expression of raw and derived
+    quantities (see `FileHandler.expression`), e.g. `"weight": "density"`.
+    Grid and particle quantities may be masked by an expression such as
+    `"mask": "density > 1e25"` or a full `MaskSpec`. Both are applied before
+    the reduction given by `projection`. With `value_unit` the values are
+    stored in that unit (e.g. `giga` for GV/m); the scaling is applied to the
+    reduced result, or to the histogram edges, never to the full array.
+    """
+
+    name: str
+    quantity: str
+    component: Optional[Component] = None
+    specie: Optional[str] = None
+    crops: List[GridCrop] = []
+    slices: List[GridSlice] = []
+    oblique: Optional[ObliqueSlice] = None
+    projection: Optional[Reduction] = None
+    weight: Optional[str] = None
+    mask: Optional[Union[str, MaskSpec]] = None
+    histogram: Optional[Histogram] = None
+    value_unit: Optional[Unit] = None
+
+    # ....................... #
+
+    @field_validator("value_unit", mode="before")
+    @classmethod
+    def check_unit(cls, v):
+        return Unit.get(v) if isinstance(v, str) else v
+
+    # ....................... #
+
+    @model_validator(mode="after")
+    def check_all(self):
+        if not self.is_grid and not self.is_particle:
+            raise ValueError(f"Invalid quantity: {self.quantity}")
+
+        if self.is_particle and self.specie is None:
+            raise ValueError("Particle quantities require a specie")
+
+        if self.is_particle and self.weight is not None:
+            raise ValueError("Weights are only defined for grid data")
+
+        if self.is_particle and (self.slices or self.oblique is not None):
+            raise ValueError("Slices are only defined for grid data")
+
+        if (
+            self.value_unit is not None
+            and self.projection is not None
+            and self.projection.op in ("argmax", "argmin")
+        ):
+            raise ValueError("Cell indices of argmax/argmin have no value unit")
+
+        if isinstance(self.mask, MaskSpec):
+            self.mask = self._bind_mask(self.mask)
+
+        return self
+
+    # ....................... #
+
+    def _bind_mask(self, spec: MaskSpec) -> MaskSpec:
+        """Default the target (and specie) of a mask to the extraction's."""
+
+        target = "particles" if self.is_particle else "grid"
+        update = dict(
+            all=[self._bind_mask(s) for s in spec.all],
+            any=[self._bind_mask(s) for s in spec.any],
+        )
+
+        if "target" not in spec.model_fields_set:
+            update["target"] = target
+
+        elif spec.target != target:
+            raise ValueError(
+                f"Mask of `{self.name}` targets {spec.target}, "
+                f"the extraction is {target} data"
+            )
+
+        if self.is_particle and spec.specie is None:
+            update["specie"] = self.specie
+
+        elif self.is_particle and spec.specie != self.specie:
+            raise ValueError(
+                f"Mask of `{self.name}` selects `{spec.specie}`, "
+                f"the extraction `{self.specie}`"
+            )
+
+        return spec.model_copy(update=update)
+
+    # ....................... #
+
+    @property
+    def is_grid(self) -> bool:
+        return self.quantity in GridData.__members__
+
+    # ....................... #
+
+    @property
+    def is_particle(self) -> bool:
+        return self.quantity in ParticleData.__members__
+
+    # ....................... #
+
+    @property
+    def mask_spec(self) -> Optional[MaskSpec]:
+        if isinstance(self.mask, str):
+            target = "particles" if self.is_particle else "grid"
+
+            return MaskSpec(quantity=self.mask, target=target, specie=self.specie)
+
+        return self.mask
+
+    # ....................... #
+
+    @property
+    def chain(self) -> TransformChain:
+        return TransformChain(
+            crops=self.crops,
+            slices=self.slices,
+            oblique=self.oblique,
+            projection=self.projection,
+        )
+
+
+# ----------------------- #
+
+
+class ExtractionPlan(BaseModel):
+    extractions: List[Extraction]
+    dtype: Optional[str] = None
+    compress: bool = True
+
+    # ....................... #
+
+    @classmethod
+    def from_file(cls, path: str) -> "ExtractionPlan":
+        with open(path, "r") as f:
+            spec = json.load(f)
+
+        if isinstance(spec, list):
+            spec = dict(extractions=spec)
+
+        return cls.model_validate(spec)
+
+    # ....................... #
+
+    def check_sliceable(self):
+        """Ensure every extraction can be split into x-slabs and merged back."""
+
+        for extraction in self.extractions:
+            hist = extraction.histogram
+            reduction = extraction.projection
+
+            if hist is not None and (hist.min is None or hist.max is None):
+                raise ValueError(
+                    f"Histogram `{extraction.name}` needs a fixed range to be "
+                    "merged across slabs"
+                )
+
+            if extraction.oblique is not None or any(
+                s.axis == "x" and (s.value is not None or s.step > 1)
+                for s in extraction.slices
+            ):
+                raise ValueError(
+                    f"Slices of `{extraction.name}` cannot be split into x-slabs"
+                )
+
+            if (
+                reduction is not None
+                and reduction.reduces_x
+                and (
+                    reduction.direction is not None or reduction.op not in SLAB_COMBINE
+                )
+            ):
+                raise ValueError(
+                    f"Reduction `{extraction.name}` cannot be merged across x-slabs"
+                )
+
+
+# ----------------------- #
+
+
+def read_quantity(handler: FileHandler, extraction: Extraction) -> np.ndarray:
+    component = extraction.component or Component.x
+    func = getattr(handler, extraction.quantity, None)
+
+    if func is None:
+        raise ValueError(f"No accessor for quantity: {extraction.quantity}")
+
+    if extraction.quantity in ("density", "temperature"):
+        return func(specie=extraction.specie)
+
+    elif extraction.quantity == "coordinates":
+        return func(extraction.specie)["xyz".index(component.value)]
+
+    elif extraction.quantity == "weight":
+        return func(extraction.specie)
+
+    elif extraction.is_particle:
+        return func(extraction.specie, component=component)
+
+    return func(component=component)
+
+
+# ----------------------- #
+
+
+def slab_grid(grid: Grid, slab: slice) -> Grid:
+    """The grid restricted to an x-slab, keeping `val_to_idx` and the spacing."""
+
+    x = grid.component("x")
+    axes = [
+        BaseGrid(
+            min=x.idx_to_val(slab.start),
+            max=x.idx_to_val(slab.stop),
+            size=slab.stop - slab.start,
+            step=x.spacing,
+        )
+    ]
+
+    return Grid(axes=axes + list(grid.axes[1:]))
+
+
+# ----------------------- #
+
+
+def extract(
+    handler: FileHandler,
+    extraction: Extraction,
+    slab: Optional[slice] = None,
+) -> dict:
+    """
+    Apply an extraction to the loaded dump and return the arrays to store.
+
+    Args:
+        handler (FileHandler): The handler with the dump loaded.
+        extraction (Extraction): The extraction to apply.
+        slab (slice, optional): Restrict the extraction to an x-slab of the grid;
+            particles are assigned to the slab containing their x coordinate.
+
+    Returns:
+        dict: The arrays to store, keyed by output name.
+    """
+
+    arr = source = read_quantity(handler, extraction)
+    scale = 1 / factor(extraction.value_unit)
+
+    mask = None if extraction.mask is None else handler.mask(extraction.mask_spec)
+
+    if extraction.is_particle:
+        coordinates = handler.coordinates(extraction.specie)
+
+        if mask is not None:
+            keep = mask.indices()
+            arr = arr[keep]
+            coordinates = [c[keep] for c in coordinates]
+
+        if slab is not None:
+            x = handler.grid.component("x")
+            lo = x.idx_to_val(slab.start) if slab.start > 0 else -np.inf
+            hi = x.idx_to_val(slab.stop) if slab.stop < x.size else np.inf
+            inside = (coordinates[0] >= lo) & (coordinates[0] < hi)
+            arr = arr[inside]
+            coordinates = [c[inside] for c in coordinates]
+
+        arr = extraction.chain.apply_particles(arr, coordinates)
+
+    else:
+        grid = handler.grid
+        weights = None
+
+        # a broadcast view, e.g. of a weight depending on `grid.x` only
+        if extraction.weight is not None:
+            weights = handler.expression(extraction.weight, specie=extraction.specie)
+            weights = np.broadcast_to(weights, arr.shape)
+
+        if slab is not None:
+            arr = arr[slab]
+            weights = None if weights is None else weights[slab]
+            mask = None if mask is None else mask[slab]
+            grid = slab_grid(grid, slab)
+
+        arr = extraction.chain.apply(arr, grid, weights=weights, mask=mask)
+
+    if extraction.histogram is not None:
+        values = np.asarray(arr).ravel()
+        counts, edges = extraction.histogram.apply(values, scale=scale)
+
+        return {extraction.name: counts, f"{extraction.name}_edges": edges}
+
+    # results of reductions are new arrays, scaled in place
+    inplace = not np.may_share_memory(arr, source)
+    arr = ScaledArray(arr, scale=scale).values(inplace=inplace)
+
+    return {extraction.name: arr}
+
+
+# ----------------------- #
+
+
+def output_path(path: str, out_dir: str, part: Optional[int] = None) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    if part is not None:
+        stem = f"{stem}.part{part:04d}"
+
+    return os.path.join(out_dir, f"{stem}.npz")
+
+
+# ----------------------- #
+
+
+def process_dump(
+    path: str,
+    plan: ExtractionPlan,
+    out_dir: str,
+    overwrite: bool = False,
+    log_level: str = "warning",
+    slab: Optional[Tuple[int, int]] = None,
+    write: bool = True,
+) -> Union[str, Tuple[str, Dict[str, np.ndarray]]]:
+    """
+    Run an extraction plan over one dump and write its `.npz` result.
+
+    With `slab=(index, count)` only the given x-slab of the dump is processed
+    and the partial result is written next to the others for `merge_outputs`.
+    With `write=False` the target and the result are returned instead, e.g.
+    to be written by an `AsyncWriter`.
+    """
+
+    target = output_path(path, out_dir, part=None if slab is None else slab[0])
+
+    if os.path.exists(target) and not overwrite:
+        return target if write else (target, None)
+
+    handler = FileHandler(log_level=log_level)
+    handler.read(path)
+
+    result = dict(time=np.float64(handler.header["time"]))
+    result["step"] = np.int64(handler.header.get("step", dump_key(path)[1]))
+    bounds = None
+
+    if slab is not None:
+        slab_size = handler.grid.component("x").size
+        bounds = slab_bounds(slab_size, *slab)
+        result["slab"] = np.array([bounds.start, bounds.stop, slab_size])
+
+    for extraction in plan.extractions:
+        arrays = extract(handler, extraction, slab=bounds)
+
+        if plan.dtype is not None:
+            arrays = {
+                k: v.astype(plan.dtype) if v.dtype.kind == "f" else v
+                for k, v in arrays.items()
+            }
+
+        result.update(arrays)
+
+    if not write:
+        return target, result
+
+    return save_result(target, result, compress=plan.compress)
+
+
+# ----------------------- #
+
+
+def _process_item(item: Tuple[str, Optional[Tuple[int, int]]], **kwargs):
+    path, slab = item
+
+    return process_dump(path, slab=slab, **kwargs)
+
+
+# ----------------------- #
+
+
+def process_folder(
+    folder: str,
+    plan: ExtractionPlan,
+    out_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    overwrite: bool = False,
+    prefix: Optional[str] = None,
+    slabs: int = 1,
+    writer: Optional[AsyncWriter] = None,
+) -> List[str]:
+    """
+    Run an extraction plan over the dumps of a run folder.
+
+    Args:
+        folder (str): The run folder.
+        plan (ExtractionPlan): The extractions to apply to every dump.
+        out_dir (str, optional): Output folder, `<folder>/analysis` by default.
+        workers (int, optional): Number of worker processes.
+        shard_index (int): Index of the work shard processed by this task.
+        shard_count (int): Total number of shards (e.g. SLURM array size).
+        overwrite (bool): Recompute dumps whose output already exists.
+        prefix (str, optional): Only process dumps with this file prefix.
+        slabs (int): Split every dump into this many x-slabs processed as
+            independent work items; partial results are combined by
+            `merge_outputs`.
+        writer (AsyncWriter, optional): Return the results to this process
+            and write them in the background (with the writer's settings)
+            while the workers continue, instead of writing them from the
+            workers. Batched results are not separate files.
+
+    Returns:
+        List[str]: The written output files.
+    """
+
+    if slabs > 1:
+        plan.check_sliceable()
+
+    out_dir = out_dir or os.path.join(folder, "analysis")
+    os.makedirs(out_dir, exist_ok=True)
+
+    files = list_dumps(folder, prefix=prefix)
+
+    if slabs > 1:
+        items = [(f, (k, slabs)) for f in files for k in range(slabs)]
+
+    else:
+        items = [(f, None) for f in files]
+
+    items = shard(items, shard_index, shard_count)
+    func = partial(_process_item, plan=plan, out_dir=out_dir, overwrite=overwrite)
+    item_bytes = max((os.path.getsize(f) for f in files), default=0) // slabs
+
+    if writer is None:
+        return list(parallel_map(func, items, workers=workers, item_bytes=item_bytes))
+
+    if not overwrite:
+        done = batched_names(out_dir)
+        items = [
+            (path, slab)
+            for path, slab in items
+            if os.path.basename(output_path(path, out_dir, slab and slab[0]))
+            not in done
+        ]
+
+    written = []
+
+    # results wait in this process until the writer accepts them, so only
+    # about one per worker is computed ahead of the writer
+    results = parallel_map(
+        partial(func, write=False),
+        items,
+        workers=workers,
+        item_bytes=item_bytes,
+        max_pending=workers or default_workers(),
+    )
+
+    for target, result in results:
+        if result is not None:
+            writer.put(target, result)
+
+        written.append(target)
+
+    return written
@@ -1,10 +1,9 @@
 import os  # noqa: F401
+from functools import partial, reduce
 from itertools import product
-from typing import Any, Callable, Dict, Optional, Set, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Set, Union
 
 import numpy as np
-import sdf
-import sdf_helper as sdfh
 
 from epoch_toolkit.core import (
     Component,
@@ -15,13 +14,58 @@ from epoch_toolkit.core import (
     ScalarData,
     Unit,
 )
+from epoch_toolkit.core.const import ELECTRON_MASS
+from epoch_toolkit.core.derived import DerivedEvaluator
+from epoch_toolkit.core.expr import compile_expression
+from epoch_toolkit.core.spectrum import Binning, spectrum
+from epoch_toolkit.core.transform.gather import (
+    DEFAULT_CHUNK_SIZE,
+    FIELD_COMPONENTS,
+    Gather,
+    GatherMethod,
+)
+from epoch_toolkit.core.transform.mask import Mask, MaskSpec
+from epoch_toolkit.core.units import ScaledArray, from_si
 from epoch_toolkit.utils.logging import LogMixin
+from epoch_toolkit.utils.memory import BUDGET
+
+from .archive import Archive, is_archive, open_dump
+
+if TYPE_CHECKING:
+    import sdf
+
+# ----------------------- #
+
+
+def read_scalars(path: str) -> Dict[str, float]:
+    """
+    Read the header time/step and the scalar diagnostics of a dump.
+
+    The dump is opened memory-mapped, so only the header and the tiny scalar
+    blocks are actually read from disk, never the field or particle data.
+    Missing diagnostics are reported as NaN.
+    """
+
+    data = open_dump(path)
+    row = dict(time=float(data.Header["time"]), step=int(data.Header["step"]))
+
+    for e in ScalarData:
+        block = getattr(data, e.value, None)
+        row[e.name] = (
+            float(np.asarray(block.data).reshape(-1)[0])
+            if block is not None
+            else float("nan")
+        )
+
+    return row
+
 
 # ----------------------- #
 
 
 class FileHandler(LogMixin):
-    data: sdf.BlockList = None
+    path: str = None
+    data: "sdf.BlockList" = None
     grid: Grid = None
     structure: Dict[EpochData, Union[Set[str], Dict[str, Set[str]], bool]] = dict()
     species: Set[str] = set()
@@ -30,6 +74,9 @@ class FileHandler(LogMixin):
 
     header: Dict[str, Any] = dict()
     run_info: Dict[str, Any] = dict()
+    _evaluators: Dict[Any, DerivedEvaluator] = dict()
+    _masks: Dict[str, Mask] = dict()
+    _admitted: Set[str] = set()
 
     # ....................... #
 
@@ -45,12 +92,16 @@ class FileHandler(LogMixin):
         self.set_units(grid_unit=grid_unit, time_unit=time_unit)
         self.verbose = verbose
 
+        BUDGET.on_pressure(self.release)
+
     # ....................... #
 
     @property
     def time(self):
+        """The dump time in the handler's time unit (`femto` by default)."""
+
         if self.data is not None:
-            return self.header["time"] * self._time_unit.value
+            return from_si(self.header["time"], self._time_unit)
 
         else:
             raise ValueError("No data loaded")
@@ -59,6 +110,14 @@ class FileHandler(LogMixin):
 
     def _get(self, key: str):
         if hasattr(self.data, key):
+            if key not in self._admitted:
+                nbytes = self.block_nbytes(key)
+
+                if nbytes is not None:
+                    BUDGET.admit(nbytes, what=f"`{key}` of {self.path}")
+
+                self._admitted.add(key)
+
             return getattr(self.data, key).data
 
         else:
@@ -66,6 +125,55 @@ class FileHandler(LogMixin):
 
     # ....................... #
 
+    def block_nbytes(self, key: str) -> Optional[int]:
+        """
+        Size of a block in bytes from the SDF block table (the data length,
+        or the dimensions and data type), without reading its data. `None`
+        if the reader does not report it.
+        """
+
+        block = getattr(self.data, key)
+        nbytes = getattr(block, "data_length", None)
+
+        if nbytes is not None:
+            return int(nbytes)
+
+        dims = getattr(block, "dims", None)
+        datatype = getattr(block, "datatype", None)
+
+        if dims is not None and datatype is not None:
+            return int(np.prod(dims)) * np.dtype(datatype).itemsize
+
+        # readers that hold the data already (e.g. in memory)
+        data = vars(block).get("data") if hasattr(block, "__dict__") else None
+
+        if isinstance(data, np.ndarray):
+            return data.nbytes
+
+        return None
+
+    # ....................... #
+
+    def block_sizes(self) -> Dict[str, int]:
+        """Sizes of all blocks of the loaded dump that report one."""
+
+        sizes = {k: self.block_nbytes(k) for k in vars(self.data).keys()}
+
+        return {k: v for k, v in sizes.items() if v is not None}
+
+    # ....................... #
+
+    def release(self):
+        """Drop cached derived quantities and masks of the loaded dump."""
+
+        for evaluator in self._evaluators.values():
+            evaluator.clear()
+
+        self._evaluators = dict()
+        self._masks = dict()
+
+    # ....................... #
+
     def set_units(
         self,
         grid_unit: Optional[Union[str, Unit]] = None,
@@ -86,8 +194,18 @@ class FileHandler(LogMixin):
     # ....................... #
 
     def read(self, path: str):
+        """Read an `.sdf` dump or an archive written by `write_archive`."""
+
         self.info(f"Reading file: {path}")
-        self.data = sdfh.getdata(fname=path, verbose=self.verbose)
+        self.path = path
+
+        if is_archive(path):
+            self.data = Archive(path)
+
+        else:
+            import sdf_helper as sdfh
+
+            self.data = sdfh.getdata(fname=path, verbose=self.verbose)
 
         self.info("Capturing grid...")
         self.grid = Grid.from_sdf(self.data)
@@ -96,6 +214,11 @@ class FileHandler(LogMixin):
         )
 
         self.info("Analyzing data structure...")
+        self.structure = dict()
+        self.species = set()
+        self._evaluators = dict()
+        self._masks = dict()
+        self._admitted = set()
         self._analyze()
 
         self.header = self.data.Header
@@ -168,8 +291,7 @@ class FileHandler(LogMixin):
     # ....................... #
 
     def density(self, specie: Optional[str] = None) -> np.ndarray:
-        assert specie in self.species, f"Invalid specie: {specie}"
-        assert GridData.get("density").value in self.structure.keys()
+        assert specie is None or specie in self.species, f"Invalid specie: {specie}"
 
         key = GridData.get("density").value
         assert key in self.structure.keys(), f"Key not found: {key}"
@@ -182,7 +304,7 @@ class FileHandler(LogMixin):
     # ....................... #
 
     def temperature(self, specie: Optional[str] = None) -> np.ndarray:
-        assert specie in self.species, f"Invalid specie: {specie}"
+        assert specie is None or specie in self.species, f"Invalid specie: {specie}"
 
         key = GridData.get("temperature").value
         assert key in self.structure.keys(), f"Key not found: {key}"
@@ -199,11 +321,11 @@ class FileHandler(LogMixin):
             component = Component.get(component)
 
         if component not in [Component.x, Component.y, Component.z]:
-            return self._non_cartesian_grid(self.current, component, self.grid)
+            return self.derived(f"electric_field.{component.value}")
 
         else:
             component = component.value
-            key_ = GridData.get("magnetic_field").value
+            key_ = GridData.get("electric_field").value
             assert key_ in self.structure.keys(), f"Key not found: {key_}"
             assert (
                 component in self.structure[key_]
@@ -218,7 +340,7 @@ class FileHandler(LogMixin):
             component = Component.get(component)
 
         if component not in [Component.x, Component.y, Component.z]:
-            return self._non_cartesian_grid(self.current, component, self.grid)
+            return self.derived(f"magnetic_field.{component.value}")
 
         else:
             component = component.value
@@ -237,11 +359,11 @@ class FileHandler(LogMixin):
             component = Component.get(component)
 
         if component not in [Component.x, Component.y, Component.z]:
-            return self._non_cartesian_grid(self.current, component, self.grid)
+            return self.derived(f"current.{component.value}")
 
         else:
             component = component.value
-            key_ = GridData.get("magnetic_field").value
+            key_ = GridData.get("current").value
             assert key_ in self.structure.keys(), f"Key not found: {key_}"
             assert (
                 component in self.structure[key_]
@@ -251,118 +373,268 @@ class FileHandler(LogMixin):
 
     # ....................... #
 
-    def coordinates(self, specie: str):
+    def coordinates(self, specie: str, unit: Optional[Union[str, Unit]] = None):
+        """
+        Particle positions in SI units, or as `ScaledArray` views in `unit`
+        that scale lazily (e.g. only the plotted subsample).
+        """
+
         key_ = ParticleData.get("coordinates").value
         assert key_ in self.structure.keys(), f"Key not found: {key_}"
         assert specie in self.structure[key_], f"Specie not found: {specie}"
 
+        coordinates = self._get(f"{key_}_{specie}")
+
+        if unit is None:
+            return coordinates
+
+        return tuple(ScaledArray(c, unit=unit) for c in coordinates)
+
+    # ....................... #
+
+    def axis(self, component: str = "x") -> np.ndarray:
+        """The cell centres along an axis in the handler's grid unit."""
+
+        return self.grid.component(component).values(unit=self._grid_unit)
+
+    # ....................... #
+
+    def ids(self, specie: str) -> np.ndarray:
+        key_ = ParticleData.get("id").value
+        assert key_ in self.structure.keys(), f"Key not found: {key_}"
+        assert specie in self.structure[key_], f"Specie not found: {specie}"
+
         return self._get(f"{key_}_{specie}")
 
     # ....................... #
 
-    @staticmethod
-    def _non_cartesian_grid(
-        func: Callable, component: Union[str, Component], grid: Grid
-    ):
-        if isinstance(component, str):
-            component = Component.get(component)
+    def weight(self, specie: str) -> np.ndarray:
+        key_ = ParticleData.get("weight").value
+        assert key_ in self.structure.keys(), f"Key not found: {key_}"
+        assert specie in self.structure[key_], f"Specie not found: {specie}"
 
-        assert component in [Component.r, Component.r3d, Component.phi, Component.theta]
+        return self._get(f"{key_}_{specie}")
+
+    # ....................... #
 
-        if component is Component.r:
-            yv = func(component=Component.y)
-            zv = func(component=Component.z)
+    def _read_raw(self, name: str, specie: Optional[str] = None) -> np.ndarray:
+        accessor, _, component = name.partition(".")
 
-            ygrid = grid.component("y")
-            zgrid = grid.component("z")
+        if accessor == "grid":
+            axis = "xyz".index(component)
+            target = self.grid.component(component)
+            shape = [1] * self.grid.dim
+            shape[axis] = target.size
 
-            ygrid = np.linspace(ygrid.min, ygrid.max, ygrid.size, endpoint=True)
-            zgrid = np.linspace(zgrid.min, zgrid.max, zgrid.size, endpoint=True)
+            return np.linspace(
+                target.min, target.max, target.size, endpoint=True
+            ).reshape(shape)
 
-            ygrid, zgrid = np.meshgrid(ygrid, zgrid, indexing="ij")
+        elif accessor == "coordinates":
+            return self.coordinates(specie)["xyz".index(component)]
 
-            dot = yv * ygrid + zv * zgrid
+        elif accessor == "momentum":
+            return self.momentum(specie, component=component)
 
-            return np.sqrt(yv**2 + zv**2) * np.sign(dot)
+        elif accessor in ("density", "temperature"):
+            return getattr(self, accessor)(specie=specie)
 
-        elif component is Component.r3d:
-            xv = func(component=Component.x)
-            yv = func(component=Component.y)
-            zv = func(component=Component.z)
+        elif accessor in ("electric_field", "magnetic_field", "current"):
+            return getattr(self, accessor)(component=component)
 
-            xgrid = grid.component("x")
-            ygrid = grid.component("y")
-            zgrid = grid.component("z")
+        raise ValueError(f"Unknown quantity: {name}")
 
-            xgrid = np.linspace(xgrid.min, xgrid.max, xgrid.size, endpoint=True)
-            ygrid = np.linspace(ygrid.min, ygrid.max, ygrid.size, endpoint=True)
-            zgrid = np.linspace(zgrid.min, zgrid.max, zgrid.size, endpoint=True)
+    # ....................... #
 
-            xgrid, ygrid, zgrid = np.meshgrid(xgrid, ygrid, zgrid, indexing="ij")
+    def evaluator(
+        self, specie: Optional[str] = None, mass: float = ELECTRON_MASS
+    ) -> DerivedEvaluator:
+        """
+        The memoising evaluator of derived quantities for the loaded dump.
 
-            dot = xv * xgrid + yv * ygrid + zv * zgrid
+        One evaluator is kept per (specie, mass) until the next `read`, so
+        intermediates shared by several requests are computed only once.
+        """
 
-            return np.sqrt(xv**2 + yv**2 + zv**2) * np.sign(dot)
+        key = (specie, mass)
 
-        elif component is Component.phi:
-            yv = func(component=Component.y)
-            zv = func(component=Component.z)
+        if key not in self._evaluators:
+            self._evaluators[key] = DerivedEvaluator(
+                partial(self._read_raw, specie=specie), constants=dict(mass=mass)
+            )
 
-            return np.arctan2(zv, yv)
+        return self._evaluators[key]
 
-        else:
-            xv = func(component=Component.x)
-            yv = func(component=Component.y)
-            zv = func(component=Component.z)
+    # ....................... #
+
+    def derived(
+        self, name: str, specie: Optional[str] = None, mass: float = ELECTRON_MASS
+    ) -> np.ndarray:
+        """
+        Evaluate a registered derived quantity, e.g. `electric_field.abs`,
+        `poynting.x`, `field_energy_density` or (per specie) `gamma` and
+        `kinetic_energy`. See `epoch_toolkit.core.derived` for the registry.
+        """
 
-            return np.arccos(zv / np.sqrt(xv**2 + yv**2 + zv**2))
+        return self.evaluator(specie=specie, mass=mass).evaluate(name)[name]
 
     # ....................... #
 
-    @staticmethod
-    def _non_cartesian_particle(
-        func: Callable,
-        coordinate_func: Callable,
-        component: Union[str, Component],
+    def expression(
+        self,
+        expression: str,
         specie: Optional[str] = None,
-    ):
+        mass: float = ELECTRON_MASS,
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        Evaluate an arithmetic expression of raw and derived quantities, e.g.
+        `sqrt(electric_field.y**2 + electric_field.z**2)` or
+        `kinetic_energy / qe`. The expression is evaluated fused and blocked,
+        see `epoch_toolkit.core.expr` for the syntax and keyword arguments.
+        """
 
-        if isinstance(component, str):
-            component = Component.get(component)
+        compiled = compile_expression(expression)
+        values = self.evaluator(specie=specie, mass=mass).evaluate(*compiled.names)
 
-        assert component in [Component.r, Component.r3d, Component.phi, Component.theta]
+        return compiled(values, **kwargs)
 
-        if component is Component.r:
-            yv = func(component=Component.y, specie=specie)
-            zv = func(component=Component.z, specie=specie)
+    # ....................... #
 
-            xyz = coordinate_func(specie)
-            dot = yv * xyz[1] + zv * xyz[2]
+    def spectrum(
+        self,
+        specie: str,
+        binnings: Sequence[Union[Binning, Dict[str, Any]]],
+        mass: float = ELECTRON_MASS,
+        weighted: bool = True,
+        **kwargs,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Histograms of gamma, kinetic energy and momentum angles of a specie,
+        e.g. `spectrum("electron", [{"quantity": "energy", "min": 1e3,
+        "max": 1e8, "log": True}, {"quantity": "theta"}])`, computed in one
+        fused pass over the momenta (see `epoch_toolkit.core.spectrum`).
+
+        Args:
+            specie (str): The particle specie.
+            binnings (Sequence[Binning | dict]): The histograms.
+            mass (float): The particle mass.
+            weighted (bool): Weight by the macro-particle weights, if the
+                dump has them.
+            **kwargs: `chunk_size` and `workers` of `core.spectrum.spectrum`.
+
+        Returns:
+            Dict[str, np.ndarray]: The counts per binning name.
+        """
+
+        binnings = [Binning.model_validate(b) for b in binnings]
+        momentum = [self.momentum(specie, component=c) for c in "xyz"]
+        key_ = ParticleData.get("weight").value
+        weights = None
+
+        if weighted and specie in self.structure.get(key_, set()):
+            weights = self.weight(specie)
+
+        return spectrum(momentum, binnings, weights=weights, mass=mass, **kwargs)
 
-            return np.sqrt(yv**2 + zv**2) * np.sign(dot)
+    # ....................... #
 
-        elif component is Component.r3d:
-            xv = func(component=Component.x, specie=specie)
-            yv = func(component=Component.y, specie=specie)
-            zv = func(component=Component.z, specie=specie)
+    def gather(
+        self,
+        specie: str,
+        quantities: Sequence[str] = FIELD_COMPONENTS,
+        method: GatherMethod = "cic",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Interpolate grid quantities at the positions of a specie, e.g. E and
+        B for the work done on the particles, with NGP, linear or CIC weights
+        (see `epoch_toolkit.core.transform.gather`). The weights of a chunk
+        of particles are computed once for all quantities.
+
+        Args:
+            specie (str): The particle specie.
+            quantities (Sequence[str]): Raw or derived grid quantities, the
+                components of E and B by default.
+            method (str): `ngp`, `linear` or `cic`.
+            chunk_size (int): Particles per chunk, at most.
+
+        Returns:
+            Dict[str, np.ndarray]: The values per quantity and particle.
+        """
+
+        fields = self.evaluator().evaluate(*quantities)
+        fields = {name: fields[name] for name in quantities}
+        gather = Gather(self.grid, method=method, chunk_size=chunk_size)
+
+        return gather(self.coordinates(specie), fields)
 
-            xyz = coordinate_func(specie)
-            dot = xv * xyz[0] + yv * xyz[1] + zv * xyz[2]
+    # ....................... #
 
-            return np.sqrt(xv**2 + yv**2 + zv**2) * np.sign(dot)
+    def mask(self, spec: Union[str, MaskSpec], specie: Optional[str] = None) -> Mask:
+        """
+        Build a compact mask of the loaded dump, e.g. `mask("density > 1e25")`
+        or `mask(MaskSpec(target="particles", specie="electron", ids=[...]))`.
 
-        elif component is Component.phi:
-            yv = func(component=Component.y, specie=specie)
-            zv = func(component=Component.z, specie=specie)
+        Masks are cached by their spec until the next `read`, so extractions
+        of several components with the same mask build it only once.
+        """
+
+        if isinstance(spec, str):
+            spec = MaskSpec(quantity=spec, specie=specie)
+
+        key = spec.key
+
+        if key not in self._masks:
+            self._masks[key] = self._build_mask(spec)
+
+        return self._masks[key]
+
+    # ....................... #
 
-            return np.arctan2(zv, yv)
+    def _build_mask(self, spec: MaskSpec) -> Mask:
+        particles = spec.target == "particles"
+
+        if particles:
+            assert spec.specie is not None, "Particle masks require a specie"
+            coordinates = self.coordinates(spec.specie)
+            shape = tuple(np.shape(coordinates[0]))
 
         else:
-            xv = func(component=Component.x, specie=specie)
-            yv = func(component=Component.y, specie=specie)
-            zv = func(component=Component.z, specie=specie)
+            shape = tuple(a.size for a in self.grid.axes)
+
+        parts = []
+
+        if spec.quantity is not None:
+            values = self.expression(spec.quantity, specie=spec.specie)
+            values = np.broadcast_to(values, shape)
+            parts.append(Mask.threshold(values, min=spec.min, max=spec.max))
+
+        if spec.crops:
+            parts.append(
+                Mask.particles(coordinates, spec.crops)
+                if particles
+                else Mask.box(self.grid, spec.crops, shape=shape)
+            )
+
+        if particles and spec.ids is not None:
+            parts.append(Mask.select_ids(self.ids(spec.specie), spec.ids))
 
-            return np.arccos(zv / np.sqrt(xv**2 + yv**2 + zv**2))
+        if particles and spec.fraction is not None:
+            parts.append(Mask.sample(shape[0], spec.fraction, seed=spec.seed))
+
+        parts += [self.mask(child) for child in spec.all]
+
+        if spec.any:
+            alternatives = [self.mask(child) for child in spec.any]
+            parts.append(reduce(lambda a, b: a | b, alternatives))
+
+        if not parts:
+            parts.append(Mask(shape, ranges=np.array([[0, int(np.prod(shape))]])))
+
+        mask = reduce(lambda a, b: a & b, parts)
+
+        return ~mask if spec.invert else mask
 
     # ....................... #
 
@@ -375,9 +647,7 @@ class FileHandler(LogMixin):
             component = Component.get(component)
 
         if component not in [Component.x, Component.y, Component.z]:
-            return self._non_cartesian_particle(
-                self.momentum, self.coordinates, component, specie=specie
-            )
+            return self.derived(f"momentum.{component.value}", specie=specie)
 
         else:
             component = component.value
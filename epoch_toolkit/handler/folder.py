@@ -1,27 +1,189 @@
-import os  # noqa: F401
-from typing import Union
+import hashlib
+import json
+import os
+import re
+import tempfile
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-import sdf_helper as sdfh
+import numpy as np
 
 from epoch_toolkit.core import (
+    Component,
+    GridData,
     Unit,
 )
+from epoch_toolkit.core.const import ELECTRON_MASS
+from epoch_toolkit.core.spectrum import Binning
+from epoch_toolkit.core.stats import RunningStats
+from epoch_toolkit.core.temporal import (
+    DEFAULT_CHUNK_ELEMENTS,
+    SlidingWindow,
+    TemporalOp,
+)
+from epoch_toolkit.utils.memory import BUDGET
+from epoch_toolkit.utils.parallel import parallel_map
+
+from .archive import (
+    ARCHIVE_SUFFIX,
+    SUMMARY_NAME,
+    ArchiveSpec,
+    merge_errors,
+    open_dump,
+    write_archive,
+)
+from .file import FileHandler, read_scalars
+from .index import RunIndex, index_dump
+from .track import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_QUANTITIES,
+    Trajectories,
+    parse_quantity,
+    track_dump,
+)
+
+if TYPE_CHECKING:
+    from .extract import Extraction
+
+# ----------------------- #
+
+METADATA_DIR = ".epoch_toolkit"
+
+_dump_number = re.compile(r"(\d+)$")
+
+# ----------------------- #
+
+
+def dump_key(path: str) -> Tuple[str, int]:
+    """Sort key of a dump file: its prefix and its (integer) dump number."""
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = _dump_number.search(stem)
+
+    if match is None:
+        return stem, -1
+
+    return stem[: match.start()], int(match.group(1))
+
+
+# ----------------------- #
+
+
+def list_dumps(folder: str, prefix: Optional[str] = None) -> List[str]:
+    """List the `.sdf` dumps (or archives) of a run folder by dump number."""
+
+    file_list = os.listdir(folder)
+    file_list = list(filter(lambda x: x.endswith((".sdf", ARCHIVE_SUFFIX)), file_list))
+
+    if prefix is not None:
+        file_list = list(filter(lambda x: x.startswith(prefix), file_list))
+
+    file_list = list(map(lambda x: os.path.join(folder, x), file_list))
+
+    return sorted(file_list, key=dump_key)
+
+
+# ----------------------- #
+
+
+def _dump_stats(path: str, extraction: "Extraction", alpha: float) -> Dict[str, Any]:
+    from .extract import extract
+
+    handler = FileHandler(log_level="warning")
+    handler.read(path)
+
+    stats = RunningStats(alpha=alpha)
+
+    for arr in extract(handler, extraction).values():
+        stats.update(arr)
+
+    return stats.to_dict()
+
+
+# ....................... #
+
+
+def _dump_spectrum(
+    path: str, specie: str, binnings: List[Binning], mass: float, weighted: bool
+) -> Dict[str, Any]:
+    handler = FileHandler(log_level="warning")
+    handler.read(path)
+
+    counts = handler.spectrum(specie, binnings, mass=mass, weighted=weighted)
+
+    return dict(
+        time=float(handler.header["time"]),
+        counts={k: v.tolist() for k, v in counts.items()},
+    )
+
+
+# ....................... #
+
+
+def _archive_dump(
+    path: str,
+    out_dirs: Dict[str, str],
+    spec: ArchiveSpec,
+    overwrite: bool,
+) -> Optional[Dict[str, Any]]:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(out_dirs[os.path.dirname(path)], f"{stem}{ARCHIVE_SUFFIX}")
+
+    if os.path.exists(target) and not overwrite:
+        return None
+
+    return write_archive(path, target, spec)
+
+
+# ....................... #
+
+
+def _block_name(quantity: str, specie: Optional[str] = None) -> str:
+    """The block of a raw grid quantity such as `electric_field.x`."""
+
+    name, _, component = quantity.partition(".")
+    block = GridData.get(name).value
+
+    if component:
+        block += Component.get(component).value
+
+    return block if specie is None else f"{block}_{specie}"
 
-from .file import FileHandler
 
 # ----------------------- #
 
 
 class FolderHandler(FileHandler):
+    folder: str = None
+    folders: List[str] = list()
+    files: List[str] = list()
+    _index: Optional[RunIndex] = None
+
+    # ....................... #
+
     def __init__(
         self,
-        unit: Union[str, Unit] = None,
+        grid_unit: Optional[Union[str, Unit]] = None,
+        time_unit: Optional[Union[str, Unit]] = None,
         verbose: bool = False,
         log_level: str = "info",
         logger_name: str = "Folder Handler",
     ):
         super().__init__(
-            unit=unit,
+            grid_unit=grid_unit,
+            time_unit=time_unit,
             verbose=verbose,
             log_level=log_level,
             logger_name=logger_name,
@@ -29,10 +191,557 @@ class FolderHandler(FileHandler):
 
     # ....................... #
 
-    def read(self, folder: str):
-        file_list = os.listdir(folder)
-        file_list = list(filter(lambda x: x.endswith(".sdf"), file_list))
-        file_list = list(map(lambda x: os.path.join(folder, x), file_list))
+    def __len__(self) -> int:
+        return len(self.files)
+
+    # ....................... #
+
+    def read(
+        self,
+        folder: Union[str, Sequence[str]],
+        prefix: Optional[str] = None,
+        stitch: Optional[bool] = None,
+        workers: Optional[int] = None,
+    ):
+        """
+        Index the dumps of a run, optionally stitched from several folders.
+
+        Restarted runs often continue in new folders, with dump numbers that
+        overlap the earlier ones. With `stitch` (the default for several
+        folders) the dumps are grouped into segments by folder and job ID,
+        every segment supersedes the dumps of earlier segments from its first
+        step on (so dumps written before a crash and recomputed after the
+        restart are used once), and the result is ordered by step and time.
+        Headers are read through the cached `index`.
+
+        Args:
+            folder (str | Sequence[str]): The run folder(s), in restart order.
+            prefix (str, optional): Only use dumps with this file prefix.
+            stitch (bool, optional): Deduplicate across restarts.
+            workers (int, optional): Number of worker processes for indexing.
+        """
+
+        folders = [folder] if isinstance(folder, str) else list(folder)
+        folders = [os.path.normpath(d) for d in folders]
+        stitch = len(folders) > 1 if stitch is None else stitch
+
+        self.info(f"Indexing folders: {', '.join(folders)}")
+        self.folder = folders[0]
+        self.folders = folders
+        self.files = [f for d in folders for f in list_dumps(d, prefix=prefix)]
+        self._index = None
+
+        if stitch:
+            total = len(self.files)
+            self._index = self.index(workers=workers).stitch(folders)
+            self.files = self._index.files
+            self.info(f"Dropped {total - len(self.files)} superseded dumps")
+
+        self.info(f"Found {len(self.files)} dumps")
+
+    # ....................... #
+
+    def load(self, idx: int):
+        """Load a single dump so that the `FileHandler` accessors refer to it."""
+
+        super().read(self.files[idx])
+
+    # ....................... #
+
+    def iterate(
+        self, indices: Optional[Iterable[int]] = None
+    ) -> Iterator["FolderHandler"]:
+        """Load the dumps one after another, yielding the handler for each."""
+
+        indices = range(len(self.files)) if indices is None else indices
+
+        for idx in indices:
+            self.load(idx)
+            yield self
+
+    # ....................... #
+
+    def _cache_path(self, name: str, folder: Optional[str] = None) -> str:
+        return os.path.join(folder or self.folder, METADATA_DIR, f"{name}.json")
+
+    # ....................... #
+
+    def load_cache(self, name: str, folder: Optional[str] = None) -> Dict[str, Any]:
+        """Load a named cache from the metadata folder of a run folder."""
+
+        path = self._cache_path(name, folder)
+
+        if not os.path.exists(path):
+            return dict()
+
+        with open(path, "r") as f:
+            return json.load(f)
+
+    # ....................... #
+
+    def save_cache(self, name: str, data: Dict[str, Any], folder: Optional[str] = None):
+        """Store a named cache in the metadata folder of a run folder."""
+
+        path = self._cache_path(name, folder)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(data, f)
+
+            os.replace(f"{path}.tmp", path)
+
+        except OSError as e:
+            self.warning(f"Cannot write cache `{name}`: {e}")
+
+    # ....................... #
+
+    def cached_map(
+        self,
+        name: str,
+        key: str,
+        func: Callable[[str], Any],
+        workers: Optional[int] = None,
+        cache: bool = True,
+        files: Optional[Sequence[str]] = None,
+        item_bytes: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Apply a per-dump function over all dumps in parallel, caching results.
+
+        Results must be JSON serialisable. They are stored per dump (with the
+        file modification time) under `key` in the named cache of the dump's
+        folder, so only new or modified dumps are processed again, also when
+        the folder is part of several stitched runs.
+
+        Args:
+            name (str): The cache name, e.g. `stats`.
+            key (str): Identifies the computation within the cache.
+            func (Callable): A picklable function of the dump path.
+            workers (int, optional): Number of worker processes.
+            cache (bool): Read and update the cache.
+            files (Sequence[str], optional): The dumps, `files` by default.
+            item_bytes (int, optional): Memory `func` needs per dump, to fit
+                the workers into the memory budget.
+
+        Returns:
+            List[Any]: The results in dump order.
+        """
+
+        files = self.files if files is None else files
+        folders = list(dict.fromkeys(os.path.dirname(f) for f in files))
+        stores = {d: self.load_cache(name, d) if cache else dict() for d in folders}
+        entries = {d: stores[d].get(key, dict()) for d in folders}
+
+        def _entry(path: str) -> Optional[Dict[str, Any]]:
+            return entries[os.path.dirname(path)].get(os.path.basename(path))
+
+        def _stale(path: str) -> bool:
+            entry = _entry(path)
+            return entry is None or entry["mtime"] != os.path.getmtime(path)
+
+        todo = [f for f in files if _stale(f)]
+
+        if todo:
+            self.info(f"Processing {len(todo)} of {len(files)} dumps")
+
+        results = parallel_map(func, todo, workers=workers, item_bytes=item_bytes)
+
+        for path, result in zip(todo, results):
+            entries[os.path.dirname(path)][os.path.basename(path)] = dict(
+                mtime=os.path.getmtime(path), result=result
+            )
+
+        for folder in set(os.path.dirname(f) for f in todo) if cache else []:
+            stores[folder][key] = entries[folder]
+            self.save_cache(name, stores[folder], folder)
+
+        return [_entry(f)["result"] for f in files]
+
+    # ....................... #
+
+    def dump_bytes(self) -> int:
+        """
+        Size of the largest dump on disk, the memory a worker processing a
+        whole dump may need at most.
+        """
+
+        return max((os.path.getsize(f) for f in self.files), default=0)
+
+    # ....................... #
+
+    def index(self, workers: Optional[int] = None, cache: bool = True) -> RunIndex:
+        """
+        Times, steps, job IDs, grids and block structure of all dumps.
+
+        Only headers and grids are read (see `index_dump`), in parallel, and
+        the rows are cached per dump in the run's metadata. The result is kept
+        on the handler as column arrays rather than one model per dump.
+
+        Returns:
+            RunIndex: The index in dump order.
+        """
+
+        if self._index is None or self._index.files != self.files:
+            rows = self.cached_map(
+                "index", "dumps", index_dump, workers=workers, cache=cache
+            )
+            self._index = RunIndex.from_rows(self.files, rows)
+
+        return self._index
+
+    # ....................... #
+
+    def archive(
+        self,
+        out_dir: str,
+        spec: Optional[Union[ArchiveSpec, Dict[str, Any]]] = None,
+        workers: Optional[int] = None,
+        overwrite: bool = False,
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Write a decimated, quantised archive of every dump (see `ArchiveSpec`).
+
+        The archives (`<dump>.sdfz`) are read by `FileHandler.read` and listed
+        by `FolderHandler.read` like the original dumps. The spec and the
+        worst errors over all dumps are stored in `archive.json`. Dumps of a
+        run stitched from several folders are archived into one subfolder per
+        run folder (`<k>_<name>`), to be stitched again when read.
+
+        Args:
+            out_dir (str): The output folder.
+            spec (ArchiveSpec | dict, optional): What to keep and how, all
+                grid quantities as `int16` by default.
+            workers (int, optional): Number of worker processes.
+            overwrite (bool): Replace existing archives.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Per block the maximal absolute error
+                `abs` and the same relative to the largest magnitude `rel`
+                of the dumps written now.
+        """
+
+        spec = ArchiveSpec.model_validate(spec or dict())
+        out_dirs = {os.path.dirname(f): out_dir for f in self.files}
+
+        if len(self.folders) > 1:
+            out_dirs = {
+                d: os.path.join(
+                    out_dir, f"{k:02d}_{os.path.basename(os.path.abspath(d))}"
+                )
+                for k, d in enumerate(self.folders)
+            }
+
+        for d in set(out_dirs.values()):
+            os.makedirs(d, exist_ok=True)
+
+        func = partial(_archive_dump, out_dirs=out_dirs, spec=spec, overwrite=overwrite)
+        results = parallel_map(
+            func, self.files, workers=workers, item_bytes=self.dump_bytes()
+        )
+        results = [r for r in results if r]
+        errors = merge_errors(results)
+
+        self.info(f"Archived {len(results)} of {len(self.files)} dumps")
+
+        with open(os.path.join(out_dir, SUMMARY_NAME), "w") as f:
+            json.dump(dict(spec=spec.model_dump(), errors=errors), f, indent=2)
+
+        return errors
+
+    # ....................... #
+
+    def stats(
+        self,
+        extraction: Union["Extraction", Dict[str, Any]],
+        workers: Optional[int] = None,
+        alpha: float = 0.01,
+        cache: bool = True,
+    ) -> RunningStats:
+        """
+        Global statistics of a quantity over all dumps of the run.
+
+        Every dump is reduced block by block into mergeable `RunningStats`
+        (moments, extrema and a relative-error quantile sketch) in parallel;
+        the per-dump results are cached in the run's metadata and merged.
+
+        Args:
+            extraction (Extraction | dict): The quantity, with optional crops
+                and projection, e.g. `{"name": "ex", "quantity":
+                "electric_field", "component": "x"}`.
+            workers (int, optional): Number of worker processes.
+            alpha (float): Relative accuracy of the quantiles.
+            cache (bool): Use the cached per-dump statistics.
+
+        Returns:
+            RunningStats: The merged statistics.
+        """
+
+        from .extract import Extraction
+
+        extraction = Extraction.model_validate(extraction)
+        key = f"{extraction.model_dump_json()}|{alpha}"
+        key = hashlib.sha1(key.encode()).hexdigest()
+
+        func = partial(_dump_stats, extraction=extraction, alpha=alpha)
+        total = RunningStats(alpha=alpha)
+
+        results = self.cached_map(
+            "stats",
+            key,
+            func,
+            workers=workers,
+            cache=cache,
+            item_bytes=self.dump_bytes(),
+        )
+
+        for result in results:
+            total.merge(RunningStats.from_dict(result))
+
+        return total
+
+    # ....................... #
+
+    def spectra(
+        self,
+        specie: str,
+        binnings: Sequence[Union[Binning, Dict[str, Any]]],
+        mass: float = ELECTRON_MASS,
+        weighted: bool = True,
+        workers: Optional[int] = None,
+        cache: bool = True,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Particle spectra of every dump (see `FileHandler.spectrum`).
+
+        Dumps are processed in parallel and the histograms are cached per
+        dump for the given specie, mass and binnings.
+
+        Returns:
+            Dict[str, np.ndarray]: `time`, per binning name the `(dump, bin)`
+                counts and its `<name>_edges`, ordered by time.
+        """
+
+        binnings = [Binning.model_validate(b) for b in binnings]
+        key = json.dumps(
+            [specie, mass, weighted, [b.model_dump(mode="json") for b in binnings]]
+        )
+        key = hashlib.sha1(key.encode()).hexdigest()
+
+        func = partial(
+            _dump_spectrum,
+            specie=specie,
+            binnings=binnings,
+            mass=mass,
+            weighted=weighted,
+        )
+        rows = self.cached_map(
+            "spectra",
+            key,
+            func,
+            workers=workers,
+            cache=cache,
+            item_bytes=self.dump_bytes(),
+        )
+        order = np.argsort([row["time"] for row in rows], kind="stable")
+        table = dict(time=np.array([rows[i]["time"] for i in order]))
+
+        for b in binnings:
+            counts = [rows[i]["counts"][b.name] for i in order]
+            table[b.name] = np.array(counts).reshape(len(rows), b.bins)
+            table[f"{b.name}_edges"] = b.edges()
+
+        return table
+
+    # ....................... #
+
+    def scalars(
+        self, workers: Optional[int] = None, cache: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        Scalar diagnostics of all dumps as one columnar table.
+
+        Only the header and the `ScalarData` blocks are read (see
+        `read_scalars`), in parallel, and the rows are cached per dump in the
+        run's metadata, so energy-balance series of long runs are cheap.
+
+        Returns:
+            Dict[str, np.ndarray]: Columns `dump`, `time`, `step` and one per
+                `ScalarData` member, ordered by time.
+        """
+
+        rows = self.cached_map(
+            "scalars", "scalars", read_scalars, workers=workers, cache=cache
+        )
+        table = {"dump": np.arange(len(rows))}
+
+        for key in rows[0].keys() if rows else ["time", "step"]:
+            table[key] = np.array([row[key] for row in rows])
+
+        order = np.argsort(table["time"], kind="stable")
+
+        return {k: v[order] for k, v in table.items()}
+
+    # ....................... #
+
+    def track(
+        self,
+        specie: str,
+        ids: Sequence[int],
+        quantities: Sequence[str] = DEFAULT_QUANTITIES,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        dtype: str = "float64",
+        cache: bool = True,
+    ) -> Trajectories:
+        """
+        Trajectories of selected particles across all dumps, joined by ID.
+
+        Every dump is sorted by particle ID once (the permutation is cached in
+        the run's metadata) and the selected IDs are located with
+        `searchsorted` in chunks, so the join costs O((N + P) log N) per dump
+        instead of O(N P). Dumps are streamed through worker processes.
+
+        Args:
+            specie (str): The particle specie (requires IDs in the output).
+            ids (Sequence[int]): The particle IDs to track.
+            quantities (Sequence[str]): `coordinates.<x|y|z>` or
+                `momentum.<c>` with any `Component`, e.g. `momentum.theta`.
+            workers (int, optional): Number of worker processes.
+            chunk_size (int): Number of selected IDs joined at once.
+            dtype (str): The dtype of the gathered values.
+            cache (bool): Store and reuse the per-dump ID permutations.
+
+        Returns:
+            Trajectories: `data[particle, time, quantity]`, NaN where a
+                particle is absent from a dump.
+        """
+
+        selected = np.unique(np.asarray(ids))
+        quantities = list(quantities)
+
+        for quantity in quantities:
+            parse_quantity(quantity)
+
+        index_dir = os.path.join(METADATA_DIR, "ids") if cache else None
+
+        func = partial(
+            track_dump,
+            specie=specie,
+            selected=selected,
+            quantities=quantities,
+            index_dir=index_dir,
+            chunk_size=chunk_size,
+            dtype=dtype,
+        )
+        results = list(
+            parallel_map(
+                func, self.files, workers=workers, item_bytes=self.dump_bytes()
+            )
+        )
+
+        time = np.array([t for t, _ in results])
+        data = np.stack([d for _, d in results], axis=1) if results else None
+        order = np.argsort(time, kind="stable")
+
+        if data is None:
+            data = np.empty((selected.size, 0, len(quantities)), dtype=dtype)
+
+        return Trajectories(
+            ids=selected, time=time[order], quantities=quantities, data=data[:, order]
+        )
+
+    # ....................... #
+
+    def temporal(
+        self,
+        quantity: str,
+        op: Union[TemporalOp, Dict[str, Any]],
+        specie: Optional[str] = None,
+        out: Optional[str] = None,
+        chunk_elements: int = DEFAULT_CHUNK_ELEMENTS,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Sliding-window operator over the dumps of the run, e.g. `dB/dt`
+        with `temporal("magnetic_field.z", {"operation": "derivative"})` or
+        growth rates with `{"operation": "growth_rate", "window": 5}`.
+
+        The run is processed in x-chunks: for every chunk the dumps are
+        streamed in time order, reading only that slab of the (memory-mapped)
+        block, so memory holds one window of chunks rather than full cubes.
+        The values (one cube per window) are written to a memory-mapped
+        file, never held in memory: `out` if given, otherwise an anonymous
+        temporary file (in `tempfile.gettempdir()`, i.e. `$TMPDIR`) that is
+        deleted as soon as the returned array is garbage collected.
+
+        Args:
+            quantity (str): A raw grid quantity, `<quantity>.<component>` for
+                vectors, e.g. `electric_field.x` or `density`.
+            op (TemporalOp | dict): The operation and window.
+            specie (str, optional): The specie of per-specie quantities.
+            out (str, optional): The `.npy` file of the values, to keep them.
+            chunk_elements (int): Values per chunk, at most; less when the
+                memory budget is short.
+
+        Returns:
+            Dict[str, np.ndarray]: `time` (the mean of every window), `dump`
+                (the first dump of every window, in time order) and `value`
+                shaped `(window, *grid)`, memory-mapped.
+        """
+
+        op = TemporalOp.model_validate(op)
+        block = _block_name(quantity, specie=specie)
+
+        index = self.index()
+        order = np.argsort(index.time, kind="stable")
+        files = [self.files[i] for i in order]
+        count = op.count(len(files))
+
+        if count < 1:
+            raise ValueError(f"{len(files)} dumps are too few for {op}")
+
+        first = open_dump(files[0])
+
+        if not hasattr(first, block):
+            raise ValueError(f"Key not found: {block}")
+
+        shape = np.shape(getattr(first, block).data)
+        row = int(np.prod(shape[1:]))
+
+        # one window of chunks, its stacked copy and the result
+        per_element = 8 * (2 * op.window + 1)
+        rows = max(1, BUDGET.chunk_elements(chunk_elements, per_element) // row)
+
+        if out is None:
+            # the mapping outlives the (already unlinked) file
+            with tempfile.TemporaryFile() as f:
+                value = np.memmap(
+                    f, dtype=np.float64, mode="w+", shape=(count,) + shape
+                )
+
+        else:
+            value = np.lib.format.open_memmap(
+                out, mode="w+", dtype=np.float64, shape=(count,) + shape
+            )
+
+        time = np.empty(count)
+
+        for start in range(0, shape[0], rows):
+            sl = slice(start, min(start + rows, shape[0]))
+            window = SlidingWindow(op)
+            k = 0
+
+            for i, path in enumerate(files):
+                chunk = np.asarray(getattr(open_dump(path), block).data[sl])
+                result = window.push(chunk, index.time[order[i]])
+
+                if result is not None:
+                    time[k], value[k, sl] = result
+                    k += 1
+
+        value.flush()
+
+        dump = np.arange(count) * op.stride
 
-        for f in file_list:
-            print(f, sdfh.get_job_id(f))
+        return dict(time=time, dump=order[dump], value=value)
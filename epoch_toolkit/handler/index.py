@@ -0,0 +1,313 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from epoch_toolkit.core import Grid
+
+from .archive import open_dump
+
+# ----------------------- #
+
+MAX_DIM = 3
+
+# one row per dump; unused axes of lower-dimensional runs are zero
+DUMP_DTYPE = np.dtype(
+    [
+        ("time", np.float64),
+        ("step", np.int64),
+        ("job", "U32"),
+        ("dim", np.int8),
+        ("size", np.int64, (MAX_DIM,)),
+        ("min", np.float64, (MAX_DIM,)),
+        ("max", np.float64, (MAX_DIM,)),
+    ]
+)
+
+# ----------------------- #
+
+
+def job_id(data: Any) -> str:
+    """
+    The job ID of a dump, shared by all dumps written by one run (restart):
+    the header `jobid1.jobid2` (as reported by `sdf_helper.get_job_id`),
+    else the `job_id` of the run info, else empty.
+    """
+
+    header = dict(data.Header)
+
+    if "jobid1" in header:
+        return f"{header['jobid1']}.{header.get('jobid2', 0)}"
+
+    return str(dict(getattr(data, "Run_info", dict())).get("job_id", ""))
+
+
+# ....................... #
+
+
+def index_dump(path: str) -> Dict[str, Any]:
+    """
+    Read the metadata of a dump: time, step, job ID, grid and the names of
+    its blocks.
+
+    The dump (or archive) is opened lazily and only the header and the
+    cell-centre grid are touched, so indexing a run never reads field or particle data.
+    """
+
+    data = open_dump(path)
+    grid_mid = data.Grid_Grid_mid.data
+    exclude = {"Header", "Run_info"}
+
+    return dict(
+        time=float(data.Header["time"]),
+        step=int(data.Header["step"]),
+        job=job_id(data),
+        size=[int(g.size) for g in grid_mid],
+        min=[float(g[0]) for g in grid_mid],
+        max=[float(g[-1]) for g in grid_mid],
+        blocks=sorted(k for k in data.__dict__.keys() if k not in exclude),
+    )
+
+
+# ----------------------- #
+
+
+@lru_cache(maxsize=64)
+def _grid(mins: Tuple[float, ...], maxs: Tuple[float, ...], sizes: Tuple[int, ...]):
+    # runs rarely change their grid, so dumps share one `Grid` instance
+    return Grid.from_arrays(mins, maxs, sizes)
+
+
+# ----------------------- #
+
+
+class DumpInfo:
+    """A lightweight view of one row of a `RunIndex`."""
+
+    __slots__ = ("index", "row")
+
+    # ....................... #
+
+    def __init__(self, index: "RunIndex", row: int):
+        self.index = index
+        self.row = row
+
+    # ....................... #
+
+    @property
+    def path(self) -> str:
+        return self.index.files[self.row]
+
+    # ....................... #
+
+    @property
+    def time(self) -> float:
+        return float(self.index.table["time"][self.row])
+
+    # ....................... #
+
+    @property
+    def step(self) -> int:
+        return int(self.index.table["step"][self.row])
+
+    # ....................... #
+
+    @property
+    def job(self) -> str:
+        return str(self.index.table["job"][self.row])
+
+    # ....................... #
+
+    @property
+    def grid(self) -> Grid:
+        return self.index.grid(self.row)
+
+    # ....................... #
+
+    @property
+    def blocks(self) -> List[str]:
+        return [b for b, p in zip(self.index.blocks, self.index.present[self.row]) if p]
+
+
+# ----------------------- #
+
+
+class RunIndex:
+    """
+    Metadata of all dumps of a run stored column-wise in NumPy arrays.
+
+    Times, steps and grids live in a structured array of `DUMP_DTYPE` and
+    the block structure in a boolean `(dump, block)` matrix, so an index of
+    thousands of dumps costs a few arrays instead of one model per dump.
+    `Grid` models are only built on request and shared between dumps with
+    the same grid.
+    """
+
+    __slots__ = ("files", "table", "blocks", "present")
+
+    # ....................... #
+
+    def __init__(
+        self,
+        files: Sequence[str],
+        table: np.ndarray,
+        blocks: Sequence[str],
+        present: np.ndarray,
+    ):
+        self.files = list(files)
+        self.table = table
+        self.blocks = list(blocks)
+        self.present = present
+
+    # ....................... #
+
+    @classmethod
+    def from_rows(
+        cls, files: Sequence[str], rows: Sequence[Dict[str, Any]]
+    ) -> "RunIndex":
+        """Pack the results of `index_dump` into columns."""
+
+        table = np.zeros(len(rows), dtype=DUMP_DTYPE)
+        blocks = sorted(set(b for row in rows for b in row["blocks"]))
+        lookup = {b: k for k, b in enumerate(blocks)}
+        present = np.zeros((len(rows), len(blocks)), dtype=bool)
+
+        for i, row in enumerate(rows):
+            dim = len(row["size"])
+            table[i]["time"] = row["time"]
+            table[i]["step"] = row["step"]
+            table[i]["job"] = row["job"]
+            table[i]["dim"] = dim
+
+            for key in ("size", "min", "max"):
+                table[i][key][:dim] = row[key]
+
+            present[i, [lookup[b] for b in row["blocks"]]] = True
+
+        return cls(files, table, blocks, present)
+
+    # ....................... #
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    # ....................... #
+
+    def __getitem__(self, idx: int) -> DumpInfo:
+        return DumpInfo(self, range(len(self))[idx])
+
+    # ....................... #
+
+    def __iter__(self) -> Iterator[DumpInfo]:
+        return (DumpInfo(self, i) for i in range(len(self)))
+
+    # ....................... #
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.table["time"]
+
+    # ....................... #
+
+    @property
+    def step(self) -> np.ndarray:
+        return self.table["step"]
+
+    # ....................... #
+
+    def grid(self, idx: int) -> Grid:
+        dim = int(self.table["dim"][idx])
+        columns = [
+            tuple(self.table[c][idx, :dim].tolist()) for c in ("min", "max", "size")
+        ]
+
+        return _grid(*columns)
+
+    # ....................... #
+
+    @property
+    def uniform_grid(self) -> bool:
+        """Whether all dumps share the same grid."""
+
+        if len(self) == 0:
+            return True
+
+        columns = ("dim", "size", "min", "max")
+
+        return all(np.all(self.table[c] == self.table[c][0]) for c in columns)
+
+    # ....................... #
+
+    def has(self, block: str) -> np.ndarray:
+        """Which dumps contain a block, e.g. `Derived_Number_Density_electron`."""
+
+        if block not in self.blocks:
+            return np.zeros(len(self), dtype=bool)
+
+        return self.present[:, self.blocks.index(block)]
+
+    # ....................... #
+
+    def select(self, mask: np.ndarray) -> "RunIndex":
+        """The sub-index of the dumps selected by a boolean mask or indices."""
+
+        rows = np.arange(len(self))[mask]
+
+        return RunIndex(
+            [self.files[i] for i in rows],
+            self.table[rows],
+            self.blocks,
+            self.present[rows],
+        )
+
+    # ....................... #
+
+    def stitch(self, folders: Optional[Sequence[str]] = None) -> "RunIndex":
+        """
+        A deduplicated, time-ordered index of a run restarted across folders.
+
+        Dumps are grouped into segments by folder and job ID; segments are
+        ordered by their first step (ties by the order of `folders`, then by
+        job ID) and every segment replaces the dumps of earlier segments from
+        its first step on.
+
+        Args:
+            folders (Sequence[str], optional): The folders in restart order,
+                by default in order of appearance.
+        """
+
+        dirs = [os.path.dirname(f) for f in self.files]
+        folders = list(dict.fromkeys(dirs if folders is None else folders))
+        position = {os.path.normpath(d): k for k, d in enumerate(folders)}
+        segments: Dict[Tuple[str, str], List[int]] = dict()
+
+        for i, (folder, job) in enumerate(zip(dirs, self.table["job"])):
+            segments.setdefault((folder, str(job)), []).append(i)
+
+        def _order(key: Tuple[str, str]) -> Tuple[int, int, str]:
+            first = int(self.step[segments[key]].min())
+
+            return first, position.get(os.path.normpath(key[0]), len(folders)), key[1]
+
+        kept = np.zeros(len(self), dtype=bool)
+
+        for key in sorted(segments, key=_order):
+            rows = segments[key]
+            kept[kept & (self.step >= self.step[rows].min())] = False
+            kept[rows] = True
+
+        rows = np.flatnonzero(kept)
+        order = np.lexsort((self.time[rows], self.step[rows]))
+
+        return self.select(rows[order])
+
+    # ....................... #
+
+    def nearest(self, time: float) -> Optional[DumpInfo]:
+        """The dump closest in time (SI units)."""
+
+        if len(self) == 0:
+            return None
+
+        return self[int(np.argmin(np.abs(self.time - time)))]
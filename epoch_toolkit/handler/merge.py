@@ -0,0 +1,158 @@
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .extract import ExtractionPlan, output_path, save_result
+from .writer import is_batch, read_batch
+
+# ----------------------- #
+
+MERGED_NAME = "merged.npz"
+
+_part = re.compile(r"^(?P<stem>.+)\.part(?P<part>\d+)\.npz$")
+
+# ----------------------- #
+
+
+def _load(result: Union[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return dict(np.load(result)) if isinstance(result, str) else result
+
+
+# ----------------------- #
+
+
+def merge_parts(
+    parts: List[Union[str, Dict[str, np.ndarray]]], plan: ExtractionPlan
+) -> Dict[str, np.ndarray]:
+    """
+    Combine the x-slab partial results (files or loaded) of a single dump.
+
+    Histograms are summed and reductions along x combined (see
+    `Reduction.combine_slabs`), everything else is concatenated along x
+    (grid data) or the particle axis.
+    """
+
+    loaded = [_load(p) for p in parts]
+    loaded = sorted(loaded, key=lambda d: int(d["slab"][0]))
+
+    stops = [int(d["slab"][0]) for d in loaded[1:]] + [int(loaded[-1]["slab"][2])]
+
+    if int(loaded[0]["slab"][0]) != 0 or any(
+        int(d["slab"][1]) != s for d, s in zip(loaded, stops)
+    ):
+        raise ValueError(f"Incomplete set of slabs: {[d['slab'] for d in loaded]}")
+
+    result = dict(time=loaded[0]["time"], step=loaded[0]["step"])
+
+    for extraction in plan.extractions:
+        name = extraction.name
+        arrays = [d[name] for d in loaded]
+
+        if extraction.histogram is not None:
+            result[name] = np.sum(arrays, axis=0)
+            result[f"{name}_edges"] = loaded[0][f"{name}_edges"]
+
+        elif extraction.projection is not None:
+            result[name] = extraction.projection.combine_slabs(arrays)
+
+        else:
+            result[name] = np.concatenate(arrays, axis=0)
+
+    return result
+
+
+# ----------------------- #
+
+
+def stack_series(results: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Stack per-dump results into time series ordered by dump time.
+
+    Arrays of equal shape are stacked along a new leading time axis; ragged
+    arrays (e.g. raw particle data) are concatenated and accompanied by an
+    `<name>_offsets` array of length `len(results) + 1`.
+    """
+
+    results = sorted(results, key=lambda d: float(d["time"]))
+    series = dict()
+
+    for key in results[0].keys():
+        arrays = [np.asarray(d[key]) for d in results]
+
+        if len({a.shape for a in arrays}) == 1:
+            series[key] = np.stack(arrays, axis=0)
+
+        else:
+            sizes = [a.shape[0] if a.ndim else 1 for a in arrays]
+            series[key] = np.concatenate([np.atleast_1d(a) for a in arrays], axis=0)
+            series[f"{key}_offsets"] = np.concatenate([[0], np.cumsum(sizes)])
+
+    return series
+
+
+# ----------------------- #
+
+
+def merge_outputs(
+    out_dir: str,
+    plan: ExtractionPlan,
+    target: Optional[str] = None,
+    cleanup: bool = False,
+) -> str:
+    """
+    Merge the partial outputs of a sharded extraction into a single file.
+
+    Args:
+        out_dir (str): The folder with per-dump (and per-slab) `.npz` results,
+            including batch files of an `AsyncWriter`.
+        plan (ExtractionPlan): The plan that produced the results.
+        target (str, optional): Output file, `<out_dir>/merged.npz` by default.
+        cleanup (bool): Remove the slab partials once they have been combined.
+
+    Returns:
+        str: The path of the merged file.
+    """
+
+    target = target or os.path.join(out_dir, MERGED_NAME)
+    names = sorted(f for f in os.listdir(out_dir) if f.endswith(".npz"))
+    results: Dict[str, Union[str, Dict[str, np.ndarray]]] = dict()
+
+    for name in names:
+        if is_batch(name):
+            results.update(read_batch(os.path.join(out_dir, name)))
+
+        elif name != os.path.basename(target) and ".tmp." not in name:
+            results[name] = os.path.join(out_dir, name)
+
+    groups = defaultdict(list)
+    dumps = dict()
+
+    for name, result in sorted(results.items()):
+        match = _part.match(name)
+
+        if match is not None:
+            groups[match.group("stem")].append(result)
+
+        else:
+            dumps[name] = result
+
+    for stem, parts in groups.items():
+        combined = output_path(stem, out_dir)
+        save_result(combined, merge_parts(parts, plan), compress=plan.compress)
+        dumps[os.path.basename(combined)] = combined
+
+        if cleanup:
+            for p in parts:
+                if isinstance(p, str):
+                    os.remove(p)
+
+    if not dumps:
+        raise ValueError(f"No results to merge in: {out_dir}")
+
+    series = stack_series([_load(r) for r in dumps.values()])
+    series.pop("slab", None)
+
+    return save_result(target, series, compress=plan.compress)
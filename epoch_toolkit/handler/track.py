@@ -0,0 +1,163 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from epoch_toolkit.core import Component
+
+from .file import FileHandler
+
+# ----------------------- #
+
+DEFAULT_QUANTITIES = (
+    "coordinates.x",
+    "coordinates.y",
+    "coordinates.z",
+    "momentum.x",
+    "momentum.y",
+    "momentum.z",
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# ----------------------- #
+
+
+class Trajectories(NamedTuple):
+    """Tracked particle quantities as a dense `(particle, time, quantity)` array."""
+
+    ids: np.ndarray
+    time: np.ndarray
+    quantities: List[str]
+    data: np.ndarray
+
+    # ....................... #
+
+    def get(self, quantity: str) -> np.ndarray:
+        """The `(particle, time)` array of a single quantity."""
+
+        return self.data[:, :, self.quantities.index(quantity)]
+
+
+# ----------------------- #
+
+
+def parse_quantity(quantity: str) -> Tuple[str, Component]:
+    """
+    Split `accessor.component`, e.g. `momentum.theta`, into its parts.
+    Coordinates are only available along `x`, `y` and `z`.
+    """
+
+    accessor, _, component = quantity.partition(".")
+
+    if accessor not in ("coordinates", "momentum"):
+        raise ValueError(f"Invalid particle quantity: {quantity}")
+
+    component = Component.get(component or "x")
+
+    if accessor == "coordinates" and component.value not in ("x", "y", "z"):
+        raise ValueError(
+            f"Invalid particle quantity: {quantity} (coordinates are only "
+            "tracked along x, y and z)"
+        )
+
+    return accessor, component
+
+
+# ----------------------- #
+
+
+def id_index(
+    handler: FileHandler, specie: str, path: Optional[str] = None
+) -> np.ndarray:
+    """
+    The permutation sorting the particle IDs of the loaded dump.
+
+    With `path`, the permutation is stored as `.npy` and reused as long as it
+    is newer than the dump, so each dump is sorted at most once.
+    """
+
+    dump = handler.path
+
+    if path is not None and os.path.exists(path):
+        if dump is None or os.path.getmtime(path) >= os.path.getmtime(dump):
+            return np.load(path)
+
+    ids = handler.ids(specie)
+    order = np.argsort(ids, kind="stable")
+    order = order.astype(np.int32 if ids.size < 2**31 else np.int64)
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path, order)
+
+    return order
+
+
+# ----------------------- #
+
+
+def track_dump(
+    path: str,
+    specie: str,
+    selected: np.ndarray,
+    quantities: Sequence[str],
+    index_dir: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dtype: str = "float64",
+) -> Tuple[float, np.ndarray]:
+    """
+    Gather the quantities of the selected (sorted, unique) IDs from one dump.
+
+    Returns:
+        Tuple[float, np.ndarray]: The dump time and a `(particle, quantity)`
+            array, NaN where a particle is absent from the dump.
+    """
+
+    handler = FileHandler(log_level="warning")
+    handler.read(path)
+
+    index_path = None
+
+    if index_dir is not None:
+        # relative to the folder of the dump, which may differ between dumps
+        stem = os.path.splitext(os.path.basename(path))[0]
+        folder = os.path.dirname(path)
+        index_path = os.path.join(folder, index_dir, specie, f"{stem}.npy")
+
+    ids = handler.ids(specie)
+    order = id_index(handler, specie, path=index_path)
+    sorted_ids = ids[order]
+    n = sorted_ids.size
+
+    out = np.full((selected.size, len(quantities)), np.nan, dtype=dtype)
+    values: Dict[str, np.ndarray] = dict()
+
+    def _values(quantity: str) -> np.ndarray:
+        if quantity not in values:
+            accessor, component = parse_quantity(quantity)
+
+            if accessor == "coordinates":
+                values[quantity] = handler.coordinates(specie)[
+                    "xyz".index(component.value)
+                ]
+
+            else:
+                values[quantity] = handler.momentum(specie, component=component)
+
+        return values[quantity]
+
+    if n == 0:
+        return float(handler.header["time"]), out
+
+    for start in range(0, selected.size, chunk_size):
+        chunk = selected[start : start + chunk_size]
+        pos = np.minimum(np.searchsorted(sorted_ids, chunk), n - 1)
+        found = sorted_ids[pos] == chunk
+        rows = order[pos[found]]
+        target = out[start : start + chunk.size]
+
+        for q, quantity in enumerate(quantities):
+            target[found, q] = _values(quantity)[rows]
+
+    return float(handler.header["time"]), out
@@ -0,0 +1,328 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+# ----------------------- #
+
+DEFAULT_MAX_BYTES = 1 << 28
+DEFAULT_SMALL_BYTES = 1 << 20
+
+_batch = re.compile(r"^batch-[0-9a-f]+\.npz$")
+
+# ----------------------- #
+
+
+def save_result(target: str, result: dict, compress: bool = True) -> str:
+    # write atomically so that an interrupted task never leaves a partial file
+    tmp = f"{target}.tmp.npz"
+    save = np.savez_compressed if compress else np.savez
+    save(tmp, **result)
+    os.replace(tmp, target)
+
+    return target
+
+
+# ....................... #
+
+
+def result_nbytes(result: Any) -> int:
+    if isinstance(result, dict):
+        return sum(np.asarray(v).nbytes for v in result.values())
+
+    return len(result) if isinstance(result, (bytes, bytearray)) else 0
+
+
+# ----------------------- #
+
+
+def is_batch(name: str) -> bool:
+    return _batch.match(os.path.basename(name)) is not None
+
+
+# ....................... #
+
+
+def read_batch(path: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """The results stored in a batch file, by their `.npz` file name."""
+
+    results = dict()
+
+    with np.load(path) as data:
+        for key in data.files:
+            stem, _, name = key.partition("/")
+            results.setdefault(f"{stem}.npz", dict())[name] = data[key]
+
+    return results
+
+
+# ....................... #
+
+
+def batched_names(out_dir: str) -> Set[str]:
+    """The `.npz` file names of all results stored in batch files."""
+
+    names = set()
+
+    for name in filter(is_batch, os.listdir(out_dir)):
+        with np.load(os.path.join(out_dir, name)) as data:
+            names.update(f"{k.partition('/')[0]}.npz" for k in data.files)
+
+    return names
+
+
+# ----------------------- #
+
+
+class WriterStats(NamedTuple):
+    """
+    Counters of an `AsyncWriter`.
+
+    `wait_time` is the time producers were blocked by a full queue, i.e.
+    the compute time lost to output I/O; `backpressure` is its fraction of
+    the writer lifetime, zero when the disk keeps up.
+    """
+
+    items: int
+    files: int
+    bytes: int
+    peak_bytes: int
+    wait_time: float
+    write_time: float
+    elapsed: float
+
+    # ....................... #
+
+    @property
+    def backpressure(self) -> float:
+        return self.wait_time / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# ----------------------- #
+
+
+class AsyncWriter:
+    """
+    Write results in a background thread behind a bounded queue.
+
+    `put` returns as soon as the result is queued and only blocks while the
+    queued results exceed `max_bytes`, so computation overlaps with writing
+    and memory stays bounded. NumPy's compression and file I/O release the
+    GIL, so a thread suffices.
+
+    Results of dictionaries of arrays smaller than `small_bytes` are
+    collected per folder and written together into `batch-<id>.npz` files
+    of about `batch_bytes` (keys `<stem>/<name>`), see `read_batch`. A failed
+    write is raised by the next `put` or by `close`.
+
+    Example:
+        >>> with AsyncWriter() as writer:
+        ...     for handler in folder.iterate():
+        ...         writer.put(f"out/{handler.time:.3e}.npz", compute(handler))
+        >>> writer.stats().backpressure
+
+    Args:
+        max_bytes (int): Bound of the queued data.
+        batch_bytes (int): Size of batch files, `0` writes every result to
+            its own file.
+        small_bytes (int): Results up to this size are batched.
+        compress (bool): Compress the `.npz` files.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        batch_bytes: int = 0,
+        small_bytes: int = DEFAULT_SMALL_BYTES,
+        compress: bool = True,
+    ):
+        self.max_bytes = max_bytes
+        self.batch_bytes = batch_bytes
+        self.small_bytes = small_bytes
+        self.compress = compress
+
+        self._queue: deque = deque()
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._batches: Dict[str, Tuple[Dict[str, np.ndarray], int]] = dict()
+
+        self._counts = dict(items=0, files=0, bytes=0, peak_bytes=0)
+        self._times = dict(wait_time=0.0, write_time=0.0)
+        self._start = time.perf_counter()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ....................... #
+
+    def __enter__(self) -> "AsyncWriter":
+        return self
+
+    # ....................... #
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ....................... #
+
+    def put(
+        self,
+        target: str,
+        result: Any,
+        save: Optional[Callable[[str, Any], Any]] = None,
+    ):
+        """
+        Queue a result for writing.
+
+        Args:
+            target (str): The output file.
+            result (Any): A dictionary of arrays, or anything `save` accepts
+                (e.g. encoded image bytes).
+            save (Callable, optional): Writes `result` to `target`,
+                `save_result` by default.
+        """
+
+        nbytes = result_nbytes(result)
+
+        with self._cond:
+            self._raise()
+
+            if self._closed:
+                raise ValueError("The writer is closed")
+
+            start = time.perf_counter()
+
+            # a single oversized result is still accepted by an empty queue
+            while self._queue and self._queued + nbytes > self.max_bytes:
+                self._cond.wait()
+                self._raise()
+
+            self._times["wait_time"] += time.perf_counter() - start
+            self._queue.append((target, result, save, nbytes))
+            self._queued += nbytes
+            self._counts["peak_bytes"] = max(self._counts["peak_bytes"], self._queued)
+            self._cond.notify_all()
+
+    # ....................... #
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+        self._thread.join()
+
+        with self._cond:
+            self._raise()
+
+    # ....................... #
+
+    def stats(self) -> WriterStats:
+        with self._cond:
+            return WriterStats(
+                **self._counts,
+                **self._times,
+                elapsed=time.perf_counter() - self._start,
+            )
+
+    # ....................... #
+
+    def _raise(self):
+        # called with `_cond` held, like every access to the shared state
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    # ....................... #
+
+    def _items(self) -> Iterator[Tuple[str, Any, Optional[Callable], int]]:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+
+                if not self._queue:
+                    return
+
+                item = self._queue[0]
+
+            yield item
+
+            with self._cond:
+                self._queue.popleft()
+                self._queued -= item[3]
+                self._counts["items"] += 1
+                self._counts["bytes"] += item[3]
+                self._cond.notify_all()
+
+    # ....................... #
+
+    def _run(self):
+        for target, result, save, nbytes in self._items():
+            try:
+                start = time.perf_counter()
+                files = 0
+
+                if (
+                    save is None
+                    and self.batch_bytes > 0
+                    and nbytes <= self.small_bytes
+                    and isinstance(result, dict)
+                ):
+                    self._add_to_batch(target, result, nbytes)
+
+                else:
+                    (save or self._save)(target, result)
+                    files = 1
+
+                with self._cond:
+                    self._counts["files"] += files
+                    self._times["write_time"] += time.perf_counter() - start
+
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+
+        try:
+            for folder in list(self._batches):
+                self._flush(folder)
+
+        except Exception as e:
+            with self._cond:
+                self._error = e
+
+    # ....................... #
+
+    def _save(self, target: str, result: Dict[str, np.ndarray]):
+        save_result(target, result, compress=self.compress)
+
+    # ....................... #
+
+    def _add_to_batch(self, target: str, result: Dict[str, np.ndarray], nbytes: int):
+        folder, name = os.path.split(target)
+        stem = os.path.splitext(name)[0]
+        arrays, size = self._batches.get(folder, (dict(), 0))
+        arrays.update({f"{stem}/{k}": v for k, v in result.items()})
+        self._batches[folder] = (arrays, size + nbytes)
+
+        if size + nbytes >= self.batch_bytes:
+            self._flush(folder)
+
+    # ....................... #
+
+    def _flush(self, folder: str):
+        arrays, _ = self._batches.pop(folder)
+        target = os.path.join(folder, f"batch-{uuid.uuid4().hex[:16]}.npz")
+        save_result(target, arrays, compress=self.compress)
+
+        with self._cond:
+            self._counts["files"] += 1
@@ -0,0 +1,11 @@
+from ..utils.lazy import lazy_loader
+
+# ----------------------- #
+
+__all__ = ["movie", "render_movie", "set_plot_style"]
+
+__getattr__, __dir__ = lazy_loader(
+    __name__,
+    submodules=["movie"],
+    attributes={"render_movie": ".movie", "set_plot_style": ".config"},
+)
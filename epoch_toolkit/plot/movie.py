@@ -0,0 +1,396 @@
+import os
+import subprocess as sp
+from functools import partial
+from typing import Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+from epoch_toolkit.core import Grid, Unit
+from epoch_toolkit.core.transform.slice import view_grid, view_index
+from epoch_toolkit.core.units import factor, from_si
+from epoch_toolkit.handler.extract import Extraction, extract
+from epoch_toolkit.handler.file import FileHandler
+from epoch_toolkit.handler.folder import list_dumps
+from epoch_toolkit.utils.parallel import parallel_map
+
+# ----------------------- #
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".avi", ".webm")
+
+# per-process figure state of the render workers
+_renderer: Dict[str, object] = dict()
+
+# ----------------------- #
+
+
+def frame_axes(extraction: Extraction, grid: Grid) -> List[str]:
+    """
+    Names of the two axes of a frame, `u` and `v` for off-axis projections
+    and oblique slices.
+    """
+
+    reduction = extraction.projection
+
+    if extraction.oblique is not None or (
+        reduction is not None and reduction.direction is not None
+    ):
+        return ["u", "v"]
+
+    removed = {s.axis for s in extraction.slices if s.value is not None}
+
+    if reduction is not None:
+        removed.add(reduction.axis)
+
+    return [a for a in "xyz"[: grid.dim] if a not in removed]
+
+
+# ----------------------- #
+
+
+def frame_extent(
+    extraction: Extraction,
+    grid: Grid,
+    unit: Unit,
+    shape: Optional[Tuple[int, int]] = None,
+) -> Tuple[float, float, float, float]:
+    """
+    Physical extent `(left, right, bottom, top)` of a 2D frame.
+
+    Off-axis projections are placed at the origin of their image plane and
+    oblique slices span the lengths of their axis vectors; both need the
+    frame `shape`.
+    """
+
+    reduction = extraction.projection
+
+    if reduction is not None and reduction.direction is not None:
+        pixel = from_si(min(a.spacing for a in grid.axes), unit)
+
+        return (0.0, (shape[0] - 1) * pixel, 0.0, (shape[1] - 1) * pixel)
+
+    if extraction.oblique is not None:
+        oblique = extraction.oblique
+        scale = from_si(factor(oblique.unit), unit)
+        lengths = [float(np.linalg.norm(a)) * scale for a in oblique.axes]
+
+        return (0.0, lengths[0], 0.0, lengths[-1])
+
+    axes = frame_axes(extraction, grid)
+
+    if len(axes) != 2:
+        raise ValueError(f"Frames must be 2D, got axes: {axes}")
+
+    index = view_index(grid, [*extraction.crops, *extraction.slices])
+    view = view_grid(grid, index)
+    kept = [a for a, i in zip("xyz", index) if not isinstance(i, int)]
+    extent = []
+
+    for axis in axes:
+        target = view.axes[kept.index(axis)]
+        extent += [from_si(target.min, unit), from_si(target.max, unit)]
+
+    return tuple(extent)
+
+
+# ----------------------- #
+
+
+def _extract_frame(
+    path: str,
+    extraction: Extraction,
+    cache_dir: str,
+    percentile: Optional[float],
+    unit: Unit,
+) -> dict:
+    target = os.path.join(
+        cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}.npy"
+    )
+
+    handler = FileHandler(log_level="warning")
+    handler.read(path)
+    arr = np.asarray(extract(handler, extraction)[extraction.name], dtype=np.float32)
+
+    if arr.ndim != 2:
+        raise ValueError(f"Frame `{extraction.name}` is {arr.ndim}D, expected 2D")
+
+    np.save(target, arr)
+    finite = arr[np.isfinite(arr)]
+    stats = dict(
+        path=target,
+        time=float(handler.header["time"]),
+        extent=frame_extent(extraction, handler.grid, unit, shape=arr.shape),
+        axes=frame_axes(extraction, handler.grid),
+        min=float(finite.min(initial=np.inf)),
+        max=float(finite.max(initial=-np.inf)),
+        min_positive=float(finite[finite > 0].min(initial=np.inf)),
+    )
+
+    if percentile is not None and finite.size:
+        lo, hi = np.percentile(finite, [100 - percentile, percentile])
+        stats.update(min=float(lo), max=float(hi))
+
+    return stats
+
+
+# ----------------------- #
+
+
+def shared_norm(
+    frames: List[dict], norm: Literal["linear", "log", "symmetric"] = "linear"
+) -> Tuple[float, float]:
+    """Combine the per-frame statistics of the first pass into global limits."""
+
+    vmin = min(f["min"] for f in frames)
+    vmax = max(f["max"] for f in frames)
+
+    if norm == "symmetric":
+        vmax = max(abs(vmin), abs(vmax))
+        vmin = -vmax
+
+    elif norm == "log":
+        vmin = min(f["min_positive"] for f in frames)
+
+    return vmin, vmax
+
+
+# ----------------------- #
+
+
+def _init_renderer(
+    shape: Tuple[int, int],
+    extent: Tuple[float, float, float, float],
+    limits: Tuple[float, float],
+    norm: str,
+    cmap: str,
+    figsize: Tuple[float, float],
+    dpi: int,
+    labels: Tuple[str, str, str],
+    scale: float = 1.0,
+):
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm, Normalize
+    from matplotlib.ticker import FuncFormatter
+
+    from .config import set_plot_style
+
+    set_plot_style()
+
+    vmin, vmax = limits
+    colour_norm = LogNorm(vmin, vmax) if norm == "log" else Normalize(vmin, vmax)
+
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    im = ax.imshow(
+        np.zeros(shape[::-1], dtype=np.float32),
+        origin="lower",
+        extent=extent,
+        norm=colour_norm,
+        cmap=cmap,
+        aspect="auto",
+        interpolation="nearest",
+    )
+
+    # frames stay in SI units, only the colour bar labels are scaled
+    ticks = FuncFormatter(lambda v, _: f"{v * scale:g}") if scale != 1 else None
+    fig.colorbar(im, ax=ax, label=labels[2], format=ticks)
+    ax.set_xlabel(labels[0])
+    ax.set_ylabel(labels[1])
+    title = ax.set_title(" ")
+    fig.tight_layout()
+
+    _renderer.update(fig=fig, im=im, title=title)
+
+
+# ----------------------- #
+
+
+def _render_frame(
+    job: Tuple[str, float, Optional[str]], time_unit: Unit
+) -> Optional[Tuple[int, int, bytes]]:
+    data_path, time, out_path = job
+    fig, im, title = _renderer["fig"], _renderer["im"], _renderer["title"]
+
+    # reuse the figure and artist, only the pixel data and title change
+    im.set_data(np.load(data_path).T)
+    title.set_text(f"t = {from_si(time, time_unit):.1f} {time_unit.symbol}s")
+
+    if out_path is not None:
+        fig.savefig(out_path)
+        return None
+
+    fig.canvas.draw()
+    width, height = fig.canvas.get_width_height()
+
+    return width, height, bytes(fig.canvas.buffer_rgba())
+
+
+# ----------------------- #
+
+
+def _open_video(output: str, width: int, height: int, fps: int) -> sp.Popen:
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgba",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(fps),
+        "-i",
+        "-",
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        output,
+    ]
+
+    return sp.Popen(cmd, stdin=sp.PIPE)
+
+
+# ----------------------- #
+
+
+def render_movie(
+    folder: str,
+    extraction: Extraction,
+    output: str,
+    workers: Optional[int] = None,
+    norm: Literal["linear", "log", "symmetric"] = "linear",
+    percentile: Optional[float] = None,
+    limits: Optional[Tuple[float, float]] = None,
+    cmap: str = "viridis",
+    fps: int = 24,
+    figsize: Tuple[float, float] = (10, 6),
+    dpi: int = 100,
+    unit: Union[str, Unit] = Unit.micro,
+    time_unit: Union[str, Unit] = Unit.femto,
+    cache_dir: Optional[str] = None,
+    prefix: Optional[str] = None,
+) -> str:
+    """
+    Render a 2D slice or projection of every dump into a movie.
+
+    The first pass extracts every frame in parallel into a small `.npy` cache
+    and streams the per-frame statistics into a shared colour normalisation.
+    The second pass renders the cached frames in worker processes that keep a
+    single figure and image artist each, updating it with `set_data`.
+
+    Args:
+        folder (str): The run folder.
+        extraction (Extraction): A 2D extraction (e.g. a projection of a 3D field).
+        output (str): A video file (piped through `ffmpeg`) or a folder for a
+            PNG image sequence.
+        workers (int, optional): Number of worker processes.
+        norm (str): Colour normalisation: `linear`, `log` or `symmetric`.
+        percentile (float, optional): Clip the colour range at this per-frame
+            percentile (e.g. `99.5`) instead of the absolute extrema.
+        limits (Tuple[float, float], optional): Fixed colour limits (in the
+            `value_unit` of the extraction), skipping the statistics of the
+            first pass.
+        cmap (str): The colour map.
+        fps (int): Frames per second of the video.
+        figsize (Tuple[float, float]): The figure size in inches.
+        dpi (int): The figure resolution.
+        unit (Unit): The unit of the spatial axes.
+        time_unit (Unit): The unit of the time in the frame titles.
+        cache_dir (str, optional): Folder for the extracted frames,
+            `<folder>/analysis/frames/<name>` by default.
+        prefix (str, optional): Only render dumps with this file prefix.
+
+    Returns:
+        str: The path of the video or image folder.
+    """
+
+    unit = Unit.get(unit) if isinstance(unit, str) else unit
+    time_unit = Unit.get(time_unit) if isinstance(time_unit, str) else time_unit
+    cache_dir = cache_dir or os.path.join(folder, "analysis", "frames", extraction.name)
+    value_unit = extraction.value_unit
+    scale = 1 / factor(value_unit)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    files = list_dumps(folder, prefix=prefix)
+    func = partial(
+        _extract_frame,
+        extraction=extraction.model_copy(update=dict(value_unit=None)),
+        cache_dir=cache_dir,
+        percentile=percentile,
+        unit=unit,
+    )
+    frames = sorted(parallel_map(func, files, workers=workers), key=lambda f: f["time"])
+
+    if not frames:
+        raise ValueError(f"No dumps found in: {folder}")
+
+    limits = tuple(v / scale for v in limits) if limits else shared_norm(frames, norm)
+    shape = np.load(frames[0]["path"], mmap_mode="r").shape
+    axes = frames[0]["axes"]
+    name = (
+        extraction.name
+        if value_unit is None
+        else f"{extraction.name} [{value_unit.name}]"
+    )
+    labels = (f"{axes[0]} [{unit.symbol}m]", f"{axes[1]} [{unit.symbol}m]", name)
+    initargs = (
+        shape,
+        frames[0]["extent"],
+        limits,
+        norm,
+        cmap,
+        figsize,
+        dpi,
+        labels,
+        scale,
+    )
+
+    is_video = output.lower().endswith(VIDEO_EXTENSIONS)
+
+    if is_video:
+        jobs = [(f["path"], f["time"], None) for f in frames]
+
+    else:
+        os.makedirs(output, exist_ok=True)
+        jobs = [
+            (f["path"], f["time"], os.path.join(output, f"{i:05d}.png"))
+            for i, f in enumerate(frames)
+        ]
+
+    rendered = parallel_map(
+        partial(_render_frame, time_unit=time_unit),
+        jobs,
+        workers=workers,
+        initializer=_init_renderer,
+        initargs=initargs,
+    )
+
+    if not is_video:
+        for _ in rendered:
+            pass
+
+        return output
+
+    video = None
+
+    try:
+        for width, height, buffer in rendered:
+            if video is None:
+                video = _open_video(output, width, height, fps)
+
+            video.stdin.write(buffer)
+
+    finally:
+        if video is not None:
+            video.stdin.close()
+            video.wait()
+
+    return output
@@ -1,5 +1,7 @@
-from . import logging
+from .lazy import lazy_loader
 
 # ----------------------- #
 
-__all__ = ["logging"]
+__all__ = ["logging", "importtime", "lazy_loader"]
+
+__getattr__, __dir__ = lazy_loader(__name__, submodules=["logging", "importtime"])
@@ -0,0 +1,87 @@
+import re
+import subprocess as sp
+import sys
+from typing import Dict
+
+# ----------------------- #
+
+IMPORT_BUDGET_S = 0.25
+
+_line = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# ----------------------- #
+
+
+def measure_import_time(module: str = "epoch_toolkit") -> Dict[str, float]:
+    """
+    Measure the cumulative import time of a module in a fresh interpreter.
+
+    Args:
+        module (str): The module to import. Defaults to `epoch_toolkit`.
+
+    Returns:
+        Dict[str, float]: Cumulative import time in seconds per imported module.
+    """
+
+    proc = sp.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=sp.PIPE,
+        stderr=sp.PIPE,
+        text=True,
+        check=True,
+    )
+
+    timings = dict()
+
+    for line in proc.stderr.splitlines():
+        match = _line.match(line)
+
+        if match is not None:
+            timings[match.group(4)] = int(match.group(2)) * 1e-6
+
+    return timings
+
+
+# ----------------------- #
+
+
+def check_import_budget(
+    module: str = "epoch_toolkit",
+    budget: float = IMPORT_BUDGET_S,
+    forbidden: tuple = ("sdf", "sdf_helper", "pydantic", "matplotlib", "seaborn"),
+) -> float:
+    """
+    Assert that importing a module stays under the time budget and does not
+    pull in any of the heavy third-party packages eagerly.
+
+    Args:
+        module (str): The module to import. Defaults to `epoch_toolkit`.
+        budget (float): The maximum cumulative import time in seconds.
+        forbidden (tuple): Top-level packages that must not be imported.
+
+    Returns:
+        float: The measured import time in seconds.
+    """
+
+    timings = measure_import_time(module)
+    loaded = {k.split(".")[0] for k in timings.keys()}
+    eager = sorted(loaded.intersection(forbidden))
+
+    if eager:
+        raise RuntimeError(f"`{module}` eagerly imports: {', '.join(eager)}")
+
+    elapsed = timings.get(module, 0.0)
+
+    if elapsed > budget:
+        raise RuntimeError(
+            f"`{module}` import took {elapsed:.3f}s, budget is {budget:.3f}s"
+        )
+
+    return elapsed
+
+
+# ----------------------- #
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "epoch_toolkit"
+    print(f"{target}: {check_import_budget(target):.3f}s")
@@ -0,0 +1,51 @@
+import importlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ----------------------- #
+
+
+def lazy_loader(
+    package: str,
+    submodules: Optional[List[str]] = None,
+    attributes: Optional[Dict[str, str]] = None,
+) -> Tuple[Callable, Callable]:
+    """
+    Build module-level `__getattr__` and `__dir__` hooks (PEP 562) that import
+    submodules and re-exported attributes on first access only.
+
+    Args:
+        package (str): The name of the package, usually `__name__`.
+        submodules (List[str], optional): Submodules exposed as attributes.
+        attributes (Dict[str, str], optional): Mapping of exported name to the
+            relative module that defines it, e.g. `{"Grid": ".grid"}`.
+
+    Returns:
+        Tuple[Callable, Callable]: The `__getattr__` and `__dir__` functions.
+    """
+
+    submodules = list(submodules or [])
+    attributes = dict(attributes or {})
+
+    def __getattr__(name: str):
+        if name in submodules:
+            value = importlib.import_module(f".{name}", package)
+
+        elif name in attributes:
+            module = importlib.import_module(attributes[name], package)
+            value = getattr(module, name)
+
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # cache on the package so the hook is hit only once per name
+        setattr(importlib.import_module(package), name, value)
+
+        return value
+
+    def __dir__():
+        # the lazy names together with everything defined or imported eagerly
+        module = vars(importlib.import_module(package))
+
+        return sorted(set(module) | set(submodules) | set(attributes))
+
+    return __getattr__, __dir__
@@ -2,8 +2,6 @@ import logging
 from enum import Enum
 from typing import Any, List, Union
 
-from pydantic import BaseModel
-
 # ----------------------- #
 
 
@@ -113,7 +111,7 @@ class LogMixin:
                     for key, value in item.items()
                 }
 
-            elif isinstance(item, BaseModel):
+            elif hasattr(item, "model_dump"):  # pydantic model, imported lazily
                 return item.model_dump()
 
             else:
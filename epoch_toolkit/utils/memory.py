@@ -0,0 +1,328 @@
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+# ----------------------- #
+
+ENV_VARIABLE = "EPOCH_TOOLKIT_MEMORY"
+
+# share of the physical memory used when no budget is configured
+DEFAULT_FRACTION = 0.8
+
+# share of the free budget a single chunked operation may use
+CHUNK_FRACTION = 0.25
+MIN_CHUNK_ELEMENTS = 1 << 12
+
+_units = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+_size = re.compile(r"^\s*([\d.]+)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+
+# ----------------------- #
+
+
+def parse_size(size: Union[int, float, str]) -> int:
+    """Bytes of a size such as `16G`, `512MiB` or `1e9`."""
+
+    if isinstance(size, (int, float)):
+        return int(size)
+
+    match = _size.match(size)
+
+    if match is None:
+        raise ValueError(f"Invalid memory size: {size}")
+
+    return int(float(match.group(1)) * _units[match.group(2).lower()])
+
+
+# ....................... #
+
+
+def format_size(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.1f} {unit}"
+
+        nbytes /= 1024
+
+    return f"{nbytes:.1f} TiB"
+
+
+# ----------------------- #
+
+
+def rss() -> int:
+    """Current resident memory of this process in bytes."""
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss()
+
+
+# ....................... #
+
+
+def peak_rss(children: bool = False) -> int:
+    """Peak resident memory of this process (or of its largest child)."""
+
+    # not available on Windows, where the memory use is not reported
+    try:
+        import resource
+
+    except ImportError:
+        return 0
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ....................... #
+
+
+def default_limit() -> int:
+    """
+    The budget when none is configured: `EPOCH_TOOLKIT_MEMORY`, the memory
+    allotted by SLURM, or a share of the physical memory.
+    """
+
+    if os.environ.get(ENV_VARIABLE):
+        return parse_size(os.environ[ENV_VARIABLE])
+
+    slurm = os.environ.get("SLURM_MEM_PER_NODE")
+
+    if slurm:
+        return parse_size(f"{slurm}M" if slurm.isdigit() else slurm)
+
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+    except (ValueError, OSError, AttributeError):
+        total = 1 << 34
+
+    return int(total * DEFAULT_FRACTION)
+
+
+# ----------------------- #
+
+
+class MemoryReport(NamedTuple):
+    limit: int
+    rss: int
+    peak: int
+    children_peak: int
+
+    # ....................... #
+
+    @property
+    def available(self) -> int:
+        return max(self.limit - self.rss, 0)
+
+    # ....................... #
+
+    def __str__(self) -> str:
+        return (
+            f"memory: {format_size(self.rss)} used, "
+            f"{format_size(self.peak)} peak, "
+            f"{format_size(self.children_peak)} worker peak, "
+            f"budget {format_size(self.limit)}"
+        )
+
+
+# ----------------------- #
+
+
+class MemoryBudget:
+    """
+    The memory budget of the process, consulted before memory is committed.
+
+    - Block readers call `admit` with the size of a block (from the SDF
+      block table) before loading it, which fails with a `MemoryError`
+      instead of the node's OOM killer ending the job.
+    - Chunked operations size their chunks with `chunk_elements`, so chunks
+      shrink automatically as the free budget does.
+    - Process pools cap their workers with `max_workers` and split the
+      budget between them.
+    """
+
+    def __init__(self, limit: Optional[Union[int, str]] = None):
+        self.limit = default_limit() if limit is None else parse_size(limit)
+        self._releasers: List[Callable[[], Optional[Callable]]] = []
+
+    # ....................... #
+
+    def report(self) -> MemoryReport:
+        return MemoryReport(
+            limit=self.limit,
+            rss=rss(),
+            peak=peak_rss(),
+            children_peak=peak_rss(children=True),
+        )
+
+    # ....................... #
+
+    def available(self) -> int:
+        return max(self.limit - rss(), 0)
+
+    # ....................... #
+
+    def on_pressure(self, release: Callable[[], None]):
+        """
+        Register a callback that frees cached data when memory is short.
+        Bound methods are held weakly, so their objects can still be freed;
+        the entries of freed objects are dropped on the next registration.
+        """
+
+        self._releasers = [r for r in self._releasers if r() is not None]
+
+        if hasattr(release, "__self__"):
+            self._releasers.append(weakref.WeakMethod(release))
+
+        else:
+            self._releasers.append(lambda: release)
+
+    # ....................... #
+
+    def admit(self, nbytes: int, what: str = "data"):
+        """
+        Ensure `nbytes` fit into the budget, releasing caches if needed.
+
+        Raises:
+            MemoryError: If they still do not fit.
+        """
+
+        if nbytes <= self.available():
+            return
+
+        self._releasers = [r for r in self._releasers if r() is not None]
+
+        for ref in self._releasers:
+            release = ref()
+
+            if release is not None:
+                release()
+
+        available = self.available()
+
+        if nbytes > available:
+            raise MemoryError(
+                f"Loading {what} needs {format_size(nbytes)}, only "
+                f"{format_size(available)} of the {format_size(self.limit)} "
+                f"budget are free (set {ENV_VARIABLE} to change it)"
+            )
+
+    # ....................... #
+
+    def chunk_elements(self, upper: int, bytes_per_element: int = 8) -> int:
+        """
+        Elements per chunk: at most `upper`, fewer when a chunk (of
+        `bytes_per_element` over all its temporaries) would exceed a share of
+        the free budget, but not below `MIN_CHUNK_ELEMENTS` for that reason.
+        """
+
+        fit = int(self.available() * CHUNK_FRACTION) // max(bytes_per_element, 1)
+
+        return min(upper, max(MIN_CHUNK_ELEMENTS, fit))
+
+    # ....................... #
+
+    def max_workers(self, workers: int, item_bytes: Optional[int] = None) -> int:
+        """Cap the number of workers that each need `item_bytes`."""
+
+        if not item_bytes:
+            return workers
+
+        return max(1, min(workers, self.available() // item_bytes))
+
+    # ....................... #
+
+    def monitor(
+        self,
+        interval: float = 1.0,
+        callback: Optional[Callable[[MemoryReport], None]] = None,
+    ) -> "MemoryMonitor":
+        return MemoryMonitor(self, interval=interval, callback=callback)
+
+
+# ----------------------- #
+
+
+class MemoryMonitor:
+    """
+    Sample the memory use in a background thread while a block runs.
+
+    Example:
+        >>> with BUDGET.monitor(interval=5, callback=print) as monitor:
+        ...     folder.stats(extraction)
+        >>> monitor.peak
+    """
+
+    def __init__(
+        self,
+        budget: MemoryBudget,
+        interval: float = 1.0,
+        callback: Optional[Callable[[MemoryReport], None]] = None,
+    ):
+        self.budget = budget
+        self.interval = interval
+        self.callback = callback
+        self.samples: List[Tuple[float, int]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    # ....................... #
+
+    def __enter__(self) -> "MemoryMonitor":
+        self._start = time.perf_counter()
+        self._thread.start()
+
+        return self
+
+    # ....................... #
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    # ....................... #
+
+    @property
+    def peak(self) -> int:
+        """Peak resident memory of this process and of the largest worker."""
+
+        report = self.budget.report()
+
+        return max(report.peak, report.children_peak)
+
+    # ....................... #
+
+    def _run(self):
+        while True:
+            report = self.budget.report()
+            self.samples.append((time.perf_counter() - self._start, report.rss))
+
+            if self.callback is not None:
+                self.callback(report)
+
+            if self._stop.wait(self.interval):
+                return
+
+
+# ----------------------- #
+
+BUDGET = MemoryBudget()
+
+# ....................... #
+
+
+def set_budget(limit: Union[int, str]):
+    """Set the process-wide budget, e.g. `set_budget("16G")`."""
+
+    BUDGET.limit = parse_size(limit)
@@ -0,0 +1,196 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# ----------------------- #
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# ----------------------- #
+
+
+def default_workers() -> int:
+    """
+    Number of worker processes to use when none is given explicitly.
+
+    Honors the CPUs allotted by SLURM before falling back to the CPU count.
+    """
+
+    slurm_cpus = os.environ.get("SLURM_CPUS_PER_TASK")
+
+    if slurm_cpus is not None:
+        return max(1, int(slurm_cpus))
+
+    return max(1, os.cpu_count() or 1)
+
+
+# ----------------------- #
+
+
+def _init_worker(limit: int, initializer: Optional[Callable], initargs: Tuple):
+    from .memory import set_budget
+
+    set_budget(limit)
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+# ....................... #
+
+
+def parallel_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    initializer: Optional[Callable] = None,
+    initargs: Tuple = (),
+    item_bytes: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Map a picklable function over items in a process pool, preserving order.
+
+    Args:
+        func (Callable): A module-level (picklable) function.
+        items (Iterable): The items to process.
+        workers (int, optional): The number of processes. `1` runs in-process.
+        chunksize (int): The number of items sent to a worker at once.
+        initializer (Callable, optional): Called once in every worker (or
+            in-process when `workers <= 1`) to set up per-process state.
+        initargs (Tuple): The arguments of the initializer.
+        item_bytes (int, optional): Memory a worker needs per item; the
+            workers are capped to fit the memory budget, which is split
+            between them (see `utils.memory`).
+        max_pending (int, optional): Submit at most this many items ahead of
+            the consumer (ignoring `chunksize`), so results are not piled up
+            while the consumer is blocked, e.g. by a full writer queue. All
+            items are submitted at once by default.
+
+    Yields:
+        The results in the order of `items`.
+    """
+
+    from .memory import BUDGET
+
+    workers = default_workers() if workers is None else workers
+    workers = BUDGET.max_workers(workers, item_bytes)
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+
+        yield from map(func, items)
+        return
+
+    initargs: Any = (BUDGET.available() // workers, initializer, initargs)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=initargs
+    ) as pool:
+        if not max_pending:
+            yield from pool.map(func, items, chunksize=chunksize)
+            return
+
+        items = iter(items)
+        pending = deque(pool.submit(func, item) for item in islice(items, max_pending))
+
+        while pending:
+            result = pending.popleft().result()
+            pending.extend(pool.submit(func, item) for item in islice(items, 1))
+
+            yield result
+
+
+# ----------------------- #
+
+
+def slurm_array_task() -> Tuple[int, int]:
+    """
+    Read the position of the current task within a SLURM job array.
+
+    Returns:
+        Tuple[int, int]: Zero-based task index and the number of tasks,
+            `(0, 1)` outside of an array job.
+    """
+
+    task_id = os.environ.get("SLURM_ARRAY_TASK_ID")
+
+    if task_id is None:
+        return 0, 1
+
+    task_min = int(os.environ.get("SLURM_ARRAY_TASK_MIN", "0"))
+    task_count = os.environ.get("SLURM_ARRAY_TASK_COUNT")
+
+    if task_count is None:
+        task_max = int(os.environ.get("SLURM_ARRAY_TASK_MAX", task_id))
+        task_count = task_max - task_min + 1
+
+    return int(task_id) - task_min, int(task_count)
+
+
+# ----------------------- #
+
+
+def shard(items: Sequence[T], index: int, count: int) -> List[T]:
+    """
+    Select a deterministic, strided shard of the items.
+
+    Striding rather than splitting into contiguous blocks keeps the shards
+    balanced when item cost grows along the sequence (e.g. late dumps).
+
+    Args:
+        items (Sequence): The full ordered sequence.
+        index (int): Zero-based shard index.
+        count (int): Total number of shards.
+
+    Returns:
+        List: The items that belong to the shard.
+    """
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {index} of {count}")
+
+    return list(items[index::count])
+
+
+# ----------------------- #
+
+
+def slab_bounds(size: int, index: int, count: int) -> slice:
+    """
+    Contiguous, near-equal slab of `range(size)` for a shard of a single axis.
+
+    Args:
+        size (int): The axis length.
+        index (int): Zero-based slab index.
+        count (int): Total number of slabs.
+
+    Returns:
+        slice: The index range of the slab.
+    """
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid slab {index} of {count}")
+
+    if count * 2 > size:
+        raise ValueError(f"Cannot split {size} cells into {count} slabs")
+
+    start = index * size // count
+    stop = (index + 1) * size // count
+
+    return slice(start, stop)
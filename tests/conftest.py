@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from epoch_toolkit.handler import archive
+from epoch_toolkit.handler.archive import ArchiveSpec, write_archive
+
+# ----------------------- #
+
+SHAPE = (12, 6, 5)
+
+# ----------------------- #
+
+
+def _block(data):
+    return SimpleNamespace(data=data)
+
+
+# ....................... #
+
+
+def synthetic_dump(index: int = 0) -> SimpleNamespace:
+    """A dump with the block layout of `sdf_helper.getdata`."""
+
+    rng = np.random.default_rng(index)
+    nx, ny, nz = SHAPE
+    data = SimpleNamespace(
+        Header=dict(time=index * 1e-15, step=index * 10),
+        Run_info=dict(job_id=1),
+        Grid_Grid_mid=_block(
+            (
+                np.linspace(0, 11e-7, nx),
+                np.linspace(-1e-6, 1e-6, ny),
+                np.linspace(-1e-6, 1e-6, nz),
+            )
+        ),
+    )
+
+    for c in "xyz":
+        setattr(data, f"Electric_Field_E{c}", _block(rng.normal(size=SHAPE) + index))
+        setattr(data, f"Magnetic_Field_B{c}", _block(rng.normal(size=SHAPE)))
+
+    data.Derived_Number_Density_electron = _block(1e25 * rng.random(SHAPE))
+
+    return data
+
+
+# ----------------------- #
+
+
+@pytest.fixture
+def dump_files(tmp_path, monkeypatch):
+    """Float32 archives of synthetic dumps, readable by `FileHandler`."""
+
+    spec = ArchiveSpec(precision="float32")
+
+    def _write(count: int = 1):
+        paths = []
+
+        with monkeypatch.context() as m:
+            m.setattr(archive, "open_dump", lambda path: synthetic_dump(int(path)))
+
+            for index in range(count):
+                target = str(tmp_path / f"{index:04d}.sdfz")
+                write_archive(str(index), target, spec)
+                paths.append(target)
+
+        return paths
+
+    return _write
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.handler.archive import _INT16_LEVELS, decode, encode
+
+# ----------------------- #
+
+
+@pytest.mark.parametrize("lo", [0.0, 1000.0, -1e25, 1e25])
+def test_int16_error_bound_with_offset(lo):
+    rng = np.random.default_rng(0)
+    span = abs(lo) * 1e-3 or 1.0
+    arr = lo + span * rng.random((64, 32))
+
+    encoded = encode(arr, "int16", chunk_elements=256)
+    restored = decode(**encoded)
+
+    rows = int(encoded["rows"])
+
+    for k in range(len(encoded["scale"])):
+        chunk = arr[k * rows : (k + 1) * rows]
+        half_level = (chunk.max() - chunk.min()) / _INT16_LEVELS / 2
+        error = np.abs(restored[k * rows : (k + 1) * rows] - chunk).max()
+
+        assert error <= half_level * (1 + 1e-6)
+
+
+# ....................... #
+
+
+def test_int16_constant_and_missing():
+    arr = np.full((4, 4), 7.5)
+    arr[0, 0] = np.nan
+    arr[1, 1] = np.inf
+
+    restored = decode(**encode(arr, "int16", chunk_elements=4))
+
+    assert np.isnan(restored[0, 0]) and np.isnan(restored[1, 1])
+    assert np.all(restored[np.isfinite(arr)] == 7.5)
+
+
+# ....................... #
+
+
+def test_int16_empty_chunk():
+    arr = np.full((2, 3), np.nan)
+
+    restored = decode(**encode(arr, "int16", chunk_elements=3))
+
+    assert np.all(np.isnan(restored))
+
+
+# ....................... #
+
+
+def test_float16_relative_error():
+    rng = np.random.default_rng(1)
+    arr = 1e12 * rng.standard_normal((16, 16))
+
+    restored = decode(**encode(arr, "float16", chunk_elements=32))
+
+    assert np.abs(restored - arr).max() <= 5e-4 * np.abs(arr).max()
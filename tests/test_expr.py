@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.const import SPEED_OF_LIGHT
+from epoch_toolkit.core.expr import Expression, evaluate
+
+# ----------------------- #
+
+rng = np.random.default_rng(0)
+x = rng.random((300, 40)) + 0.1
+y = rng.standard_normal((300, 40))
+z = rng.standard_normal(40)
+
+CASES = [
+    ("sqrt(x**2 + y**2)", np.sqrt(x**2 + y**2)),
+    ("-x * (y - 3) / 2", -x * (y - 3) / 2),
+    ("exp(-x) * sin(y) + z", np.exp(-x) * np.sin(y) + z),
+    ("arctan2(y, x) ** 3", np.arctan2(y, x) ** 3),
+    ("(x > 0.5) & ~(y < 0) | (z > 1)", ((x > 0.5) & ~(y < 0)) | (z > 1)),
+    ("maximum(x, y) ** 0.5 - abs(z)", np.maximum(x, y) ** 0.5 - np.abs(z)),
+    ("2 * pi * c * x", 2 * math.pi * SPEED_OF_LIGHT * x),
+]
+
+# ----------------------- #
+
+
+@pytest.mark.parametrize("source, expected", CASES)
+@pytest.mark.parametrize("workers", [1, 4])
+def test_evaluate_matches_numpy(source, expected, workers):
+    result = evaluate(
+        source,
+        dict(x=x, y=y, z=z),
+        backend="numpy",
+        block_elements=512,
+        workers=workers,
+        dtype=np.float64,
+    )
+
+    assert result.shape == expected.shape
+    assert np.allclose(result, expected)
+
+
+# ....................... #
+
+
+def test_constants_fold_unless_shadowed():
+    expr = Expression("2 * pi * c")
+
+    assert expr.names == [] and expr.constants == ["pi", "c"]
+    assert expr.bind() == ("const", 2 * math.pi * SPEED_OF_LIGHT)
+    assert expr({}) == pytest.approx(2 * math.pi * SPEED_OF_LIGHT)
+
+    shadowed = expr(dict(c=np.array([1.0, 2.0])))
+
+    assert shadowed == pytest.approx([2 * math.pi, 4 * math.pi])
+
+
+# ....................... #
+
+
+def test_missing_and_invalid():
+    with pytest.raises(KeyError):
+        evaluate("x + y", dict(x=x))
+
+    with pytest.raises(ValueError):
+        Expression("x.__class__()")
+
+    with pytest.raises(ValueError):
+        Expression("sqrt(x, y)")
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.grid import Grid
+from epoch_toolkit.core.transform.gather import Gather
+
+# ----------------------- #
+
+SIZES = (9, 7, 5)
+GRID = Grid.from_arrays(mins=(0, -3, 1), maxs=(8, 3, 5), sizes=SIZES)
+CENTRES = np.meshgrid(*[a.values() for a in GRID.axes], indexing="ij")
+LINEAR = 2 * CENTRES[0] - 0.5 * CENTRES[1] + 3 * CENTRES[2] + 1
+
+rng = np.random.default_rng(0)
+
+# ----------------------- #
+
+
+def _points(size: int, margin: float):
+    """Random points in the box of cell centres, widened by `margin` cells."""
+
+    return [
+        rng.uniform(a.min - margin * a.spacing, a.max + margin * a.spacing, size)
+        for a in GRID.axes
+    ]
+
+
+# ....................... #
+
+
+def _linear(points):
+    return 2 * points[0] - 0.5 * points[1] + 3 * points[2] + 1
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("method", ["linear", "cic"])
+def test_exact_on_linear_fields(method):
+    points = _points(2000, margin=0)
+    result = Gather(GRID, method=method, chunk_size=333)(points, dict(f=LINEAR))
+
+    assert np.allclose(result["f"], _linear(points))
+
+
+# ....................... #
+
+
+def test_ngp_picks_the_nearest_cell():
+    points = _points(2000, margin=0.49)
+    result = Gather(GRID, method="ngp")(points, dict(f=LINEAR))
+    nearest = [
+        np.clip(np.rint((p - a.min) / a.spacing), 0, a.size - 1) * a.spacing + a.min
+        for p, a in zip(points, GRID.axes)
+    ]
+
+    assert np.allclose(result["f"], _linear(nearest))
+
+
+# ....................... #
+
+
+def test_points_outside():
+    points = _points(4000, margin=2)
+    fields = dict(f=LINEAR)
+    frac = [(p - a.min) / a.spacing for p, a in zip(points, GRID.axes)]
+    in_centres = np.all([(f >= 0) & (f <= n - 1) for f, n in zip(frac, SIZES)], 0)
+    in_cells = np.all([(f >= -0.5) & (f < n - 0.5) for f, n in zip(frac, SIZES)], 0)
+
+    linear = Gather(GRID, method="linear")(points, fields)["f"]
+    ngp = Gather(GRID, method="ngp")(points, fields)["f"]
+    cic = Gather(GRID, method="cic")(points, fields)["f"]
+
+    assert np.array_equal(np.isfinite(linear), in_centres)
+    assert np.array_equal(np.isfinite(ngp), in_cells)
+    assert np.all(np.isfinite(cic))
+
+    # clamped to the box of cell centres
+    clamped = [np.clip(p, a.min, a.max) for p, a in zip(points, GRID.axes)]
+
+    assert np.allclose(cic, _linear(clamped))
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.grid import Grid
+from epoch_toolkit.core.transform.crop import GridCrop
+from epoch_toolkit.core.transform.mask import Mask
+
+# ----------------------- #
+
+SHAPE = (13, 7, 5)
+
+rng = np.random.default_rng(0)
+A = rng.random(SHAPE) < 0.3
+B = rng.random(SHAPE) < 0.6
+
+GRID = Grid.from_arrays(mins=(0, 0, 0), maxs=(12, 6, 4), sizes=SHAPE)
+
+# ----------------------- #
+
+
+def _ranges(dense: np.ndarray) -> Mask:
+    """The same mask stored as ranges of runs of true elements."""
+
+    flat = np.concatenate([[False], dense.reshape(-1), [False]])
+    edges = np.flatnonzero(np.diff(flat.astype(np.int8)))
+
+    return Mask.from_ranges(dense.shape, edges.reshape(-1, 2))
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("storage", ["bits", "ranges"])
+def test_storage_matches_dense(storage):
+    mask = Mask.from_bool(A, chunk_elements=17) if storage == "bits" else _ranges(A)
+
+    assert np.array_equal(mask.dense(chunk_elements=11), A)
+    assert mask.count() == A.sum()
+    assert np.array_equal(mask.indices(), np.flatnonzero(A))
+    assert np.array_equal(
+        mask.select(np.arange(A.size).reshape(SHAPE)), np.flatnonzero(A)
+    )
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("storage", ["bits", "ranges"])
+@pytest.mark.parametrize(
+    "idx",
+    [
+        np.s_[2:9],
+        np.s_[1:12:3],
+        np.s_[:, 1:6:2],
+        np.s_[::-2, :, 1:],
+        np.s_[4],
+        np.s_[:, 3],
+        np.s_[3:10, ::2, 4],
+    ],
+)
+def test_views_match_dense(storage, idx):
+    mask = Mask.from_bool(A) if storage == "bits" else _ranges(A)
+    view = mask[idx]
+
+    assert np.array_equal(np.asarray(view), A[idx])
+
+    if isinstance(view, Mask):
+        assert view.count() == A[idx].sum()
+        assert np.array_equal(view.indices(), np.flatnonzero(A[idx]))
+        assert np.array_equal(np.asarray(view[1:]), A[idx][1:])
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("left", ["bits", "ranges"])
+@pytest.mark.parametrize("right", ["bits", "ranges"])
+def test_logic_matches_dense(left, right):
+    a = Mask.from_bool(A) if left == "bits" else _ranges(A)
+    b = Mask.from_bool(B) if right == "bits" else _ranges(B)
+
+    assert np.array_equal(np.asarray(a & b), A & B)
+    assert np.array_equal(np.asarray(a | b), A | B)
+    assert np.array_equal(np.asarray(~a), ~A)
+    assert np.array_equal(np.asarray(~(a[2:9] & b[2:9])), ~(A[2:9] & B[2:9]))
+    assert (~a).count() == (~A).sum()
+
+
+# ....................... #
+
+
+def test_box_matches_crops():
+    crops = [GridCrop(axis="x", min=2, max=9), GridCrop(axis="z", min=1, max=3)]
+    box = Mask.box(GRID, crops)
+
+    expected = np.zeros(SHAPE, dtype=bool)
+    bounds = [c.bounds(GRID) for c in crops]
+    expected[bounds[0], :, bounds[1]] = True
+
+    assert box.ranges is not None
+    assert np.array_equal(np.asarray(box), expected)
+
+    slab = Mask.box(GRID, crops[:1])
+
+    assert len(slab.ranges) == 1
+
+
+# ....................... #
+
+
+def test_from_ranges_merges_overlaps():
+    mask = Mask.from_ranges((20,), [[5, 8], [0, 2], [7, 10], [2, 3], [12, 12]])
+
+    assert mask.ranges.tolist() == [[0, 3], [5, 10]]
+    assert np.array_equal(np.flatnonzero(mask.dense()), [0, 1, 2, 5, 6, 7, 8, 9])
+
+
+# ....................... #
+
+
+def test_threshold_and_sample():
+    values = rng.standard_normal(SHAPE)
+    mask = Mask.threshold(values, min=-0.5, max=1.0, chunk_elements=9)
+
+    assert np.array_equal(np.asarray(mask), (values >= -0.5) & (values <= 1.0))
+
+    sample = Mask.sample(10000, 0.25, seed=3, chunk_elements=999)
+    again = Mask.sample(10000, 0.25, seed=3, chunk_elements=999)
+
+    assert np.array_equal(sample.dense(), again.dense())
+    assert 2200 < sample.count() < 2800
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.handler.extract import ExtractionPlan, process_dump
+from epoch_toolkit.handler.merge import merge_parts
+
+# ----------------------- #
+
+PLAN = ExtractionPlan(
+    extractions=[
+        dict(name="ex", quantity="electric_field", component="x"),
+        dict(
+            name="ne_crop",
+            quantity="density",
+            specie="electron",
+            crops=[dict(axis="y", min=-5e-7, max=5e-7)],
+            slices=[dict(axis="z", value=0.0)],
+        ),
+        dict(
+            name="ex_sum",
+            quantity="electric_field",
+            component="x",
+            projection=dict(axis="x", op="sum"),
+        ),
+        dict(
+            name="ey_max",
+            quantity="electric_field",
+            component="y",
+            specie="electron",
+            projection=dict(axis="x", op="max"),
+            mask="density > 5e24",
+        ),
+        dict(
+            name="bz_mean",
+            quantity="magnetic_field",
+            component="z",
+            projection=dict(axis="y", op="mean"),
+        ),
+        dict(
+            name="ex_hist",
+            quantity="electric_field",
+            component="x",
+            histogram=dict(bins=16, min=-4, max=4),
+        ),
+    ]
+)
+
+# ----------------------- #
+
+
+@pytest.mark.parametrize("count", [2, 3, 5])
+def test_slab_merge_matches_unsplit(dump_files, tmp_path, count):
+    PLAN.check_sliceable()
+    (path,) = dump_files()
+    out_dir = str(tmp_path / "out")
+
+    _, whole = process_dump(path, PLAN, out_dir, write=False)
+    parts = [
+        process_dump(path, PLAN, out_dir, slab=(k, count), write=False)[1]
+        for k in range(count)
+    ]
+    merged = merge_parts(parts, PLAN)
+
+    for extraction in PLAN.extractions:
+        name = extraction.name
+
+        assert merged[name].shape == whole[name].shape, name
+        assert np.allclose(merged[name], whole[name], equal_nan=True), name
+
+
+# ....................... #
+
+
+def test_incomplete_slabs(dump_files, tmp_path):
+    (path,) = dump_files()
+    parts = [
+        process_dump(path, PLAN, str(tmp_path), slab=(k, 3), write=False)[1]
+        for k in (0, 2)
+    ]
+
+    with pytest.raises(ValueError):
+        merge_parts(parts, PLAN)
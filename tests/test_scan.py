@@ -0,0 +1,55 @@
+from epoch_toolkit.generator.blocks import Boundaries, Control, NumberWithUnits
+from epoch_toolkit.generator.deck import Deck
+from epoch_toolkit.generator.scan import ParameterScan
+
+# ----------------------- #
+
+
+def _deck() -> Deck:
+    return Deck(
+        control=Control(
+            nx=64,
+            x_min=NumberWithUnits(value=0, unit="micro"),
+            x_max=NumberWithUnits(value=10, unit="micro"),
+            t_end=NumberWithUnits(value=100, unit="femto"),
+        ),
+        boundaries=Boundaries(bc_x_min="simple_laser", bc_x_max="simple_outflow"),
+    )
+
+
+# ....................... #
+
+
+def test_scan_over_whole_fields():
+    values = [
+        NumberWithUnits(value=5, unit="micro"),
+        {"value": 20, "unit": "micro"},
+        {"value": 5, "unit": "micro"},
+    ]
+    scan = ParameterScan(_deck(), {"control.x_max": values})
+
+    decks = [scan.render(point) for point in scan.points()]
+
+    expected = _deck()
+    expected.control.x_max = NumberWithUnits(value=20, unit="micro")
+
+    assert len(decks) == 3
+    assert decks[0] == decks[2] != decks[1]
+    assert decks[1] == expected.render()
+
+
+# ....................... #
+
+
+def test_scan_grid_matches_full_render():
+    scan = ParameterScan(
+        _deck(), {"control.nx": [32, 64], "control.x_max.value": [1.0, 2.0]}
+    )
+
+    for point in scan.points():
+        control = _deck().control.model_dump()
+        control["nx"] = point["control.nx"]
+        control["x_max"]["value"] = point["control.x_max.value"]
+        deck = _deck().model_copy(update=dict(control=Control(**control)))
+
+        assert scan.render(point) == deck.render()
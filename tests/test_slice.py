@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.grid import Grid
+from epoch_toolkit.core.transform.crop import GridCrop
+from epoch_toolkit.core.transform.slice import GridSlice, view_index
+
+# ----------------------- #
+
+GRID = Grid.from_arrays(mins=(0, 0), maxs=(29, 9), sizes=(30, 10))
+CELLS = np.arange(300).reshape(30, 10)
+
+# ----------------------- #
+
+
+def _cells(item) -> set:
+    """The x indices selected by a single crop or slice."""
+
+    return set(CELLS[view_index(GRID, [item])][:, 0] // 10)
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [GridSlice(axis="x", step=2), GridSlice(axis="x", step=2)],
+        [GridSlice(axis="x", step=2), GridSlice(axis="x", step=3)],
+        [GridSlice(axis="x", step=3), GridCrop(axis="x", min=4, max=20)],
+        [GridCrop(axis="x", min=4, max=20), GridSlice(axis="x", step=3)],
+        [GridSlice(axis="x", min=1, step=2), GridSlice(axis="x", min=2, step=2)],
+        [GridSlice(axis="x", min=3, max=25, step=4), GridSlice(axis="x", step=6)],
+    ],
+)
+def test_ranges_intersect(items):
+    index = view_index(GRID, items)
+    selected = set(CELLS[index][:, 0] // 10)
+
+    assert selected == set.intersection(*[_cells(item) for item in items])
+    assert CELLS[index].base is not None
+
+
+# ....................... #
+
+
+def test_plane_within_range():
+    index = view_index(
+        GRID, [GridCrop(axis="x", min=4, max=20), GridSlice(axis="x", value=7)]
+    )
+
+    assert index[0] == 7
+
+    with pytest.raises(ValueError):
+        view_index(
+            GRID, [GridCrop(axis="x", min=4, max=20), GridSlice(axis="x", value=25)]
+        )
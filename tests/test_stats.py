@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.stats import QuantileSketch, RunningStats
+
+# ----------------------- #
+
+rng = np.random.default_rng(0)
+VALUES = np.concatenate(
+    [rng.lognormal(3, 2, 20000), -rng.lognormal(0, 1, 5000), np.zeros(100)]
+)
+rng.shuffle(VALUES)
+
+# ----------------------- #
+
+
+@pytest.mark.parametrize("parts", [1, 2, 7])
+def test_merge_matches_single_pass(parts):
+    single = RunningStats().update(VALUES)
+    merged = RunningStats()
+
+    for chunk in np.array_split(VALUES, parts):
+        merged.merge(RunningStats().update(chunk, chunk_size=999))
+
+    assert merged.count == single.count == VALUES.size
+    assert merged.mean == pytest.approx(VALUES.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(VALUES.var(), rel=1e-10)
+    assert (merged.min, merged.max) == (VALUES.min(), VALUES.max())
+    assert np.array_equal(merged.quantile([0.1, 0.5]), single.quantile([0.1, 0.5]))
+
+
+# ....................... #
+
+
+def test_large_offset_variance():
+    values = 1e9 + rng.standard_normal(10000)
+    stats = RunningStats()
+
+    for chunk in np.array_split(values, 13):
+        stats.merge(RunningStats().update(chunk))
+
+    assert stats.variance == pytest.approx(values.var(), rel=1e-6)
+
+
+# ....................... #
+
+
+def test_nonfinite_and_empty():
+    stats = RunningStats().update(np.array([1.0, np.nan, np.inf, 3.0]))
+
+    assert stats.count == 2 and stats.nonfinite == 2
+    assert stats.mean == 2.0
+
+    empty = RunningStats()
+
+    assert np.isnan(empty.variance) and np.isnan(empty.quantile(0.5))
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05])
+def test_sketch_relative_accuracy(alpha):
+    sketch = QuantileSketch(alpha=alpha)
+
+    for chunk in np.array_split(VALUES, 5):
+        sketch.update(chunk)
+
+    ordered = np.sort(VALUES)
+    q = np.linspace(0, 1, 41)
+    exact = ordered[np.floor(q * (VALUES.size - 1)).astype(int)]
+    approx = sketch.quantile(q)
+
+    assert np.all(np.abs(approx - exact) <= alpha * np.abs(exact) + 1e-12)
+
+
+# ....................... #
+
+
+def test_round_trip():
+    stats = RunningStats(alpha=0.02).update(VALUES)
+    restored = RunningStats.from_dict(stats.to_dict())
+
+    assert restored.to_dict() == stats.to_dict()
+    assert np.array_equal(restored.quantile([0.25, 0.75]), stats.quantile([0.25, 0.75]))
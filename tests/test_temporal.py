@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+from epoch_toolkit.core.temporal import SlidingWindow, TemporalOp
+from epoch_toolkit.handler.archive import Archive
+from epoch_toolkit.handler.folder import FolderHandler
+
+# ----------------------- #
+
+TIMES = np.array([0.0, 1.0, 2.5, 3.0, 4.2, 5.0, 6.1])
+FIELD = np.stack([2 * np.exp(0.7 * t) * np.ones((3, 2)) for t in TIMES])
+
+# ----------------------- #
+
+
+def _stream(op: TemporalOp):
+    window = SlidingWindow(op)
+    results = [window.push(f, t) for t, f in zip(TIMES, FIELD)]
+
+    return [r for r in results if r is not None]
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("window, stride", [(2, 1), (3, 1), (4, 2)])
+def test_sliding_window_matches_fits(window, stride):
+    starts = range(0, len(TIMES) - window + 1, stride)
+
+    for operation in ("diff", "mean", "derivative", "growth_rate"):
+        op = TemporalOp(operation=operation, window=window, stride=stride)
+        results = _stream(op)
+
+        assert len(results) == op.count(len(TIMES)) == len(starts)
+
+        for start, (time, value) in zip(starts, results):
+            t = TIMES[start : start + window]
+            f = FIELD[start : start + window, 0, 0]
+            expected = dict(
+                diff=f[-1] - f[0],
+                mean=f.mean(),
+                derivative=np.polyfit(t, f, 1)[0],
+                growth_rate=np.polyfit(t, np.log(f), 1)[0],
+            )[operation]
+
+            assert time == pytest.approx(t.mean())
+            assert np.allclose(value, expected)
+
+
+# ....................... #
+
+
+def test_growth_rate_of_exponential():
+    op = TemporalOp(operation="growth_rate", window=3)
+
+    for _, value in _stream(op):
+        assert np.allclose(value, 0.7)
+
+
+# ....................... #
+
+
+@pytest.mark.parametrize("out", [False, True])
+def test_folder_temporal_matches_dense(dump_files, tmp_path, out):
+    paths = dump_files(count=5)
+    handler = FolderHandler(log_level="error")
+    handler.read(str(tmp_path))
+
+    op = TemporalOp(operation="derivative", window=3)
+    target = str(tmp_path / "dbdt.npy") if out else None
+    result = handler.temporal("magnetic_field.z", op, out=target, chunk_elements=37)
+
+    cubes = np.stack([Archive(p).Magnetic_Field_Bz.data for p in paths])
+    times = np.array([Archive(p).Header["time"] for p in paths])
+    expected = [op.apply(cubes[k : k + 3], times[k : k + 3]) for k in range(3)]
+
+    assert np.allclose(result["time"], [times[k : k + 3].mean() for k in range(3)])
+    assert np.allclose(result["value"], np.stack(expected))
+
+    if out:
+        assert np.allclose(np.load(target), result["value"])
+
+    # nothing is left inside the run folder
+    listed = {name for name in os.listdir(tmp_path) if not name.startswith(".")}
+
+    assert listed == {os.path.basename(p) for p in paths} | (
+        {"dbdt.npy"} if out else set()
+    )
+    assert not os.path.exists(os.path.join(tmp_path, ".epoch_toolkit", "temporal"))
@@ -0,0 +1,26 @@
+import numpy as np
+
+from epoch_toolkit.core import ScaledArray, Unit
+
+# ----------------------- #
+
+
+def test_unit_symbols():
+    assert [f"{u.symbol}m" for u in (Unit.micro, Unit.nano)] == ["µm", "nm"]
+    assert [f"{u.symbol}s" for u in (Unit.femto, Unit.pico)] == ["fs", "ps"]
+    assert len({u.symbol for u in Unit}) == len(Unit)
+
+
+# ....................... #
+
+
+def test_scaled_array_matches_eager_conversion():
+    data = np.linspace(-3e-6, 5e-6, 101)
+    x = ScaledArray(data, unit="micro")
+
+    assert np.allclose(np.asarray(x), data / 1e-6)
+    assert np.allclose(np.asarray(x[::10]), data[::10] / 1e-6)
+    assert np.isclose(x.max(), data.max() / 1e-6)
+    assert np.isclose((x * -1).min(), -data.max() / 1e-6)
+    assert np.isclose((x * -1).percentile(90), np.percentile(-data / 1e-6, 90))
+    assert np.isclose(x.to("nano").mean(), data.mean() / 1e-9)
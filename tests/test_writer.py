@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from epoch_toolkit.handler.writer import AsyncWriter, is_batch, read_batch
+
+# ----------------------- #
+
+
+def _result(k: int, size: int = 16):
+    return dict(value=np.full(size, k, dtype=np.float64))
+
+
+# ....................... #
+
+
+def test_counts_from_concurrent_producers(tmp_path):
+    writer = AsyncWriter(max_bytes=1 << 12, batch_bytes=1 << 10, small_bytes=256)
+
+    def _put(k: int):
+        size = 16 if k % 2 else 64
+        writer.put(str(tmp_path / f"{k:03d}.npz"), _result(k, size))
+        writer.stats()
+
+    with writer, ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_put, range(200)))
+
+    names = os.listdir(tmp_path)
+    batches = [n for n in names if is_batch(n)]
+    stats = writer.stats()
+
+    assert stats.items == 200
+    assert stats.files == len(names)
+    assert stats.bytes == 100 * (16 + 64) * 8
+
+    found = {n for n in names if not is_batch(n)}
+
+    for name in batches:
+        for stored, arrays in read_batch(str(tmp_path / name)).items():
+            assert np.all(arrays["value"] == int(stored[:-4]))
+            found.add(stored)
+
+    assert batches and found == {f"{k:03d}.npz" for k in range(200)}
+
+
+# ....................... #
+
+
+def test_error_raised_once(tmp_path):
+    def _fail(target, result):
+        raise OSError("disk full")
+
+    writer = AsyncWriter()
+    writer.put(str(tmp_path / "a.npz"), _result(0), save=_fail)
+
+    with pytest.raises(OSError):
+        writer.close()
+
+    writer.close()